@@ -0,0 +1,73 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { DealMatchAPIResponse } from '@/types';
+import { readManifest, loadDealsIndex } from '@/lib/deals';
+import { IngredientQuery, matchIngredients } from '@/lib/dealMatching';
+
+export const dynamic = 'force-dynamic';
+
+// Upper bounds on one request
+const MAX_INGREDIENTS = 200;
+const MAX_LIMIT = 20;
+
+/**
+ * POST /api/deals/match
+ * Match a whole shopping list against the latest deals of all stores
+ *
+ * Request body:
+ * {
+ *   ingredients: (string | { name: string, unit?: string, category?: string })[] (required)
+ *   limit?: number (optional, deals per ingredient, default: 3)
+ * }
+ */
+export async function POST(request: NextRequest) {
+  try {
+    const body = await request.json();
+
+    if (!Array.isArray(body.ingredients) || body.ingredients.length === 0) {
+      return NextResponse.json<DealMatchAPIResponse>(
+        { success: false, error: 'Missing required field: ingredients' },
+        { status: 400 }
+      );
+    }
+
+    if (body.ingredients.length > MAX_INGREDIENTS) {
+      return NextResponse.json<DealMatchAPIResponse>(
+        { success: false, error: `At most ${MAX_INGREDIENTS} ingredients per request` },
+        { status: 400 }
+      );
+    }
+
+    const queries: IngredientQuery[] = body.ingredients.map((ingredient: any) =>
+      typeof ingredient === 'string'
+        ? { name: ingredient }
+        : { name: String(ingredient?.name || ''), unit: ingredient?.unit, category: ingredient?.category }
+    );
+    const limit = Math.min(Math.max(parseInt(body.limit, 10) || 3, 1), MAX_LIMIT);
+
+    const manifest = readManifest();
+    const index = manifest?.index ? loadDealsIndex(manifest.index) : null;
+
+    if (!manifest || !index) {
+      return NextResponse.json<DealMatchAPIResponse>(
+        { success: false, error: 'No deals index available. Run the scrapers first.' },
+        { status: 404 }
+      );
+    }
+
+    const matches = matchIngredients(index, queries, limit);
+
+    return NextResponse.json<DealMatchAPIResponse>({
+      success: true,
+      data: {
+        matches: queries.map((query, i) => ({ ingredient: query.name, deals: matches[i] })),
+        latest_date: manifest.latest_date,
+      },
+    });
+  } catch (error) {
+    console.error('Error in POST /api/deals/match:', error);
+    return NextResponse.json<DealMatchAPIResponse>(
+      { success: false, error: 'Internal server error while matching deals.' },
+      { status: 500 }
+    );
+  }
+}
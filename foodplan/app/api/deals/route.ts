@@ -1,13 +1,11 @@
 import { NextRequest, NextResponse } from 'next/server';
 import fs from 'fs';
 import path from 'path';
-import { StoreDealsJSON, DealWithStore, DealsAPIResponse } from '@/types';
+import { StoreDealsJSON, DealWithStore, DealsAPIResponse, DealsIndex } from '@/types';
+import { SALE_DIR, loadDealsIndex, readManifest } from '@/lib/deals';
 
 export const dynamic = 'force-dynamic';
 
-// Path to the sale directory (relative to project root)
-const SALE_DIR = path.join(process.cwd(), 'sale');
-
 /**
  * Find the latest date folder in the sale directory
  */
@@ -69,6 +67,75 @@ function enrichDealsWithStore(storeData: StoreDealsJSON, storeSlug: 'netto' | 'r
   }));
 }
 
+/**
+ * Filter and sort deals using the precomputed index.
+ * Returns the same result as filtering and sorting the store files directly.
+ */
+function queryDealsIndex(
+  index: DealsIndex,
+  storesToRead: string[],
+  categoryFilter: string | null,
+  searchQuery: string | undefined,
+  sortBy: 'price' | 'price_per_unit' | 'name' | null,
+  sortOrder: 'asc' | 'desc'
+) {
+  const stores = storesToRead
+    .map(slug => index.stores.find(store => store.slug === slug))
+    .filter((store): store is DealsIndex['stores'][number] => Boolean(store));
+
+  const storePositions = stores.flatMap(store => index.by_store[store.slug] || []);
+  const categories = Array.from(
+    new Set(stores.flatMap(store => index.categories_by_store[store.slug] || []))
+  ).sort();
+
+  let positions = storePositions;
+
+  // Category filter
+  if (categoryFilter) {
+    const wanted = categoryFilter.toLowerCase();
+    const categoryPositions = new Set(
+      Object.keys(index.by_category)
+        .filter(category => category.toLowerCase() === wanted)
+        .flatMap(category => index.by_category[category])
+    );
+    positions = positions.filter(position => categoryPositions.has(position));
+  }
+
+  // Price per unit order is precomputed; keep only the selected positions
+  if (sortBy === 'price_per_unit') {
+    const selected = new Set(positions);
+    const order = sortOrder === 'desc' ? index.price_per_unit_desc : index.price_per_unit_asc;
+    positions = order.filter(position => selected.has(position));
+  }
+
+  let deals = positions.map(position => index.deals[position]);
+
+  // Search filter
+  if (searchQuery) {
+    deals = deals.filter(
+      deal =>
+        deal.normalized_name.toLowerCase().includes(searchQuery) ||
+        deal.original_name.toLowerCase().includes(searchQuery)
+    );
+  }
+
+  if (sortBy === 'price' || sortBy === 'name') {
+    deals.sort((a, b) => {
+      const compareValue = sortBy === 'price'
+        ? a.price - b.price
+        : a.normalized_name.localeCompare(b.normalized_name);
+      return sortOrder === 'desc' ? -compareValue : compareValue;
+    });
+  }
+
+  return {
+    deals,
+    totalAvailable: storePositions.length,
+    stores: stores.map(store => store.store_name),
+    categories,
+  };
+}
+
 /**
  * GET /api/deals
  * Query params:
@@ -80,8 +147,9 @@ function enrichDealsWithStore(storeData: StoreDealsJSON, storeSlug: 'netto' | 'r
  */
 export async function GET(request: NextRequest) {
   try {
-    // Find the latest date folder
-    const latestDate = findLatestDateFolder();
+    // Find the latest date folder, from the scrapers' manifest if there is one
+    const manifest = readManifest();
+    const latestDate = manifest ? manifest.latest_date : findLatestDateFolder();
 
     if (!latestDate) {
       return NextResponse.json<DealsAPIResponse>(
@@ -104,6 +172,36 @@ export async function GET(request: NextRequest) {
     // Determine which stores to read
     const storesToRead = storeFilter ? [storeFilter] : ['netto', 'rema', 'meny'];
 
+    // Serve from the precomputed index when the scrapers have written one
+    const index = manifest?.index ? loadDealsIndex(manifest.index) : null;
+
+    if (index) {
+      const result = queryDealsIndex(
+        index, storesToRead, categoryFilter, searchQuery, sortBy, sortOrder
+      );
+
+      if (result.totalAvailable === 0) {
+        return NextResponse.json<DealsAPIResponse>(
+          {
+            success: false,
+            error: 'No deals found for the specified criteria.',
+          },
+          { status: 404 }
+        );
+      }
+
+      return NextResponse.json<DealsAPIResponse>({
+        success: true,
+        data: {
+          deals: result.deals,
+          total_count: result.deals.length,
+          stores: result.stores,
+          categories: result.categories,
+          latest_date: latestDate,
+        },
+      });
+    }
+
     // Read all store deals
     let allDeals: DealWithStore[] = [];
     const availableStores: string[] = [];
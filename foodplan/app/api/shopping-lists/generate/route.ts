@@ -1,6 +1,8 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { createClient } from '@/lib/supabase/server';
 import type { CreateShoppingList, CreateShoppingListItem, RecipeIngredient } from '@/types';
+import { loadLatestDealsIndex } from '@/lib/deals';
+import { matchIngredients, tokenize } from '@/lib/dealMatching';
 
 export const dynamic = 'force-dynamic';
 
@@ -153,15 +155,92 @@ async function findDealForIngredient(
   supabase: any,
   ingredientName: string
 ): Promise<string | null> {
-  const nameLower = ingredientName.toLowerCase();
+  const words = tokenize(ingredientName);
+  if (words.length === 0) {
+    return null;
+  }
+
+  // Deals are loaded into the deals table by scripts/load_deals.py.
+  // Pick the cheapest current deal containing every ingredient word as a
+  // whole word (\m and \M are word boundaries), like the index matcher.
+  const today = new Date().toISOString().split('T')[0];
+
+  let query = supabase
+    .from('deals')
+    .select('id')
+    .lte('valid_from', today)
+    .gte('valid_to', today);
+  for (const word of words) {
+    query = query.filter('original_name', 'imatch', `\\m${word}\\M`);
+  }
 
-  // Search in current deals (from JSON files via deals table if populated)
-  // For now, we'll return null since deals are stored in JSON files
-  // In a production system, you'd search the deals database table
+  const { data, error } = await query
+    .order('price_per_unit', { ascending: true, nullsFirst: false })
+    .limit(1);
 
-  // TODO: Implement deal matching when deals are in database
-  // For now, just return null
-  return null;
+  if (error) {
+    console.error('Error looking up deals:', error);
+    return null;
+  }
+
+  return data && data.length > 0 ? data[0].id : null;
+}
+
+/**
+ * Find matching deals for all ingredients at once: match them against the
+ * precomputed deals index, then resolve the matches to deals table rows in
+ * one query. Falls back to per-ingredient lookups when there is no index.
+ */
+async function findDealsForIngredients(
+  supabase: any,
+  ingredients: RecipeIngredient[]
+): Promise<(string | null)[]> {
+  const index = loadLatestDealsIndex();
+  if (!index) {
+    return Promise.all(ingredients.map(ingredient => findDealForIngredient(supabase, ingredient.name)));
+  }
+
+  // Only whole-word matches are linked automatically; substring hits
+  // ('smør' in 'smørrebrød') are left to the deals search
+  const matches = matchIngredients(
+    index,
+    ingredients.map(ingredient => ({ name: ingredient.name, unit: ingredient.unit })),
+    1,
+    true
+  );
+
+  const dealKey = (storeSlug: string, validFrom: string, dealHash: string) =>
+    `${storeSlug}|${validFrom}|${dealHash}`;
+  const hashes = Array.from(new Set(
+    matches.flatMap(deals => deals.map(deal => deal.deal_hash).filter((hash): hash is string => !!hash))
+  ));
+  if (hashes.length === 0) {
+    return ingredients.map(() => null);
+  }
+
+  const { data, error } = await supabase
+    .from('deals')
+    .select('id, valid_from, deal_hash, stores(slug)')
+    .in('deal_hash', hashes);
+
+  if (error) {
+    console.error('Error resolving matched deals:', error);
+    return ingredients.map(() => null);
+  }
+
+  const dealIds = new Map<string, string>();
+  for (const row of data || []) {
+    if (row.stores?.slug) {
+      dealIds.set(dealKey(row.stores.slug, row.valid_from, row.deal_hash), row.id);
+    }
+  }
+
+  return matches.map(deals => {
+    const deal = deals[0];
+    return deal?.deal_hash
+      ? dealIds.get(dealKey(deal.store_slug, deal.valid_from, deal.deal_hash)) ?? null
+      : null;
+  });
 }
 
 /**
@@ -286,9 +365,11 @@ export async function POST(request: NextRequest) {
     // Create items for each aggregated ingredient
     const itemsToInsert: CreateShoppingListItem[] = [];
 
-    for (const ingredient of aggregatedIngredients) {
-      // Try to find a matching deal
-      const dealId = await findDealForIngredient(supabase, ingredient.name);
+    // Match the whole list against current deals in one call
+    const dealIds = await findDealsForIngredients(supabase, aggregatedIngredients);
+
+    aggregatedIngredients.forEach((ingredient, i) => {
+      const dealId = dealIds[i];
 
       itemsToInsert.push({
         shopping_list_id: shoppingList.id,
@@ -303,7 +384,7 @@ export async function POST(request: NextRequest) {
         estimated_price: undefined,
         notes: undefined,
       });
-    }
+    });
 
     // Bulk insert items
     const { data: items, error: itemsError } = await supabase
@@ -0,0 +1,31 @@
+import { test } from 'node:test';
+import assert from 'node:assert/strict';
+import { readFileSync } from 'fs';
+import { join } from 'path';
+import { DealsIndex, DealWithStore } from '@/types';
+import { IngredientQuery, matchIngredients } from './dealMatching';
+
+/**
+ * The cases scripts/tests/test_deal_matcher.py runs against deal_matcher.py
+ */
+interface MatchCase {
+  query: IngredientQuery;
+  limit: number;
+  whole_words: boolean;
+  expected: string[];
+}
+
+const fixture: { deals: DealWithStore[]; match: DealsIndex['match']; cases: MatchCase[] } = JSON.parse(
+  readFileSync(join(process.cwd(), 'scripts', 'tests', 'fixtures', 'matching', 'cases.json'), 'utf-8')
+);
+
+const index = { deals: fixture.deals, match: fixture.match } as DealsIndex;
+
+for (const matchCase of fixture.cases) {
+  const { name, unit, category } = matchCase.query;
+  const mode = matchCase.whole_words ? 'link' : 'search';
+  test(`${mode} ${[name, unit, category].filter(Boolean).join(' / ')} (limit ${matchCase.limit})`, () => {
+    const [deals] = matchIngredients(index, [matchCase.query], matchCase.limit, matchCase.whole_words);
+    assert.deepEqual(deals.map(deal => deal.original_name), matchCase.expected);
+  });
+}
@@ -0,0 +1,200 @@
+import { DealsIndex, DealWithStore } from '@/types';
+
+/**
+ * Ingredient-to-deal matching over the postings in deals_index.json.
+ * Mirrors scripts/deal_matcher.py, which builds the postings; keep the
+ * tokenization rules and scores of the two in sync. Both are tested against
+ * scripts/tests/fixtures/matching/cases.json (npm test).
+ */
+
+// Built with the constructor: the u flag needs an ES2015+ compile target as a literal
+const TOKEN_PATTERN = new RegExp('\\p{L}+', 'gu');
+
+// Filler words that never identify a product
+const STOPWORDS = new Set(['og', 'med', 'af', 'til', 'pr', 'eller', 'fx', 'ca', 'el', 'i', 'på', 'uden']);
+
+// Units and pack words, which say nothing about what the product is
+const UNIT_WORDS = new Set(['g', 'kg', 'ml', 'cl', 'l', 'stk', 'pak', 'pack', 'bakke', 'ps', 'fl', 'ds', 'gr']);
+
+// unit_type -> unit family, for preferring deals sold the way a recipe measures
+const UNIT_FAMILIES: Record<string, string> = {
+  g: 'weight',
+  kg: 'weight',
+  ml: 'volume',
+  cl: 'volume',
+  l: 'volume',
+  stk: 'count',
+};
+
+const TRIGRAM_SIZE = 3;
+
+// Score per query word matched as a whole word / inside a longer word
+const WORD_SCORE = 2;
+const SUBSTRING_SCORE = 1;
+const UNIT_FAMILY_BONUS = 1;
+
+export interface IngredientQuery {
+  name: string;
+  unit?: string;
+  category?: string;
+}
+
+interface PreparedIndex {
+  tokens: Map<string, number[]>;
+  trigrams: Map<string, Set<number>>;
+  unitFamilyOf: (string | undefined)[];
+  categoryOf: string[];
+  names: string[];
+}
+
+// Postings turned into Maps/Sets once per loaded index
+const prepared = new WeakMap<DealsIndex, PreparedIndex>();
+
+/**
+ * Distinct lowercase word tokens, without numbers, units or filler
+ */
+export function tokenize(text: string): string[] {
+  const tokens: string[] = [];
+  for (const token of text.toLowerCase().match(TOKEN_PATTERN) || []) {
+    if (STOPWORDS.has(token) || UNIT_WORDS.has(token) || tokens.includes(token)) {
+      continue;
+    }
+    tokens.push(token);
+  }
+  return tokens;
+}
+
+function trigrams(token: string): string[] {
+  const grams = new Set<string>();
+  for (let i = 0; i + TRIGRAM_SIZE <= token.length; i++) {
+    grams.add(token.slice(i, i + TRIGRAM_SIZE));
+  }
+  return Array.from(grams);
+}
+
+function prepare(index: DealsIndex): PreparedIndex {
+  let entry = prepared.get(index);
+  if (!entry) {
+    entry = {
+      tokens: new Map(Object.entries(index.match.tokens)),
+      trigrams: new Map(
+        Object.entries(index.match.trigrams).map(([gram, positions]) => [gram, new Set(positions)])
+      ),
+      unitFamilyOf: index.deals.map(deal => UNIT_FAMILIES[deal.unit_type || 'stk']),
+      categoryOf: index.deals.map(deal => deal.category),
+      names: index.deals.map(deal => tokenize(deal.normalized_name || deal.original_name).join(' ')),
+    };
+    prepared.set(index, entry);
+  }
+  return entry;
+}
+
+/**
+ * Scores of the deals containing `word` as a word or inside one
+ */
+function wordMatches(entry: PreparedIndex, word: string): Map<number, number> {
+  const scores = new Map<number, number>();
+  for (const position of entry.tokens.get(word) || []) {
+    scores.set(position, WORD_SCORE);
+  }
+
+  const grams = trigrams(word);
+  if (grams.length === 0) {
+    return scores;
+  }
+
+  const postings = grams
+    .map(gram => entry.trigrams.get(gram) || new Set<number>())
+    .sort((a, b) => a.size - b.size);
+
+  for (const position of Array.from(postings[0])) {
+    if (scores.has(position) || !postings.every(set => set.has(position))) {
+      continue;
+    }
+    if (entry.names[position].includes(word)) {
+      scores.set(position, SUBSTRING_SCORE);
+    }
+  }
+  return scores;
+}
+
+/**
+ * Positions of the best deals for one ingredient: every word of the name must
+ * occur in the deal name, as a whole word with `wholeWords`. Ranked by match
+ * quality, then unit family, then lowest price_per_unit.
+ */
+function matchOne(
+  index: DealsIndex,
+  entry: PreparedIndex,
+  query: IngredientQuery,
+  limit: number,
+  wholeWords: boolean
+): number[] {
+  const words = tokenize(query.name);
+  if (words.length === 0) {
+    return [];
+  }
+
+  let scores: Map<number, number> | null = null;
+  for (const word of words) {
+    const wordScores = wordMatches(entry, word);
+    if (scores === null) {
+      scores = wordScores;
+    } else {
+      const combined = new Map<number, number>();
+      scores.forEach((score, position) => {
+        const wordScore = wordScores.get(position);
+        if (wordScore !== undefined) {
+          combined.set(position, score + wordScore);
+        }
+      });
+      scores = combined;
+    }
+    if (scores.size === 0) {
+      return [];
+    }
+  }
+
+  const required = wholeWords ? WORD_SCORE * words.length : 0;
+  const family = query.unit ? UNIT_FAMILIES[query.unit] : undefined;
+  const ranked: { position: number; score: number; price: number | null }[] = [];
+  scores!.forEach((score, position) => {
+    if (score < required) {
+      return;
+    }
+    if (query.category && entry.categoryOf[position] !== query.category) {
+      return;
+    }
+    const bonus = family && entry.unitFamilyOf[position] === family ? UNIT_FAMILY_BONUS : 0;
+    ranked.push({ position, score: score + bonus, price: index.deals[position].price_per_unit ?? null });
+  });
+
+  ranked.sort((a, b) =>
+    b.score - a.score ||
+    Number(a.price === null) - Number(b.price === null) ||
+    (a.price || 0) - (b.price || 0) ||
+    a.position - b.position
+  );
+
+  return ranked.slice(0, limit).map(match => match.position);
+}
+
+/**
+ * Match a whole shopping list against all stores' deals in one call.
+ * Returns the best deals per ingredient, in the order of `ingredients`.
+ *
+ * Substring matches are good search results but poor automatic links ('smør'
+ * is inside 'smørrebrød'); with `wholeWords` only deals in which every word
+ * of the ingredient is a whole word are returned.
+ */
+export function matchIngredients(
+  index: DealsIndex,
+  ingredients: IngredientQuery[],
+  limit: number = 3,
+  wholeWords: boolean = false
+): DealWithStore[][] {
+  const entry = prepare(index);
+  return ingredients.map(query =>
+    matchOne(index, entry, query, limit, wholeWords).map(position => index.deals[position])
+  );
+}
@@ -0,0 +1,54 @@
+import fs from 'fs';
+import path from 'path';
+import { DealsIndex, DealsManifest } from '@/types';
+
+// Path to the sale directory (relative to project root)
+export const SALE_DIR = path.join(process.cwd(), 'sale');
+
+// Parsed deals index, reused across requests until the file changes
+let cachedIndex: { filePath: string; mtimeMs: number; data: DealsIndex } | null = null;
+
+/**
+ * Read sale/manifest.json written by the scrapers
+ */
+export function readManifest(): DealsManifest | null {
+  try {
+    const manifestPath = path.join(SALE_DIR, 'manifest.json');
+    if (!fs.existsSync(manifestPath)) {
+      return null;
+    }
+    const manifest: DealsManifest = JSON.parse(fs.readFileSync(manifestPath, 'utf-8'));
+    return fs.existsSync(path.join(SALE_DIR, manifest.latest_date)) ? manifest : null;
+  } catch (error) {
+    console.error('Error reading deals manifest:', error);
+    return null;
+  }
+}
+
+/**
+ * Load the precomputed deals index, parsing it only when it has changed
+ */
+export function loadDealsIndex(relativePath: string): DealsIndex | null {
+  try {
+    const filePath = path.join(SALE_DIR, relativePath);
+    const { mtimeMs } = fs.statSync(filePath);
+
+    if (!cachedIndex || cachedIndex.filePath !== filePath || cachedIndex.mtimeMs !== mtimeMs) {
+      const data: DealsIndex = JSON.parse(fs.readFileSync(filePath, 'utf-8'));
+      cachedIndex = { filePath, mtimeMs, data };
+    }
+
+    return cachedIndex.data;
+  } catch (error) {
+    console.error('Error reading deals index:', error);
+    return null;
+  }
+}
+
+/**
+ * Load the deals index of the latest date folder named in the manifest
+ */
+export function loadLatestDealsIndex(): DealsIndex | null {
+  const manifest = readManifest();
+  return manifest?.index ? loadDealsIndex(manifest.index) : null;
+}
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks and regression checks for the per-offer hot path.
+
+Runs quantity parsing, price per unit, categorization, app price detection
+and name normalization over a frozen corpus of offer headings and
+descriptions (benchmarks/hotpath_corpus.json): the offers of the tjek
+stand-in fixtures, whose descriptions carry the sizes, plus PARSER_CASES
+for multi-packs, volumes and weight ranges. It:
+
+- checks every output against the one frozen with the corpus, so a parser
+  change cannot silently change quantities or categories;
+- times each function per offer and compares it with the stored baseline
+  (benchmarks/hotpath_baseline.json), failing when one is slower by more
+  than --threshold (--fast-threshold for functions under a microsecond per
+  offer, whose timings are noisier).
+
+Each timing is taken relative to a fixed calibration loop timed right next
+to it, so a baseline recorded on one machine is roughly usable on another. Re-record
+it with --update-baseline after an intended change; re-freeze the corpus
+with --freeze when outputs change on purpose.
+
+Usage: python3 bench_hotpath.py [--threshold 0.25] [--repeat 11] [--update-baseline]
+       python3 bench_hotpath.py --freeze
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import timeit
+from datetime import datetime
+
+from categorizer import categorize_product
+from deal_parser import calculate_price_per_unit, extract_quantity_info, is_app_price
+from deals_output import write_json_atomic
+from name_normalizer import normalize_name
+from scraper_core import build_deal
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+CORPUS_PATH = os.path.join(BENCH_DIR, 'hotpath_corpus.json')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'hotpath_baseline.json')
+
+# Offers the fixtures lack, as (heading, description, price): sizes in the
+# heading or the description, multi-packs, volumes and weight ranges
+PARSER_CASES = (
+    ("Pepsi max", "24 x 33 cl. Ex. pant", 99.0),
+    ("Coca-Cola 6x33 cl", "Ex. pant", 39.0),
+    ("Faxe Kondi 2 x 1,5 l", "Ex. pant", 30.0),
+    ("Sodavand", "6 x 1,5 l. Ex. pant", 60.0),
+    ("Skyr yoghurt", "4 x 125 g. Flere varianter", 20.0),
+    ("Skyr yoghurt 125 g", "4 x 125 g", 20.0),
+    ("Merrild kaffe", "2 x 400 g", 80.0),
+    ("Rødvin", "75 cl. Ved køb af 3 x 75 cl", 60.0),
+    ("Pepsi Max 1,5 l", "Ex. pant", 15.0),
+    ("Arla letmælk", "1 l", 11.95),
+    ("Tropicana juice", "1,5 l", 25.0),
+    ("Olivenolie", "75 cl", 59.0),
+    ("Hakket oksekød 8-12%", "400-500 g", 40.0),
+    ("Kyllingebryst", "900-1000 g. Max. 3 pk. pr. kunde", 79.0),
+    ("Laks", "250-300 g. App-pris", 49.0),
+    ("Kartofler", "2 kg", 15.0),
+    ("Lurpak smør", "200 g. Max. 6 stk. pr. kunde", 20.0),
+    ("Skrabeæg", "10 stk. Str. M/L", 30.0),
+    ("Spegepølse XL", "10 stk", 30.0),
+    ("Vandmelon", "pr. kg", 9.95),
+    ("Bananer", "pr. stk", 2.0),
+)
+
+DEFAULT_THRESHOLD = 0.25    # allowed slowdown against the baseline
+DEFAULT_REPEAT = 11         # timings per function, the median is kept
+
+# Sub-microsecond functions vary by about ±20% between runs, so they get a
+# wider threshold
+FAST_FUNCTION_US = 1.0
+DEFAULT_FAST_THRESHOLD = 0.4
+
+
+def offer_outputs(heading, description, price):
+    """Everything the hot path derives from one offer, as frozen in the corpus."""
+    quantity, unit_type = extract_quantity_info(description, heading)
+    normalized = normalize_name.__wrapped__(heading)
+    return {
+        "quantity": quantity,
+        "unit_type": unit_type,
+        "price_per_unit": calculate_price_per_unit(price, quantity, unit_type),
+        "category": categorize_product(heading, description),
+        "is_app_price": is_app_price(heading, description),
+        "normalized_name": normalized.name,
+        "product_key": normalized.key,
+    }
+
+
+def _extract_quantity_info(corpus):
+    for entry in corpus:
+        extract_quantity_info(entry["description"], entry["heading"])
+
+
+def _calculate_price_per_unit(corpus):
+    for entry in corpus:
+        calculate_price_per_unit(entry["price"], entry["quantity"], entry["unit_type"])
+
+
+def _categorize_product(corpus):
+    for entry in corpus:
+        categorize_product(entry["heading"], entry["description"])
+
+
+def _is_app_price(corpus):
+    for entry in corpus:
+        is_app_price(entry["heading"], entry["description"])
+
+
+def _normalize_name(corpus):
+    # Bypass the LRU cache: the cost of a heading seen for the first time
+    normalize = normalize_name.__wrapped__
+    for entry in corpus:
+        normalize(entry["heading"])
+
+
+def _build_deal(corpus):
+    for entry in corpus:
+        build_deal(entry["offer"])
+
+
+BENCHMARKS = {
+    "extract_quantity_info": _extract_quantity_info,
+    "calculate_price_per_unit": _calculate_price_per_unit,
+    "categorize_product": _categorize_product,
+    "is_app_price": _is_app_price,
+    "normalize_name": _normalize_name,
+    "build_deal": _build_deal,
+}
+
+
+def calibration_loop():
+    """Fixed pure-Python workload the timings are scaled by."""
+    total = 0
+    for i in range(20000):
+        total += len(str(i)) * i
+    return total
+
+
+def freeze_corpus():
+    """
+    Collect headings and descriptions of the stand-in fixtures and
+    PARSER_CASES with their current outputs, or None without fixtures.
+    """
+    from tjek_standin import load_fixtures
+
+    offers = []
+    for fixture in load_fixtures().values():
+        for offer in fixture["offers"].values():
+            price = (offer.get("pricing") or {}).get("price")
+            if price is not None:
+                offers.append((offer.get("heading", ""), offer.get("description") or "", float(price)))
+    if not offers:
+        return None
+    offers.extend(PARSER_CASES)
+
+    entries = []
+    seen = set()
+    for heading, description, price in offers:
+        if (heading, description, price) in seen:
+            continue
+        seen.add((heading, description, price))
+        entries.append({"heading": heading, "description": description, "price": price,
+                        "expected": offer_outputs(heading, description, price)})
+    return entries
+
+
+def load_corpus():
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        entries = json.load(f)["entries"]
+    for entry in entries:
+        entry.update(quantity=entry["expected"]["quantity"], unit_type=entry["expected"]["unit_type"],
+                     offer={"heading": entry["heading"], "description": entry["description"],
+                            "pricing": {"price": entry["price"]}})
+    return entries
+
+
+def check_outputs(corpus):
+    """(heading, field, expected, actual) for every output that changed."""
+    changes = []
+    for entry in corpus:
+        actual = offer_outputs(entry["heading"], entry["description"], entry["price"])
+        for field, expected in entry["expected"].items():
+            if actual[field] != expected:
+                changes.append((entry["heading"], field, expected, actual[field]))
+    return changes
+
+
+def measure(corpus, repeat, names=None):
+    """
+    Median-of-`repeat` microseconds per offer for each benchmark in `names`
+    (default: all), and its cost relative to the calibration loop timed right
+    next to it, which cancels out most of the machine's speed and drift. The
+    median, unlike the best run, is not decided by one lucky timing.
+    """
+    calibration_number, _ = timeit.Timer(calibration_loop).autorange()
+    timings = {}
+    relative = {}
+    for name in names or BENCHMARKS:
+        bench = BENCHMARKS[name]
+        timer = timeit.Timer(lambda: bench(corpus))
+        number, _ = timer.autorange()  # also warms up lazily built state
+        bench_runs = []
+        calibration_runs = []
+        for _ in range(repeat):
+            calibration_runs.append(timeit.timeit(calibration_loop, number=calibration_number)
+                                    / calibration_number)
+            bench_runs.append(timer.timeit(number) / number)
+        bench_median = statistics.median(bench_runs)
+        timings[name] = bench_median * 1e6 / len(corpus)
+        relative[name] = bench_median / statistics.median(calibration_runs)
+    return timings, relative
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and regression-check the per-offer hot path.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown against the baseline (default: 0.25 = 25%%)")
+    parser.add_argument("--fast-threshold", type=float, default=DEFAULT_FAST_THRESHOLD,
+                        help=f"allowed slowdown for functions under {FAST_FUNCTION_US:g} µs per offer "
+                             f"in the baseline (default: {DEFAULT_FAST_THRESHOLD})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="timings per function, the median is kept")
+    parser.add_argument("--update-baseline", action="store_true", help="store these timings as the baseline")
+    parser.add_argument("--freeze", action="store_true", help="rebuild the corpus with the current outputs")
+    args = parser.parse_args()
+
+    if args.freeze:
+        entries = freeze_corpus()
+        if entries is None:
+            print("No stand-in fixtures to freeze; run tjek_standin.py build (or record) first")
+            return 1
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        write_json_atomic(CORPUS_PATH, {"frozen_at": datetime.now().isoformat(), "entries": entries}, indent=1)
+        print(f"Froze {len(entries)} offers to {CORPUS_PATH}")
+        return 0
+
+    corpus = load_corpus()
+    print(f"Corpus: {len(corpus)} offers")
+
+    changes = check_outputs(corpus)
+    for heading, field, expected, actual in changes[:50]:
+        print(f"CHANGED {field} of {heading!r}: {expected!r} -> {actual!r}")
+    if changes:
+        print(f"{len(changes)} outputs differ from the frozen corpus")
+
+    timings, relative = measure(corpus, args.repeat)
+
+    if args.update_baseline:
+        write_json_atomic(BASELINE_PATH, {
+            "recorded_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "corpus_size": len(corpus),
+            "us_per_offer": {name: round(value, 3) for name, value in timings.items()},
+            "relative_cost": {name: round(value, 4) for name, value in relative.items()},
+        }, indent=2)
+        print(f"Baseline written to {BASELINE_PATH}")
+
+    baseline = None
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    def threshold(name):
+        fast = baseline["us_per_offer"].get(name, FAST_FUNCTION_US) < FAST_FUNCTION_US
+        return max(args.threshold, args.fast_threshold) if fast else args.threshold
+
+    if baseline:
+        # Measure apparent regressions again before failing, a noisy run
+        # can still reach the threshold
+        suspects = [name for name, value in relative.items()
+                    if name in baseline["relative_cost"]
+                    and value / baseline["relative_cost"][name] - 1 > threshold(name)]
+        if suspects:
+            retimings, rerelative = measure(corpus, args.repeat, suspects)
+            for name in suspects:
+                if rerelative[name] < relative[name]:
+                    timings[name], relative[name] = retimings[name], rerelative[name]
+
+    regressions = []
+    print(f"\n{'function':26s} {'µs/offer':>9s} {'baseline':>9s} {'change':>8s}")
+    for name, value in timings.items():
+        expected = baseline["relative_cost"].get(name) if baseline else None
+        if expected is None:
+            print(f"{name:26s} {value:9.2f} {'-':>9s} {'-':>8s}")
+            continue
+        # Compared relative to the calibration loop; the baseline column is
+        # the baseline's µs/offer scaled to this machine
+        change = relative[name] / expected - 1
+        flag = ""
+        if change > threshold(name):
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:26s} {value:9.2f} {value / (1 + change):9.2f} {change:+8.0%}{flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} function(s) slower than the baseline by more than the threshold "
+              f"({args.threshold:.0%}, {max(args.threshold, args.fast_threshold):.0%} under "
+              f"{FAST_FUNCTION_US:g} µs/offer)")
+    return 1 if changes or regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
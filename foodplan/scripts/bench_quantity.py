@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for quantity parsing and price-per-unit calculation.
+Compares deal_parser against the original per-scraper implementation over
+the headings of every scraped deal under sale/, and checks both agree.
+
+Usage: python3 bench_quantity.py [--repeat N]
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import timeit
+
+from deal_parser import MULTIPACK_PATTERN, parse_quantity, price_per_base_unit
+from deals_index import SALE_DIR
+
+
+def legacy_extract_quantity_info(description, heading):
+    """The original extract_quantity_info(), kept as the reference."""
+    text = f"{heading} {description}"
+    quantity = None
+    unit_type = None
+
+    weight_match = re.search(r'(\d+(?:[.,]\d+)?)\s*(kg|g)\b', text, re.IGNORECASE)
+    if weight_match:
+        quantity = weight_match.group(1).replace(',', '.')
+        unit_type = weight_match.group(2).lower()
+        quantity = f"{quantity} {unit_type}"
+    elif re.search(r'(\d+(?:[.,]\d+)?)\s*(l|ml|cl)\b', text, re.IGNORECASE):
+        vol_match = re.search(r'(\d+(?:[.,]\d+)?)\s*(l|ml|cl)\b', text, re.IGNORECASE)
+        quantity = vol_match.group(1).replace(',', '.')
+        unit_type = vol_match.group(2).lower()
+        quantity = f"{quantity} {unit_type}"
+    elif re.search(r'(\d+)\s*[-‐]?\s*(stk|pak|pack)', text, re.IGNORECASE):
+        piece_match = re.search(r'(\d+)\s*[-‐]?\s*(stk|pak|pack)', text, re.IGNORECASE)
+        quantity = f"{piece_match.group(1)} stk"
+        unit_type = "stk"
+    elif re.search(r'(\d+)\s*[-‐]\s*pak', text, re.IGNORECASE):
+        pack_match = re.search(r'(\d+)\s*[-‐]\s*pak', text, re.IGNORECASE)
+        quantity = f"{pack_match.group(1)} stk"
+        unit_type = "stk"
+
+    if not quantity:
+        quantity = "1 stk"
+        unit_type = "stk"
+    return quantity, unit_type
+
+
+def legacy_calculate_price_per_unit(price, quantity, unit_type):
+    """The original calculate_price_per_unit(), kept as the reference."""
+    if not quantity or not unit_type:
+        return None
+    try:
+        qty_match = re.search(r'(\d+(?:[.,]\d+)?)', quantity.replace(',', '.'))
+        if not qty_match:
+            return None
+        qty_value = float(qty_match.group(1))
+        if unit_type == 'g':
+            price_per_unit = (price / qty_value) * 1000
+        elif unit_type == 'kg':
+            price_per_unit = price / qty_value
+        elif unit_type == 'ml' or unit_type == 'cl':
+            if unit_type == 'ml':
+                price_per_unit = (price / qty_value) * 1000
+            else:
+                price_per_unit = (price / qty_value) * 100
+        elif unit_type == 'l':
+            price_per_unit = price / qty_value
+        elif unit_type == 'stk':
+            price_per_unit = price / qty_value
+        else:
+            price_per_unit = None
+        return round(price_per_unit, 2) if price_per_unit else None
+    except (TypeError, ZeroDivisionError):
+        return None
+
+
+def legacy_pipeline(corpus):
+    for heading, description, price in corpus:
+        quantity, unit_type = legacy_extract_quantity_info(description, heading)
+        legacy_calculate_price_per_unit(price, quantity, unit_type)
+
+
+def compiled_pipeline(corpus):
+    for heading, description, price in corpus:
+        parsed = parse_quantity(description, heading)
+        price_per_base_unit(price, parsed.value, parsed.unit)
+
+
+def load_corpus():
+    """(heading, description, price) for every scraped deal under sale/."""
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(SALE_DIR, '*', '*_deals.json'))):
+        with open(path, encoding='utf-8') as f:
+            for deal in json.load(f)['deals']:
+                corpus.append((deal['original_name'], '', deal['price']))
+    return corpus
+
+
+def check_equivalence(corpus):
+    """Return the corpus entries where the two implementations disagree."""
+    mismatches = []
+    for heading, description, price in corpus:
+        if MULTIPACK_PATTERN.search(f"{heading} {description}"):
+            continue  # the legacy parser only read the size of one pack
+        quantity, unit_type = legacy_extract_quantity_info(description, heading)
+        expected = (quantity, unit_type, legacy_calculate_price_per_unit(price, quantity, unit_type))
+        parsed = parse_quantity(description, heading)
+        actual = (parsed.text, parsed.unit, price_per_base_unit(price, parsed.value, parsed.unit))
+        if actual != expected:
+            mismatches.append((heading, expected, actual))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantity parsing.")
+    parser.add_argument("--repeat", type=int, default=50, help="passes over the corpus per timing")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    print(f"Corpus: {len(corpus)} headings")
+
+    mismatches = check_equivalence(corpus)
+    for heading, expected, actual in mismatches:
+        print(f"MISMATCH {heading!r}: legacy={expected} compiled={actual}")
+
+    legacy = min(timeit.repeat(lambda: legacy_pipeline(corpus), number=args.repeat, repeat=5))
+    compiled = min(timeit.repeat(lambda: compiled_pipeline(corpus), number=args.repeat, repeat=5))
+    per_offer = 1e6 / (len(corpus) * args.repeat)
+
+    print(f"legacy:   {legacy * per_offer:6.2f} µs/offer")
+    print(f"compiled: {compiled * per_offer:6.2f} µs/offer")
+    print(f"speedup:  {legacy / compiled:.2f}x")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
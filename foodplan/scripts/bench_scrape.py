@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+End-to-end scrape throughput benchmark against the local tjek stand-in.
+
+Starts tjek_standin.py on a free port and runs each store's whole pipeline
+(discovery, page crawl, offer details, parsing, writing) in its own process,
+with the offer cache, checkpoints and sale/ output in a temporary directory.
+Reports offers/sec, p50/p99 request latency (client side, from the run
+metrics) and peak RSS per store, as the median over --repeat runs.
+
+Run it before and after a concurrency or caching change, with the same
+stand-in settings, to see whether the change helps.
+
+Usage: python3 bench_scrape.py [--store netto] [--repeat 3] [--warm-cache]
+                               [--latency 40] [--jitter 20] [--rate-limited 0.02]
+                               [--errors 0.01] [--json results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from scrape_metrics import LATENCY_BUCKETS_MS, METRICS_SUFFIX, latency_quantile
+from tjek_standin import build_fixtures, load_fixtures, start_server
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_worker(slug, work_dir):
+    """Scrape one store against the stand-in (runs in the child process)."""
+    import checkpoint
+    import offer_cache
+    offer_cache.DEFAULT_CACHE_PATH = os.path.join(work_dir, 'cache', 'tjek_offers.sqlite3')
+    checkpoint.CHECKPOINT_DIR = os.path.join(work_dir, 'checkpoints')
+
+    from scraper_core import scrape_store
+    from stores import STORES
+    config = next(store for store in STORES if store.slug == slug)
+    return 0 if scrape_store(config, sale_dir=os.path.join(work_dir, 'sale')) else 1
+
+
+def peak_rss_mb(usage):
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(usage.ru_maxrss / scale, 1)
+
+
+def run_store(slug, work_dir, server_url, verbose=False):
+    """Run one store's scrape in a child process and collect its results."""
+    env = dict(os.environ, TJEK_SQUID_API=server_url, TJEK_VIEWER_API=server_url)
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--worker', slug, work_dir],
+        cwd=SCRIPTS_DIR, env=env,
+        stdout=None if verbose else subprocess.DEVNULL,
+    )
+    # wait4 gives the child's own resource usage, so peak RSS is per store
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    process_seconds = time.perf_counter() - started
+    if process.returncode != 0:
+        raise RuntimeError(f"{slug} scrape exited with {process.returncode}")
+
+    sale_dir = os.path.join(work_dir, 'sale')
+    date_folder = max(name for name in os.listdir(sale_dir) if name[:1].isdigit())
+    with open(os.path.join(sale_dir, date_folder, f"{slug}{METRICS_SUFFIX}"), encoding='utf-8') as f:
+        report = json.load(f)
+
+    histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    requests = retries = errors = 0
+    for entry in report["hosts"].values():
+        histogram = [a + b for a, b in zip(histogram, entry["histogram"])]
+        requests += entry["requests"]
+        retries += entry["retries"]
+        errors += entry["errors"]
+
+    offers = report["counters"].get("offers", 0)
+    return {
+        "store": slug,
+        "offers": offers,
+        "deals": report["counters"].get("deals", 0),
+        "scrape_seconds": report["wall_seconds"],
+        "process_seconds": round(process_seconds, 3),
+        "offers_per_sec": round(offers / report["wall_seconds"], 1) if report["wall_seconds"] else 0,
+        "requests": requests,
+        "retries": retries,
+        "errors": errors,
+        "p50_ms": latency_quantile(histogram, 0.5),
+        "p99_ms": latency_quantile(histogram, 0.99),
+        "peak_rss_mb": peak_rss_mb(usage),
+        "stages": report["stages"],
+    }
+
+
+def median_result(runs):
+    """Median of the numeric fields over repeated runs of one store."""
+    summary = {"store": runs[0]["store"], "runs": len(runs)}
+    for key, value in runs[0].items():
+        if isinstance(value, (int, float)):
+            values = [run[key] for run in runs if run[key] is not None]
+            summary[key] = statistics.median_low(values) if values else None
+    return summary
+
+
+def format_latency(ms):
+    return f"<={ms}" if ms is not None else f">{LATENCY_BUCKETS_MS[-1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers end to end against the tjek stand-in.")
+    parser.add_argument("--worker", nargs=2, metavar=("SLUG", "DIR"), help=argparse.SUPPRESS)
+    parser.add_argument("--store", action="append", help="store slug (repeatable, default: all with fixtures)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per store (default: 3)")
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="fill the offer cache with an untimed run first")
+    parser.add_argument("--latency", type=float, default=40.0, help="stand-in latency per request, ms")
+    parser.add_argument("--jitter", type=float, default=20.0, help="stand-in latency jitter, ms")
+    parser.add_argument("--rate-limited", type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument("--errors", type=float, default=0.0, help="fraction of 500 responses")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="show the scrapers' output")
+    parser.add_argument("--json", metavar="PATH", help="also write all results to this file")
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(*args.worker)
+
+    fixtures = load_fixtures(stores=args.store)
+    if not fixtures:
+        for path in build_fixtures():
+            print(f"Built fixture {path}")
+        fixtures = load_fixtures(stores=args.store)
+    if not fixtures:
+        print("No fixtures to benchmark")
+        return 1
+
+    server = start_server(fixtures, port=0, latency_ms=args.latency, jitter_ms=args.jitter,
+                          rate_limited=args.rate_limited, errors=args.errors, seed=args.seed)
+    print(f"Stand-in on {server.url}: latency {args.latency}±{args.jitter} ms, "
+          f"{args.rate_limited:.0%} 429s, {args.errors:.0%} errors")
+
+    results = {}
+    try:
+        for slug in fixtures:
+            runs = []
+            with tempfile.TemporaryDirectory(prefix=f"bench-{slug}-") as work_dir:
+                if args.warm_cache:
+                    run_store(slug, work_dir, server.url, args.verbose)
+                for run in range(max(args.repeat, 1)):
+                    # Without --warm-cache every run starts from an empty cache
+                    run_dir = work_dir if args.warm_cache else os.path.join(work_dir, str(run))
+                    runs.append(run_store(slug, run_dir, server.url, args.verbose))
+            results[slug] = {"median": median_result(runs), "runs": runs}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f"\n{'store':8s} {'offers':>6s} {'offers/s':>9s} {'requests':>8s} {'p50 ms':>7s} "
+          f"{'p99 ms':>7s} {'retries':>7s} {'errors':>6s} {'RSS MB':>7s}")
+    for slug, result in results.items():
+        median = result["median"]
+        print(f"{slug:8s} {median['offers']:6.0f} {median['offers_per_sec']:9.1f} {median['requests']:8.0f} "
+              f"{format_latency(median['p50_ms']):>7s} {format_latency(median['p99_ms']):>7s} "
+              f"{median['retries']:7.0f} {median['errors']:6.0f} {median['peak_rss_mb']:7.1f}")
+    print(f"\nStand-in requests: {server.stats}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                "settings": {key: getattr(args, key) for key in
+                             ("repeat", "warm_cache", "latency", "jitter", "rate_limited", "errors", "seed")},
+                "stores": results,
+                "standin_requests": server.stats,
+            }, f, indent=2)
+        print(f"Results written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
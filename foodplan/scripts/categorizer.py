@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Keyword-based product categorization shared by all store scrapers.
+
+All keyword lists are compiled once into a single Aho-Corasick automaton, so
+an offer's text is scanned once no matter how many keywords there are.
+Categories are listed in priority order: when keywords of several categories
+occur, the earliest category wins, as with the original if-chain.
+
+A keyword may carry `\\b` markers to require a word boundary on that side.
+Short words like 'and', 'te' and 'is' need them - otherwise they match
+inside 'mandler', 'varianter' and 'pris'. Keywords without markers match
+anywhere, so Danish compounds like 'oksekød' still hit 'okse' and 'kød'.
+"""
+from collections import deque
+
+DEFAULT_CATEGORY = "Special Offers"
+
+CATEGORY_KEYWORDS = [
+    ("Meat & Poultry", ['kød', 'gris', 'okse', 'kalv', r'\blam', 'kylling', r'\band\b', 'kotelet', 'steg',
+                        'hakket', 'bacon', 'hamburgerryg', 'nakke', 'culotte']),
+    ("Deli & Cold Cuts", ['pølse', 'leverpostej', 'spegepølse', 'pålæg', 'salat']),
+    ("Seafood", ['laks', 'fisk', 'reje', 'sild', 'fiske']),
+    ("Bread & Bakery", ['brød', 'baguette', 'rugbrød', 'æbleskiver']),
+    ("Dairy & Eggs", [r'æg\b', 'ost', 'yoghurt', 'mælk', 'feta', 'mozzarella', 'fraiche', 'smør',
+                      'protein mousse', 'drikkeyoghurt', 'actimel', 'philadelphia', 'buko', 'smelteost']),
+    ("Fruits & Vegetables", ['banan', 'tomat', 'frugt', 'grønt', 'mango', 'appelsin', 'dadler', 'figner',
+                             'porre', 'champignon', 'granatæble']),
+    ("Pasta & International", ['pasta', 'specialiteter', 'gyros']),
+    ("Pantry & Condiments", ['sauce', 'remoulade', 'mayonnaise', 'ærter', 'kartofler', 'suppe', 'passata',
+                             r'mel\b']),
+    ("Spreads & Butter", ['kærgården', 'marmelade']),
+    ("Sweets & Snacks", ['chips', 'slik', 'marabou', 'chocolate', 'chokolade', 'kiks', 'cookies',
+                         'flødeboller', 'nødder', 'granola']),
+    ("Coffee & Tea", ['kaffe', r'\bte\b', 'chai latte']),
+    ("Beverages", ['sodavand', r'øl\b', r'vin\b', 'gløgg', 'energy', 'vitamin well', 'pepsi', 'coca-cola',
+                   'faxe', 'juice', 'drik']),
+    ("Frozen Foods", [r'\bis\b', 'isbar', 'pizza', 'tø og server', 'færdigret']),
+    ("Plant-Based", ['plantedrik', 'naturli', 'den grønne slagter']),
+]
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+
+class KeywordCategorizer:
+    """Multi-pattern keyword matcher mapping text to the best-priority category."""
+
+    def __init__(self, category_keywords, default=DEFAULT_CATEGORY):
+        self.categories = [name for name, _ in category_keywords]
+        self.default = default
+
+        # Trie: goto[state][char] -> state; out[state] lists the keywords
+        # ending there as (priority, length, boundary_before, boundary_after)
+        goto = [{}]
+        out = [[]]
+        for priority, (_, keywords) in enumerate(category_keywords):
+            for keyword in keywords:
+                before = keyword.startswith(r'\b')
+                after = keyword.endswith(r'\b')
+                word = keyword[2 if before else 0:len(keyword) - 2 if after else len(keyword)]
+                state = 0
+                for ch in word:
+                    if ch not in goto[state]:
+                        goto.append({})
+                        out.append([])
+                        goto[state][ch] = len(goto) - 1
+                    state = goto[state][ch]
+                out[state].append((priority, len(word), before, after))
+
+        # Breadth-first failure links, folded into a full transition table so
+        # matching is one dict lookup per character
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = dict(delta[fail[state]])
+            delta[state].update(goto[state])
+            out[state] = out[state] + out[fail[state]]
+            for ch, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(ch, 0)
+                queue.append(child)
+
+        self._delta = delta
+        self._out = [tuple(sorted(matches)) for matches in out]
+
+    def _best_priority(self, text):
+        """Lowest category priority with a keyword in `text` (len(categories) if none)."""
+        delta = self._delta
+        out = self._out
+        best = len(self.categories)
+        last = len(text) - 1
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            matches = out[state]
+            if not matches:
+                continue
+            for priority, length, before, after in matches:
+                if priority >= best:
+                    break
+                if before and i >= length and _is_word_char(text[i - length]):
+                    continue
+                if after and i < last and _is_word_char(text[i + 1]):
+                    continue
+                best = priority
+                break
+            if best == 0:
+                break
+        return best
+
+    def categorize(self, heading, description):
+        """Category for a single offer."""
+        best = self._best_priority(f"{heading} {description}".lower())
+        return self.categories[best] if best < len(self.categories) else self.default
+
+    def categorize_batch(self, offers):
+        """Categories for an iterable of (heading, description) pairs, in order."""
+        categories = self.categories
+        default = self.default
+        best_priority = self._best_priority
+        results = []
+        for heading, description in offers:
+            best = best_priority(f"{heading} {description}".lower())
+            results.append(categories[best] if best < len(categories) else default)
+        return results
+
+
+_categorizer = KeywordCategorizer(CATEGORY_KEYWORDS)
+
+
+def categorize_product(heading, description):
+    """Categorize product based on heading and description."""
+    return _categorizer.categorize(heading, description)
+
+
+def categorize_batch(offers):
+    """Categorize many (heading, description) pairs in one call."""
+    return _categorizer.categorize_batch(offers)
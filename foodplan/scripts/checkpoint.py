@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Checkpoint journal for resuming interrupted scrapes.
+
+The journal is an append-only NDJSON file per store. It records the
+publication, the offer IDs the page crawl discovered (with their hotspot
+fingerprints) and then every completed offer with its deal. A run started
+with --resume reads it back, skips the page crawl and every completed offer,
+and continues with the rest. The journal is removed when a scrape finishes.
+
+The start record also holds the scraped_at of the interrupted run, so a run
+resumed after midnight writes to (and finds its .partial in) the date folder
+the scrape started in.
+"""
+import json
+import os
+
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.cache', 'checkpoints')
+
+
+class CheckpointState:
+    """What an interrupted run had done: discovered offers and completed deals."""
+
+    def __init__(self, publication_id, fingerprints, completed, scraped_at=None):
+        self.publication_id = publication_id
+        self.scraped_at = scraped_at        # None in journals written before it was recorded
+        self.fingerprints = fingerprints    # offer_id -> hotspot fingerprint, in crawl order
+        self.completed = completed          # offer_id -> deal (None if the offer had no price)
+
+
+class CheckpointJournal:
+    """Append-only journal of one store's scrape progress."""
+
+    def __init__(self, slug, checkpoint_dir=None):
+        self.path = os.path.join(checkpoint_dir or CHECKPOINT_DIR, f"{slug}.journal")
+        self.scraped_at = None  # start of the run, written to the start record
+        self._file = None
+
+    def load(self):
+        """Read the journal of an interrupted run, or None if there is none."""
+        if not os.path.exists(self.path):
+            return None
+
+        publication_id = None
+        fingerprints = None
+        scraped_at = None
+        completed = {}
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # truncated by the interruption
+                kind = record.get("type")
+                if kind == "start":
+                    publication_id = record["publication_id"]
+                    fingerprints = record["offers"]
+                    scraped_at = record.get("scraped_at")
+                elif kind == "done":
+                    completed[record["offer_id"]] = record["deal"]
+
+        if publication_id is None or fingerprints is None:
+            return None
+        return CheckpointState(publication_id, fingerprints, completed, scraped_at)
+
+    def _append(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self._file.flush()
+
+    def start(self, publication_id, fingerprints):
+        """Begin a new journal with the offers discovered by the page crawl."""
+        self.close()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._append({"type": "start", "publication_id": publication_id, "scraped_at": self.scraped_at,
+                      "offers": fingerprints})
+
+    def resume(self, state):
+        """Continue the journal of `state`, dropping any truncated last line."""
+        self.scraped_at = state.scraped_at or self.scraped_at
+        self.start(state.publication_id, state.fingerprints)
+        for offer_id, deal in state.completed.items():
+            self.record(offer_id, deal)
+
+    def record(self, offer_id, deal):
+        """Mark an offer as completed."""
+        self._append({"type": "done", "offer_id": offer_id, "deal": deal})
+
+    def close(self):
+        if self._file and not self._file.closed:
+            self._file.close()
+
+    def remove(self):
+        """Delete the journal after a successful scrape."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
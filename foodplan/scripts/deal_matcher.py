@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Ingredient-to-deal matching over an inverted index of product names.
+
+Deal names are split into word tokens; each token is posted under itself and
+under its character trigrams, so an ingredient word matches a deal either as a
+whole word ('mælk' in 'let mælk') or inside a Danish compound ('kød' in
+'oksekød'). A query is answered with set intersections over the postings, so
+a whole shopping list matches against all stores' deals in a few milliseconds.
+
+build_match_index() output is stored in deals_index.json under "match";
+lib/dealMatching.ts answers queries from it with the same rules. Both are
+tested against the cases in tests/fixtures/matching/cases.json.
+
+Substring matches are good search results but poor automatic links ('smør'
+is inside 'smørrebrød'), so with `whole_words` only deals in which every
+query word is a whole word are returned.
+
+Usage: python3 deal_matcher.py [--date YYYY-MM-DD] [--whole-words] INGREDIENT [INGREDIENT ...]
+"""
+import argparse
+import json
+import os
+import re
+
+from deal_parser import BASE_UNITS
+
+TOKEN_PATTERN = re.compile(r'[^\W\d_]+')
+
+# Filler words that never identify a product
+STOPWORDS = frozenset(['og', 'med', 'af', 'til', 'pr', 'eller', 'fx', 'ca', 'el', 'i', 'på', 'uden'])
+
+# Units and pack words, which say nothing about what the product is
+UNIT_WORDS = frozenset(['g', 'kg', 'ml', 'cl', 'l', 'stk', 'pak', 'pack', 'bakke', 'ps', 'fl', 'ds', 'gr'])
+
+# unit_type -> unit family, for preferring deals sold the way a recipe measures
+UNIT_FAMILIES = {
+    'g': 'weight',
+    'kg': 'weight',
+    'ml': 'volume',
+    'cl': 'volume',
+    'l': 'volume',
+    'stk': 'count',
+}
+
+TRIGRAM_SIZE = 3
+
+# Score per query word matched as a whole word / inside a longer word
+WORD_SCORE = 2
+SUBSTRING_SCORE = 1
+UNIT_FAMILY_BONUS = 1
+
+
+def tokenize(text):
+    """Distinct lowercase word tokens of `text`, in order, without numbers, units or filler."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS or token in UNIT_WORDS or token in tokens:
+            continue
+        tokens.append(token)
+    return tokens
+
+
+def trigrams(token):
+    """Character trigrams of a token (none for tokens shorter than three)."""
+    return {token[i:i + TRIGRAM_SIZE] for i in range(len(token) - TRIGRAM_SIZE + 1)}
+
+
+def build_match_index(deals):
+    """
+    Postings for `deals` (dicts with original_name, category and unit_type):
+    tokens and trigrams of the names plus the deals per unit_type, each a
+    sorted list of positions into `deals`.
+    """
+    tokens = {}
+    grams = {}
+    units = {}
+    for position, deal in enumerate(deals):
+        deal_grams = set()
+        for token in tokenize(deal.get('normalized_name') or deal['original_name']):
+            tokens.setdefault(token, []).append(position)
+            deal_grams |= trigrams(token)
+        for gram in deal_grams:
+            grams.setdefault(gram, []).append(position)
+        units.setdefault(deal.get('unit_type') or 'stk', []).append(position)
+
+    return {
+        "tokens": tokens,
+        "trigrams": {gram: sorted(positions) for gram, positions in grams.items()},
+        "units": units,
+    }
+
+
+class DealMatcher:
+    """Batch matcher of ingredient names against a list of deals."""
+
+    def __init__(self, deals, match_index=None, by_category=None):
+        self.deals = deals
+        match_index = match_index or build_match_index(deals)
+        self._tokens = {token: set(positions) for token, positions in match_index['tokens'].items()}
+        self._trigrams = {gram: set(positions) for gram, positions in match_index['trigrams'].items()}
+        self._units = {unit: set(positions) for unit, positions in match_index['units'].items()}
+        self._by_category = {
+            category: set(positions) for category, positions in (by_category or {}).items()
+        }
+        if not by_category:
+            for position, deal in enumerate(deals):
+                self._by_category.setdefault(deal['category'], set()).add(position)
+        self._names = [
+            ' '.join(tokenize(deal.get('normalized_name') or deal['original_name'])) for deal in deals
+        ]
+
+    @classmethod
+    def from_index(cls, index):
+        """Matcher over a loaded deals_index.json."""
+        return cls(index['deals'], index.get('match'), index.get('by_category'))
+
+    def _word_matches(self, word):
+        """{position: score} of deals containing `word` as a word or inside one."""
+        scores = dict.fromkeys(self._tokens.get(word, ()), WORD_SCORE)
+        grams = trigrams(word)
+        if not grams:
+            return scores
+        postings = sorted((self._trigrams.get(gram, set()) for gram in grams), key=len)
+        candidates = set.intersection(*postings) if postings[0] else set()
+        names = self._names
+        for position in candidates:
+            if position not in scores and word in names[position]:
+                scores[position] = SUBSTRING_SCORE
+        return scores
+
+    def match(self, name, unit=None, category=None, limit=3, whole_words=False):
+        """
+        Positions of the best deals for one ingredient: every word of `name`
+        must occur in the deal name, as a whole word with `whole_words`.
+        Ranked by match quality, then unit family (when `unit` is given),
+        then lowest price_per_unit.
+        """
+        words = tokenize(name)
+        if not words:
+            return []
+
+        scores = None
+        for word in words:
+            word_scores = self._word_matches(word)
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {position: score + word_scores[position]
+                          for position, score in scores.items() if position in word_scores}
+            if not scores:
+                return []
+
+        if whole_words:
+            required = WORD_SCORE * len(words)
+            scores = {position: score for position, score in scores.items() if score >= required}
+
+        if category is not None:
+            allowed = self._by_category.get(category, set())
+            scores = {position: score for position, score in scores.items() if position in allowed}
+
+        family = UNIT_FAMILIES.get(unit)
+        if family:
+            for deal_unit, positions in self._units.items():
+                if UNIT_FAMILIES.get(deal_unit) == family:
+                    for position in positions & scores.keys():
+                        scores[position] += UNIT_FAMILY_BONUS
+
+        deals = self.deals
+
+        def rank(position):
+            price = deals[position].get('price_per_unit')
+            return (-scores[position], price is None, price or 0, position)
+
+        return sorted(scores, key=rank)[:limit]
+
+    def match_batch(self, ingredients, limit=3, whole_words=False):
+        """
+        Match a whole shopping list in one call. `ingredients` are names or
+        dicts with name and optional unit and category; returns one list of
+        deal positions per ingredient, in order.
+        """
+        results = []
+        for ingredient in ingredients:
+            if isinstance(ingredient, str):
+                results.append(self.match(ingredient, limit=limit, whole_words=whole_words))
+            else:
+                results.append(self.match(ingredient['name'], ingredient.get('unit'),
+                                          ingredient.get('category'), limit, whole_words))
+        return results
+
+
+def main():
+    from deals_index import INDEX_FILE, SALE_DIR, latest_date_folder
+
+    parser = argparse.ArgumentParser(description="Match ingredient names against the latest deals.")
+    parser.add_argument("ingredients", nargs="+", help="ingredient names")
+    parser.add_argument("--date", help="date folder under sale/ (default: latest)")
+    parser.add_argument("--limit", type=int, default=3, help="deals per ingredient")
+    parser.add_argument("--whole-words", action="store_true",
+                        help="only deals containing every word whole, as used for linking")
+    args = parser.parse_args()
+
+    date_folder = args.date or latest_date_folder()
+    index_path = os.path.join(SALE_DIR, date_folder or '', INDEX_FILE)
+    if not date_folder or not os.path.exists(index_path):
+        print("No deals index found; run deals_index.py first")
+        return 1
+    with open(index_path, encoding='utf-8') as f:
+        index = json.load(f)
+
+    matcher = DealMatcher.from_index(index)
+    for name, positions in zip(args.ingredients, matcher.match_batch(args.ingredients, args.limit, args.whole_words)):
+        print(f"{name}:")
+        if not positions:
+            print("  (no deals)")
+        for position in positions:
+            deal = index['deals'][position]
+            print(f"  {deal['store_name']:10s} {deal['original_name']} - {deal['price']} kr "
+                  f"({deal['price_per_unit']} kr per {BASE_UNITS.get(deal['unit_type'], 'stk')})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
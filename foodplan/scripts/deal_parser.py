@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Parsing of offer headings and descriptions into deal fields.
+Shared by all store scrapers; every pattern is compiled once at import.
+"""
+import re
+from collections import namedtuple
+
+# One alternation so a single scan finds every candidate. Weight beats volume
+# beats pieces regardless of position, so the scan records the first match of
+# each kind and stops early once a weight is found.
+QUANTITY_PATTERN = re.compile(
+    r'(?P<weight>\d+(?:[.,]\d+)?)\s*(?P<weight_unit>kg|g)\b'
+    r'|(?P<volume>\d+(?:[.,]\d+)?)\s*(?P<volume_unit>l|ml|cl)\b'
+    r'|(?P<pieces>\d+)\s*[-‐]?\s*(?:stk|pak|pack)',
+    re.IGNORECASE
+)
+NUMBER_PATTERN = re.compile(r'(\d+(?:[.,]\d+)?)')
+
+# Multi-packs: '2 x 500 g'. The pack count is only looked for right before a
+# weight or volume match, and only when an 'x' is there, which keeps
+# QUANTITY_PATTERN's scan and plain sizes as cheap as before.
+PACK_COUNT_PATTERN = re.compile(r'(?<!\d)(\d+)\s*[x×]\s*\Z', re.IGNORECASE)
+PACK_COUNT_WINDOW = 10      # characters before the size that can hold 'NNN x '
+# 'Ved køb af 3 x 75 cl' is a multi-buy offer, not a pack of three
+MULTIBUY_PATTERN = re.compile(r'\bkøb\s+(?:af\s+)?\Z', re.IGNORECASE)
+MULTIBUY_WINDOW = 8         # characters before the pack count that can hold 'køb af '
+MULTIPACK_PATTERN = re.compile(r'(\d+)\s*[x×]\s*(\d+(?:[.,]\d+)?)', re.IGNORECASE)
+
+# Multiplier from price per unit_type to price per base unit (kg, l, stk)
+BASE_UNIT_FACTORS = {
+    'g': 1000,
+    'kg': 1,
+    'ml': 1000,
+    'cl': 100,
+    'l': 1,
+    'stk': 1,
+}
+
+# Base unit that price_per_unit refers to, per unit_type
+BASE_UNITS = {
+    'g': 'kg',
+    'kg': 'kg',
+    'ml': 'l',
+    'cl': 'l',
+    'l': 'l',
+    'stk': 'stk',
+}
+
+# value is the numeric amount, unit the unit_type and text the display string
+Quantity = namedtuple('Quantity', ['value', 'unit', 'text'])
+
+DEFAULT_QUANTITY = Quantity(1.0, 'stk', '1 stk')
+
+
+def _pack_count(text, start):
+    """Pack count written right before the size at `start` ('2 x 500 g'), or None."""
+    window_start = max(0, start - PACK_COUNT_WINDOW)
+    window = text[window_start:start]
+    if 'x' in window or 'X' in window or '×' in window:
+        count = PACK_COUNT_PATTERN.search(text, window_start, start)
+        if count and int(count.group(1)) > 1 and not MULTIBUY_PATTERN.search(
+                text, max(0, count.start() - MULTIBUY_WINDOW), count.start()):
+            return count.group(1)
+    return None
+
+
+def _has_pack_mark(text, start):
+    """Whether an 'x' follows `start`, so a multi-pack may come later in the text."""
+    return text.find('x', start) >= 0 or text.find('X', start) >= 0 or text.find('×', start) >= 0
+
+
+def _measured_quantity(match, number_group, unit_group, count):
+    """Quantity of a weight or volume match, times its pack count ('2 x 500 g' is 1000 g)."""
+    number = match.group(number_group).replace(',', '.')
+    unit = match.group(unit_group).lower()
+    if count:
+        return Quantity(int(count) * float(number), unit, f"{count} x {number} {unit}")
+    return Quantity(float(number), unit, f"{number} {unit}")
+
+
+def parse_quantity(description, heading):
+    """
+    Parse the quantity of an offer in one pass over heading and description.
+    A multi-pack beats a plain size of the same kind ('Skyr 125 g' described
+    as '4 x 125 g' is 500 g).
+    """
+    text = f"{heading} {description}"
+
+    weight = None
+    volume = None
+    volume_count = None
+    pieces = None
+    for match in QUANTITY_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind == 'weight_unit':
+            count = _pack_count(text, match.start())
+            if count:
+                return _measured_quantity(match, 'weight', 'weight_unit', count)
+            if weight is None:
+                weight = match
+            # Without an 'x' further on no multi-pack can follow
+            if not _has_pack_mark(text, match.end()):
+                break
+        elif weight is None and kind == 'volume_unit' and not volume_count:
+            count = _pack_count(text, match.start())
+            if volume is None or count:
+                volume, volume_count = match, count
+        elif kind == 'pieces' and pieces is None:
+            pieces = match
+
+    if weight:
+        return _measured_quantity(weight, 'weight', 'weight_unit', None)
+    if volume:
+        return _measured_quantity(volume, 'volume', 'volume_unit', volume_count)
+    if pieces:
+        number = pieces.group('pieces')
+        return Quantity(float(number), 'stk', f"{number} stk")
+    return DEFAULT_QUANTITY
+
+
+def extract_quantity_info(description, heading):
+    """Extract quantity information from description and heading."""
+    quantity = parse_quantity(description, heading)
+    return quantity.text, quantity.unit
+
+
+def price_per_base_unit(price, value, unit_type):
+    """Price per kg, l or stk for `value` units of `unit_type`, rounded to øre."""
+    factor = BASE_UNIT_FACTORS.get(unit_type)
+    if factor is None:
+        return None
+    try:
+        price_per_unit = (price / value) * factor
+    except (TypeError, ZeroDivisionError):
+        return None
+    return round(price_per_unit, 2) if price_per_unit else None
+
+
+def quantity_value(quantity):
+    """Numeric amount of a quantity string like '500 g' or '2 x 500 g', or None."""
+    if not quantity:
+        return None
+    # parse_quantity writes packs as '2 x 500 g'; plain sizes skip the pack pattern
+    if 'x' in quantity:
+        multipack = MULTIPACK_PATTERN.search(quantity)
+        if multipack:
+            return int(multipack.group(1)) * float(multipack.group(2).replace(',', '.'))
+    match = NUMBER_PATTERN.search(quantity)
+    return float(match.group(1).replace(',', '.')) if match else None
+
+
+def calculate_price_per_unit(price, quantity, unit_type):
+    """Calculate price per base unit from a quantity string like '500 g'."""
+    if not quantity or not unit_type:
+        return None
+
+    if 'x' in quantity:
+        value = quantity_value(quantity)
+        if value is None:
+            return None
+        return price_per_base_unit(price, value, unit_type)
+
+    # Plain size, inlined: this runs once per deal
+    qty_match = NUMBER_PATTERN.search(quantity)
+    if not qty_match:
+        return None
+    return price_per_base_unit(price, float(qty_match.group(1).replace(',', '.')), unit_type)
+
+
+def is_app_price(heading, description):
+    """Check if the price requires the store's app."""
+    text = f"{heading} {description}".lower()
+    return 'app-pris' in text or 'app pris' in text
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Compact column-oriented storage for many deals at once.
+
+A dict per deal repeats its keys, and across stores and weeks the same
+categories, unit types, quantities and names recur thousands of times.
+DealTable keeps one column per field instead: prices in arrays of doubles
+(NaN for a missing price_per_unit), categories, unit types and quantities as
+small integer codes into interned value lists, and names as shared strings,
+so a heading seen every week is stored once. Store and validity fields are
+kept once per store/week segment.
+
+deal(row) and store_json(segment) give back the deals-file shape, so a
+table round-trips to the existing <slug>_deals.json format. Files scraped
+before product keys existed get one derived from original_name, which is
+left out again when serializing.
+
+Usage: python3 deal_table.py [--weeks N]   (memory of the table vs. dicts)
+"""
+import argparse
+import math
+import os
+import tracemalloc
+from array import array
+
+from deals_index import DATE_FOLDER_PATTERN, SALE_DIR, read_store_files
+from name_normalizer import normalize_name
+
+# Deal fields in <slug>_deals.json order
+DEAL_FIELDS = ('category', 'original_name', 'normalized_name', 'product_key', 'price', 'quantity',
+               'unit_type', 'price_per_unit', 'is_app_price')
+
+# Store fields of a <slug>_deals.json file, kept once per segment
+SEGMENT_FIELDS = ('store_name', 'scraped_at', 'valid_from', 'valid_to', 'week_number')
+
+
+class Interner:
+    """Small integer codes for repeated values."""
+
+    __slots__ = ('values', '_codes')
+
+    def __init__(self):
+        self.values = []
+        self._codes = {}
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class DealTable:
+    """Deals of many stores and weeks in columns."""
+
+    def __init__(self):
+        # one dict of SEGMENT_FIELDS plus store_slug per appended store file
+        self.segments = []
+        self.categories = Interner()
+        self.units = Interner()
+        self.quantities = Interner()
+        self._strings = {}
+
+        self.segment_codes = array('I')
+        self.category_codes = array('H')
+        self.unit_codes = array('H')
+        self.quantity_codes = array('I')
+        self.original_name = []
+        self.normalized_name = []
+        self.product_key = []
+        self.price = array('d')
+        self.price_per_unit = array('d')
+        self.is_app_price = array('B')
+        self.derived_key = array('B')
+
+    def __len__(self):
+        return len(self.price)
+
+    def _shared(self, text):
+        """One string object per distinct name."""
+        return self._strings.setdefault(text, text)
+
+    def append_store(self, slug, store_data):
+        """Add the deals of one <slug>_deals.json payload as a segment. Returns its index."""
+        segment = len(self.segments)
+        self.segments.append(dict({field: store_data.get(field) for field in SEGMENT_FIELDS},
+                                  store_slug=slug))
+        for deal in store_data['deals']:
+            derived = 'product_key' not in deal
+            key = normalize_name(deal['original_name']).key if derived else deal['product_key']
+            price_per_unit = deal.get('price_per_unit')
+
+            self.segment_codes.append(segment)
+            self.category_codes.append(self.categories.code(deal.get('category')))
+            self.unit_codes.append(self.units.code(deal.get('unit_type')))
+            self.quantity_codes.append(self.quantities.code(deal.get('quantity')))
+            self.original_name.append(self._shared(deal['original_name']))
+            self.normalized_name.append(self._shared(deal.get('normalized_name')))
+            self.product_key.append(self._shared(key))
+            self.price.append(deal['price'])
+            self.price_per_unit.append(math.nan if price_per_unit is None else price_per_unit)
+            self.is_app_price.append(1 if deal.get('is_app_price') else 0)
+            self.derived_key.append(1 if derived else 0)
+        return segment
+
+    @classmethod
+    def from_date_dirs(cls, date_dirs):
+        """A table of every store file in `date_dirs`."""
+        table = cls()
+        for date_dir in date_dirs:
+            for slug, store_data in read_store_files(date_dir):
+                table.append_store(slug, store_data)
+        return table
+
+    def unit_price(self, row):
+        """price_per_unit of `row`, or None."""
+        value = self.price_per_unit[row]
+        return None if math.isnan(value) else value
+
+    def display_name(self, row):
+        """normalized_name of `row`, normalized now for files that predate product keys."""
+        if self.derived_key[row]:
+            return normalize_name(self.original_name[row]).name
+        return self.normalized_name[row]
+
+    def deal(self, row):
+        """Row `row` as a deal dict in the deals-file shape."""
+        deal = {
+            "category": self.categories.values[self.category_codes[row]],
+            "original_name": self.original_name[row],
+            "normalized_name": self.normalized_name[row],
+            "product_key": self.product_key[row],
+            "price": self.price[row],
+            "quantity": self.quantities.values[self.quantity_codes[row]],
+            "unit_type": self.units.values[self.unit_codes[row]],
+            "price_per_unit": self.unit_price(row),
+            "is_app_price": bool(self.is_app_price[row]),
+        }
+        if self.derived_key[row]:
+            del deal["product_key"]
+        return deal
+
+    def offer(self, row):
+        """The deal with its segment's store_slug, store_name, valid_from and valid_to."""
+        segment = self.segments[self.segment_codes[row]]
+        return dict(self.deal(row), store_slug=segment['store_slug'], store_name=segment['store_name'],
+                    valid_from=segment['valid_from'], valid_to=segment['valid_to'])
+
+    def store_json(self, segment):
+        """Segment `segment` in the <slug>_deals.json shape."""
+        fields = self.segments[segment]
+        output = {field: fields[field] for field in SEGMENT_FIELDS}
+        output["deals"] = [self.deal(row) for row in range(len(self)) if self.segment_codes[row] == segment]
+        return output
+
+
+def date_dirs(weeks=None, sale_dir=SALE_DIR):
+    """The newest `weeks` date folders under sale/ (all by default), oldest first."""
+    folders = sorted(name for name in os.listdir(sale_dir) if DATE_FOLDER_PATTERN.match(name))
+    return [os.path.join(sale_dir, name) for name in folders[-weeks if weeks else 0:]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the memory of a DealTable with deal dicts.")
+    parser.add_argument("--weeks", type=int, help="newest date folders to load (default: all)")
+    args = parser.parse_args()
+    # Distinct weeks only: loading one week repeatedly would share every name
+    # between the copies and overstate the saving
+    dirs = date_dirs(args.weeks)
+
+    # Product keys derived for older files fill the name normalization cache,
+    # which is not the table's memory; fill it before measuring
+    DealTable.from_date_dirs(dirs)
+
+    tracemalloc.start()
+    deals = [dict(deal, store_slug=slug) for date_dir in dirs
+             for slug, store_data in read_store_files(date_dir) for deal in store_data['deals']]
+    dict_memory = tracemalloc.get_traced_memory()[0]
+    del deals
+    tracemalloc.reset_peak()
+
+    baseline = tracemalloc.get_traced_memory()[0]
+    table = DealTable.from_date_dirs(dirs)
+    table_memory = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    print(f"{len(table)} deals from {len(dirs)} date folders")
+    print(f"  dicts: {dict_memory / 1024 / 1024:.1f} MB")
+    print(f"  table: {table_memory / 1024 / 1024:.1f} MB ({table_memory / dict_memory:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Precomputed deals index for the Next.js deals API.
+
+For a sale/<date>/ folder this writes deals_index.json: every store's deals
+flattened into one list (in the order the API lists them), with index lists
+per store and per category, the price_per_unit orderings and the ingredient
+matching postings (deal_matcher.py) precomputed.
+sale/manifest.json names the latest date folder, so the API does not have to
+scan sale/ or parse every store file on each request.
+
+Usage: python3 deals_index.py [YYYY-MM-DD]   (default: latest date folder)
+"""
+import argparse
+import json
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime
+
+from deal_matcher import build_match_index
+from deals_output import deal_hash, write_json_atomic
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SALE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sale')
+INDEX_FILE = 'deals_index.json'
+MANIFEST_FILE = 'manifest.json'
+LOCK_FILE = '.deals_index.lock'
+INDEX_VERSION = 1
+
+# Store order used by app/api/deals/route.ts when listing all stores
+STORE_SLUGS = ('netto', 'rema', 'meny')
+
+DATE_FOLDER_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def latest_date_folder(sale_dir=SALE_DIR):
+    """Name of the newest YYYY-MM-DD folder under sale/, or None."""
+    if not os.path.isdir(sale_dir):
+        return None
+    folders = [
+        name for name in os.listdir(sale_dir)
+        if DATE_FOLDER_PATTERN.match(name) and os.path.isdir(os.path.join(sale_dir, name))
+    ]
+    return max(folders) if folders else None
+
+
+def read_store_files(date_dir):
+    """(slug, StoreDealsJSON) for each store with a deals file in `date_dir`, in STORE_SLUGS order."""
+    for slug in STORE_SLUGS:
+        path = os.path.join(date_dir, f"{slug}_deals.json")
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding='utf-8') as f:
+            yield slug, json.load(f)
+
+
+def build_index(date_dir):
+    """Build the index for one date folder from its <slug>_deals.json files."""
+    deals = []
+    stores = []
+    by_store = {}
+    by_category = {}
+    categories_by_store = {}
+
+    for slug, store_data in read_store_files(date_dir):
+        stores.append({"slug": slug, "store_name": store_data["store_name"]})
+        positions = by_store.setdefault(slug, [])
+        store_categories = set()
+        for deal in store_data["deals"]:
+            position = len(deals)
+            # Same shape as DealWithStore in types/index.ts
+            deals.append({
+                **deal,
+                "store_name": store_data["store_name"],
+                "store_slug": slug,
+                "valid_from": store_data["valid_from"],
+                "valid_to": store_data["valid_to"],
+                "week_number": store_data["week_number"],
+                "deal_hash": deal_hash(deal),
+            })
+            positions.append(position)
+            by_category.setdefault(deal["category"], []).append(position)
+            store_categories.add(deal["category"])
+        categories_by_store[slug] = sorted(store_categories)
+
+    # The API compares price_per_unit numerically, where null counts as 0.
+    # sorted() is stable like Array.prototype.sort, so ties keep list order.
+    def unit_price(position):
+        return deals[position]["price_per_unit"] or 0
+
+    positions = range(len(deals))
+    return {
+        "version": INDEX_VERSION,
+        "date": os.path.basename(os.path.normpath(date_dir)),
+        "generated_at": datetime.now().isoformat(),
+        "stores": stores,
+        "categories": sorted(by_category),
+        "categories_by_store": categories_by_store,
+        "deals": deals,
+        "by_store": by_store,
+        "by_category": by_category,
+        "price_per_unit_asc": sorted(positions, key=unit_price),
+        "price_per_unit_desc": sorted(positions, key=unit_price, reverse=True),
+        "match": build_match_index(deals),
+    }
+
+
+@contextmanager
+def _write_lock(sale_dir):
+    """Exclusive lock for index and manifest writes; stores scraped in parallel share them."""
+    with open(os.path.join(sale_dir, LOCK_FILE), 'w') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def write_index(date_folder, sale_dir=SALE_DIR):
+    """Write sale/<date>/deals_index.json and refresh sale/manifest.json."""
+    date_dir = os.path.join(sale_dir, date_folder)
+    index_path = os.path.join(date_dir, INDEX_FILE)
+    # Built under the lock too, so the last writer indexes every store file
+    with _write_lock(sale_dir):
+        index = build_index(date_dir)
+        write_json_atomic(index_path, index, separators=(',', ':'))
+        write_manifest(sale_dir)
+    return index_path, index
+
+
+def write_manifest(sale_dir=SALE_DIR):
+    """Write sale/manifest.json naming the latest date folder and its index."""
+    latest = latest_date_folder(sale_dir)
+    if latest is None:
+        return None
+    has_index = os.path.exists(os.path.join(sale_dir, latest, INDEX_FILE))
+    manifest = {
+        "latest_date": latest,
+        "index": f"{latest}/{INDEX_FILE}" if has_index else None,
+        "generated_at": datetime.now().isoformat(),
+    }
+    path = os.path.join(sale_dir, MANIFEST_FILE)
+    write_json_atomic(path, manifest, indent=2)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the precomputed deals index.")
+    parser.add_argument("date", nargs="?", help="date folder under sale/ (default: latest)")
+    args = parser.parse_args()
+
+    date_folder = args.date or latest_date_folder()
+    if not date_folder:
+        print(f"No date folders in {SALE_DIR}")
+        return 1
+
+    index_path, index = write_index(date_folder)
+    print(f"Indexed {len(index['deals'])} deals from {len(index['stores'])} stores to {index_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
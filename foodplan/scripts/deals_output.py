@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Post-processing and writing of scraped deals in sale/<date>/.
+
+Deals are either written in one go as <slug>_deals.json, or streamed one per
+line to <slug>_deals.ndjson while the scrape runs and converted to the
+<slug>_deals.json shape (StoreDealsJSON) that the deals API reads at the end.
+
+Usage: python3 deals_output.py <slug>_deals.ndjson [output.json]
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+
+# Top-level keys of StoreDealsJSON, in the order the scrapers write them
+STORE_KEYS = ("store_name", "scraped_at", "valid_from", "valid_to", "week_number")
+
+# Deal fields hashed into deal_hash. Derived fields (category, normalized name,
+# unit price) are left out, so improving them keeps the hash stable.
+HASH_FIELDS = ('original_name', 'price', 'quantity', 'unit_type', 'is_app_price')
+
+# mkstemp creates files readable only by their owner; written files get the
+# usual permissions instead
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def deal_key(deal):
+    """Identity of a deal for deduplication."""
+    return tuple(sorted(deal.items()))
+
+
+def deal_hash(deal):
+    """Stable hash identifying a deal within its store and week."""
+    payload = json.dumps([deal.get(field) for field in HASH_FIELDS], ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def dedupe_deals(deals):
+    """
+    Drop deals identical to an earlier one, keeping the first occurrence.
+
+    Different offer IDs can still describe the same product at the same price
+    (e.g. the same offer printed in two sections), which the deals API would
+    otherwise list twice. Returns (unique_deals, duplicates_skipped).
+    """
+    seen = set()
+    unique = []
+    for deal in deals:
+        key = deal_key(deal)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(deal)
+    return unique, len(deals) - len(unique)
+
+
+def write_json_atomic(path, data, **dump_kwargs):
+    """
+    Write JSON to a temporary file and rename it over `path`.
+
+    The temporary file has a unique name, so processes writing the same path
+    at once do not truncate or rename each other's files.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=f".{os.path.basename(path)}.",
+                                    suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, **dump_kwargs)
+            f.flush()
+            os.fchmod(f.fileno(), 0o666 & ~_UMASK)
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_ndjson(path):
+    """
+    Read a deals NDJSON file. Returns (header, entries).
+
+    entries are deal dicts that still carry their "offer_id". A truncated last
+    line, as left by a crash mid-write, is ignored.
+    """
+    header = None
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if header is None:
+                header = record
+            else:
+                entries.append(record)
+    return header, entries
+
+
+class StreamingDealWriter:
+    """
+    Append deals to <slug>_deals.ndjson as they are built.
+
+    Lines go to `<path>.partial`, which finish() renames into place, so a
+    reader never sees a half-written file. The first line is the store
+    header; every other line is one deal plus its offer_id. With `resume`,
+    a .partial for the same publication left over from an interrupted run is
+    continued: `resumed` maps the offer IDs it already holds to their deals.
+    """
+
+    def __init__(self, path, header, resume=False):
+        self.path = path
+        self.partial_path = f"{path}.partial"
+        self.header = header
+        self.resumed = {}
+        self.count = 0
+        self.duplicates = 0
+        self._seen = set()
+
+        entries = []
+        if resume and os.path.exists(self.partial_path):
+            old_header, old_entries = read_ndjson(self.partial_path)
+            if old_header and old_header.get("publication_id") == header.get("publication_id"):
+                self.header = old_header
+                entries = old_entries
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Rewrite rather than append, dropping any truncated trailing line
+        self._file = open(self.partial_path, 'w', encoding='utf-8')
+        self._write_line(self.header)
+        for entry in entries:
+            offer_id = entry.pop("offer_id")
+            self.resumed[offer_id] = entry
+            self.write(offer_id, entry)
+        self._file.flush()
+
+    def _write_line(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def write(self, offer_id, deal):
+        """Append one deal, skipping it if identical to one already written."""
+        key = deal_key(deal)
+        if key in self._seen:
+            self.duplicates += 1
+            return
+        self._seen.add(key)
+        self._write_line({"offer_id": offer_id, **deal})
+        self._file.flush()
+        self.count += 1
+
+    def finish(self):
+        """Sync the file and atomically move it to its final name."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.partial_path, self.path)
+        return self.path
+
+    def close(self):
+        """Close without finishing, leaving the .partial to resume from."""
+        if not self._file.closed:
+            self._file.close()
+
+
+def ndjson_to_store_json(ndjson_path, json_path=None):
+    """Convert a deals NDJSON file to the StoreDealsJSON file the deals API reads."""
+    if json_path is None:
+        json_path = os.path.splitext(ndjson_path)[0] + '.json'
+
+    header, entries = read_ndjson(ndjson_path)
+    output = {key: header.get(key) for key in STORE_KEYS}
+    output["deals"] = [{k: v for k, v in entry.items() if k != "offer_id"} for entry in entries]
+
+    write_json_atomic(json_path, output, indent=2)
+    return json_path, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert streamed deals NDJSON to StoreDealsJSON.")
+    parser.add_argument("ndjson", help="path to <slug>_deals.ndjson")
+    parser.add_argument("output", nargs="?", help="output path (default: same name with .json)")
+    args = parser.parse_args()
+
+    json_path, output = ndjson_to_store_json(args.ndjson, args.output)
+    print(f"Wrote {len(output['deals'])} deals to {json_path}")
+
+
+if __name__ == "__main__":
+    main()
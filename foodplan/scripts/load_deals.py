@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Loader stage: bulk upsert scraped deals into the Supabase `deals` table.
+
+Each sale/<date>/<store>_deals.json is loaded as one store/week slice, keyed
+by (store_id, valid_from). The store is looked up by slug in `stores`, and
+each deal is linked to its `products` row (normalized name and category),
+which is created when missing. Deals are streamed into a staging table with
+COPY, upserted on a hash of each deal and any deals of that slice no longer in
+the file are deleted, all in one transaction. Loading the same file twice
+leaves the table unchanged, and unchanged deals keep their row IDs, so
+shopping list items linked to them stay linked.
+
+Files without valid dates (e.g. from a publication whose metadata could not
+be read) are not loaded, and deals without a name or price are skipped.
+
+Needs psycopg2 and a Postgres connection string in DATABASE_URL (Supabase:
+Settings > Database > Connection string), or --database-url. The table
+columns come from supabase/migrations/add_deals_bulk_load.sql, on top of the
+schema in docs/supabase-setup.md.
+
+Usage: python3 load_deals.py [YYYY-MM-DD] [--store netto] [--database-url URL]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+from collections import namedtuple
+from datetime import date
+
+from deals_index import SALE_DIR, STORE_SLUGS, latest_date_folder
+from deals_output import deal_hash
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
+# Per store file: rows upserted and deleted, deals skipped as invalid, and
+# why the file was not loaded (None if it was)
+LoadResult = namedtuple('LoadResult', ['upserted', 'deleted', 'skipped', 'error'])
+
+# Staged columns, in COPY order
+STAGING_COLUMNS = (
+    'deal_hash', 'category', 'original_name', 'normalized_name', 'price', 'quantity', 'unit_type',
+    'price_per_unit', 'is_app_price', 'valid_from', 'valid_to', 'week_number', 'scraped_at',
+)
+
+# Columns written to deals; store_id is the same for the whole file
+DEAL_COLUMNS = ('store_id', 'product_id') + STAGING_COLUMNS
+
+# Refreshed on conflict; the key columns and the row ID are left alone
+UPDATE_COLUMNS = ('product_id', 'category', 'normalized_name', 'price_per_unit',
+                  'valid_to', 'week_number', 'scraped_at')
+
+# NULL marker in the COPY stream; never occurs in deal text
+COPY_NULL = r'\N'
+
+# Serializes loaders, which may create the same products
+LOAD_LOCK_ID = 4_150_001
+
+STAGING_TABLE_SQL = """
+CREATE TEMP TABLE deals_staging (
+  deal_hash TEXT, category TEXT, original_name TEXT, normalized_name TEXT,
+  price NUMERIC(10, 2), quantity TEXT, unit_type TEXT, price_per_unit NUMERIC(10, 2),
+  is_app_price BOOLEAN, valid_from DATE, valid_to DATE, week_number INTEGER,
+  scraped_at TIMESTAMPTZ, product_id UUID
+) ON COMMIT DROP
+"""
+
+COPY_SQL = (
+    f"COPY deals_staging ({', '.join(STAGING_COLUMNS)}) "
+    f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"
+)
+
+INSERT_STORE_SQL = "INSERT INTO stores (name, slug) VALUES (%s, %s) ON CONFLICT DO NOTHING"
+
+STORE_ID_SQL = "SELECT id FROM stores WHERE slug = %s"
+
+# Products are identified by normalized name and category, as in docs/supabase-setup.md
+INSERT_PRODUCTS_SQL = """
+INSERT INTO products (name, category_id)
+SELECT DISTINCT s.normalized_name, c.id
+FROM deals_staging s LEFT JOIN categories c ON c.name = s.category
+WHERE s.normalized_name IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM products p
+                  WHERE p.name = s.normalized_name AND p.category_id IS NOT DISTINCT FROM c.id)
+"""
+
+LINK_PRODUCTS_SQL = """
+UPDATE deals_staging s SET product_id = (
+  SELECT p.id FROM products p
+  WHERE p.name = s.normalized_name
+    AND p.category_id IS NOT DISTINCT FROM (SELECT c.id FROM categories c WHERE c.name = s.category)
+  ORDER BY p.created_at, p.id
+  LIMIT 1
+)
+"""
+
+UPSERT_SQL = (
+    f"INSERT INTO deals ({', '.join(DEAL_COLUMNS)}) "
+    f"SELECT %s, {', '.join(DEAL_COLUMNS[1:])} FROM deals_staging "
+    f"ON CONFLICT (store_id, valid_from, deal_hash) DO UPDATE SET "
+    + ', '.join(f"{column} = EXCLUDED.{column}" for column in UPDATE_COLUMNS)
+)
+
+DELETE_STALE_SQL = """
+DELETE FROM deals
+WHERE store_id = %s AND valid_from = %s
+  AND NOT EXISTS (SELECT 1 FROM deals_staging s WHERE s.deal_hash = deals.deal_hash)
+"""
+
+
+def _iso_date(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def store_data_error(store_data):
+    """Why a <store>_deals.json payload cannot be loaded, or None."""
+    valid_from = _iso_date(store_data.get('valid_from'))
+    valid_to = _iso_date(store_data.get('valid_to'))
+    if valid_from is None or valid_to is None:
+        return (f"no valid dates (valid_from={store_data.get('valid_from')!r}, "
+                f"valid_to={store_data.get('valid_to')!r})")
+    if valid_to < valid_from:
+        return f"valid_to {valid_to} is before valid_from {valid_from}"
+    if not store_data.get('scraped_at'):
+        return "no scraped_at"
+    return None
+
+
+def is_loadable_deal(deal):
+    """Whether a deal has the name and price the deals table requires."""
+    price = deal.get('price')
+    return (bool(deal.get('original_name')) and isinstance(price, (int, float))
+            and not isinstance(price, bool) and price == price)
+
+
+def deal_rows(store_data):
+    """
+    Rows in STAGING_COLUMNS order for one <store>_deals.json payload.
+    Returns (rows, skipped), skipped counting deals without a name or price.
+    """
+    rows = []
+    skipped = 0
+    seen = set()
+    for deal in store_data['deals']:
+        if not is_loadable_deal(deal):
+            skipped += 1
+            continue
+        key = deal_hash(deal)
+        # The upsert cannot touch the same row twice in one statement
+        if key in seen:
+            continue
+        seen.add(key)
+        rows.append((
+            key,
+            deal.get('category'),
+            deal['original_name'],
+            deal.get('normalized_name'),
+            deal['price'],
+            deal.get('quantity'),
+            deal.get('unit_type'),
+            deal.get('price_per_unit'),
+            deal.get('is_app_price', False),
+            store_data['valid_from'],
+            store_data['valid_to'],
+            store_data.get('week_number'),
+            store_data['scraped_at'],
+        ))
+    return rows, skipped
+
+
+def copy_buffer(rows):
+    """CSV text for COPY ... FROM STDIN, with None written as COPY_NULL."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    for row in rows:
+        writer.writerow(COPY_NULL if value is None else value for value in row)
+    buffer.seek(0)
+    return buffer
+
+
+def load_store_deals(conn, store_slug, store_data):
+    """
+    Replace one store/week slice of the deals table with `store_data`.
+    Returns a LoadResult; commits on success. A payload without valid dates
+    is not loaded (see store_data_error).
+    """
+    error = store_data_error(store_data)
+    if error:
+        return LoadResult(0, 0, len(store_data.get('deals', [])), error)
+
+    rows, skipped = deal_rows(store_data)
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (LOAD_LOCK_ID,))
+            cur.execute(INSERT_STORE_SQL, (store_data['store_name'], store_slug))
+            cur.execute(STORE_ID_SQL, (store_slug,))
+            store = cur.fetchone()
+            if store is None:
+                raise RuntimeError(f"No stores row with slug {store_slug!r}")
+            store_id = store[0]
+
+            cur.execute(STAGING_TABLE_SQL)
+            cur.copy_expert(COPY_SQL, copy_buffer(rows))
+            cur.execute(INSERT_PRODUCTS_SQL)
+            cur.execute(LINK_PRODUCTS_SQL)
+            cur.execute(UPSERT_SQL, (store_id,))
+            upserted = cur.rowcount
+            cur.execute(DELETE_STALE_SQL, (store_id, store_data['valid_from']))
+            deleted = cur.rowcount
+    return LoadResult(upserted, deleted, skipped, None)
+
+
+def connect(database_url=None):
+    """Open a Postgres connection from `database_url` or DATABASE_URL."""
+    if psycopg2 is None:
+        raise RuntimeError("psycopg2 is not installed (pip install -r requirements.txt)")
+    database_url = database_url or os.environ.get('DATABASE_URL')
+    if not database_url:
+        raise RuntimeError("No database configured: set DATABASE_URL or pass --database-url")
+    return psycopg2.connect(database_url)
+
+
+def load_date_folder(date_folder, sale_dir=SALE_DIR, database_url=None, stores=STORE_SLUGS):
+    """Load every store's deals file in sale/<date>/. Returns {slug: LoadResult}."""
+    date_dir = os.path.join(sale_dir, date_folder)
+    results = {}
+    conn = connect(database_url)
+    try:
+        for slug in stores:
+            path = os.path.join(date_dir, f"{slug}_deals.json")
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding='utf-8') as f:
+                store_data = json.load(f)
+            results[slug] = load_store_deals(conn, slug, store_data)
+    finally:
+        conn.close()
+    return results
+
+
+def format_result(slug, result):
+    """One summary line for a store's LoadResult."""
+    if result.error:
+        return f"✗ {slug}: not loaded, {result.error}"
+    line = f"{slug}: {result.upserted} deals upserted, {result.deleted} stale deals removed"
+    if result.skipped:
+        line += f", {result.skipped} deals without name or price skipped"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load scraped deals into the deals table.")
+    parser.add_argument("date", nargs="?", help="date folder under sale/ (default: latest)")
+    parser.add_argument("--store", choices=STORE_SLUGS, action="append",
+                        help="only load this store (repeatable; default: all)")
+    parser.add_argument("--database-url", help="Postgres connection string (default: $DATABASE_URL)")
+    args = parser.parse_args()
+
+    date_folder = args.date or latest_date_folder()
+    if not date_folder:
+        print(f"No date folders in {SALE_DIR}")
+        return 1
+
+    try:
+        results = load_date_folder(date_folder, database_url=args.database_url,
+                                   stores=args.store or STORE_SLUGS)
+    except Exception as e:
+        print(f"✗ Error loading deals: {e}")
+        return 1
+
+    for slug, result in results.items():
+        print(format_result(slug, result))
+    return 1 if any(result.error for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
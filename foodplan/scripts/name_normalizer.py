@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Normalization of offer headings into display names and stable product keys.
+
+normalized_name is the display name: the heading without quantities,
+percentages or pack sizes, in sentence case (Meny prints headings in
+capitals). product_key leaves out a leading store or private-label name,
+folds Danish spelling variants ('aa' for 'å', 'ö' for 'ø', accents), drops
+filler words and sorts the words, so the same product gets the same key
+across stores and weeks: 'REMA 1000 Hakket dansk oksekød 8-12% 500 g' and
+'HAKKET OKSEKØD 8-12 %' both become 'hakket oksekød'. Product brands
+('Marabou', 'Pepsi') stay in both, they are what is sold.
+
+The same headings recur week after week, so results are memoized in a
+bounded LRU cache.
+"""
+import re
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+# Headings kept in the normalization cache
+NORMALIZE_CACHE_SIZE = 8192
+
+# Store and private-label names, lowercase, left out of product keys: the same
+# minced beef is 'REMA 1000 Hakket oksekød' in one store and 'Hakket oksekød' in
+# another. Product brands ('Marabou', 'Kærgården') are not listed, they are
+# part of what is sold.
+STORE_BRANDS = (
+    'rema 1000', 'netto', 'meny', 'premieur', 'gestus', 'øgo', 'velsmag', 'princip',
+    'euroshopper', 'änglamark', 'den grønne slagter', 'grøn balance', 'first price',
+)
+
+# Quantities, pack sizes and percentages: '500 g', '350-400 g', '2 x 1,5 l', '8-pak',
+# '8-12 %', 'pr. kg', 'Ex. pant', 'Str. M/L'
+QUANTITY_TEXT_PATTERN = re.compile(
+    r'(?:\b\d+\s*x\s*)?\b\d+(?:[.,]\d+)?(?:\s*[-–/]\s*\d+(?:[.,]\d+)?)?\s*[-‐]?\s*'
+    r'(?:kg|g|gr|ml|cl|l|ltr|liter|stk|pak|pack|%)(?![^\W\d_])\.?'
+    r'|\b\d+(?:[.,]\d+)?\s*[-–]\s*\d+(?:[.,]\d+)?\s*%'
+    r'|\bpr\.?\s*(?:kg|stk|l|bakke|pk)\b\.?'
+    r'|\bex\.?\s*pant\b'
+    r'|\bstr\.?\s*[a-z]+(?:/[a-z]+)?\b'
+    r'|\b\d+(?:[.,]\d+)?\b',
+    re.IGNORECASE
+)
+# A leading store brand, unless the heading goes on with 'eller' or a list
+# ('Gestus eller Premieur' names two products, not a brand)
+STORE_BRAND_PREFIX_PATTERN = re.compile(
+    r'^\s*(?:' + '|'.join(re.escape(brand) for brand in sorted(STORE_BRANDS, key=len, reverse=True))
+    + r')(?![^\W_])(?!\s*(?:,|eller\b|og\b))',
+    re.IGNORECASE
+)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+SPACE_BEFORE_PUNCTUATION_PATTERN = re.compile(r'\s+([,.])')
+EDGE_PUNCTUATION_PATTERN = re.compile(r'^[^\w(]+|[^\w)]+$')
+WORD_PATTERN = re.compile(r'[^\W\d_]+')
+
+# Spelling variants folded in product keys (after accent stripping)
+VARIANT_FOLDS = (('aa', 'å'), ('ö', 'ø'), ('ä', 'æ'))
+
+# Letters kept as they are when stripping accents
+DANISH_LETTERS = frozenset('æøå')
+
+# Words left out of product keys
+KEY_STOPWORDS = frozenset([
+    'og', 'eller', 'med', 'af', 'i', 'fra', 'til', 'på', 'uden', 'pr', 'ca', 'fx',
+    'dansk', 'danske', 'ny', 'nye', 'stk', 'pak', 'ex',
+])
+
+# display name and product key of a heading
+NormalizedName = namedtuple('NormalizedName', ['name', 'key'])
+
+
+def fold_accents(text):
+    """Strip accents (é -> e) but keep æ, ø and å."""
+    folded = []
+    for ch in text:
+        if ch in DANISH_LETTERS or ch.isascii():
+            folded.append(ch)
+        else:
+            base = unicodedata.normalize('NFD', ch)[0]
+            folded.append(base if base.isascii() else ch)
+    return ''.join(folded)
+
+
+def sentence_case(text):
+    """Lowercase shouted headings ('HAKKET OKSEKØD' -> 'Hakket oksekød')."""
+    letters = [ch for ch in text if ch.isalpha()]
+    if letters and sum(ch.isupper() for ch in letters) > len(letters) * 0.8:
+        text = text.lower()
+    return text[:1].upper() + text[1:]
+
+
+def product_key(name):
+    """Stable key for a normalized name: folded, filler-free, sorted words."""
+    text = fold_accents(name.lower())
+    for variant, letter in VARIANT_FOLDS:
+        text = text.replace(variant, letter)
+    words = {word for word in WORD_PATTERN.findall(text) if word not in KEY_STOPWORDS}
+    return ' '.join(sorted(words))
+
+
+def _tidy(text):
+    """Collapse whitespace and drop punctuation left at the edges by removed quantities."""
+    text = EDGE_PUNCTUATION_PATTERN.sub('', WHITESPACE_PATTERN.sub(' ', text))
+    return SPACE_BEFORE_PUNCTUATION_PATTERN.sub(r'\1', text)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_name(heading):
+    """NormalizedName for an offer heading (memoized)."""
+    # Decomposed letters ('a' + ring) would split words at the combining mark
+    heading = unicodedata.normalize('NFC', heading or '')
+    # The store brand is split off before quantities go ('REMA 1000' ends in a
+    # number); it stays in the name but not in the key
+    brand = STORE_BRAND_PREFIX_PATTERN.match(heading)
+    rest = heading[brand.end():] if brand else heading
+    product = _tidy(QUANTITY_TEXT_PATTERN.sub(' ', rest))
+    text = _tidy(f"{brand.group()} {product}") if brand else product
+    if not text:
+        text = heading.strip()
+    name = sentence_case(text)
+    # A heading that is only a store brand keeps it in the key
+    key_name = sentence_case(product) if WORD_PATTERN.search(product) else name
+    return NormalizedName(name, product_key(key_name))
+
+
+def apply_names(deal):
+    """The deal with normalized_name and product_key derived from its original_name."""
+    normalized = normalize_name(deal['original_name'])
+    return dict(deal, normalized_name=normalized.name, product_key=normalized.key)
+
+
+def cache_summary():
+    """One-line normalization cache statistics."""
+    info = normalize_name.cache_info()
+    lookups = info.hits + info.misses
+    rate = info.hits / lookups * 100 if lookups else 0
+    return f"{info.hits} hits, {info.misses} misses ({rate:.0f}% hit rate), {info.currsize}/{info.maxsize} cached"
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk cache for tjek offer details.
+Offers are stored zlib-compressed in SQLite, keyed by offer ID. Entries are
+served without a request while younger than the TTL, revalidated with
+If-None-Match / If-Modified-Since once stale, and evicted least recently used
+first when the cache grows past its size cap.
+"""
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.cache', 'tjek_offers.sqlite3')
+DEFAULT_TTL = 7 * 24 * 3600             # offers rarely change within a publication week
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024    # compressed payload bytes
+
+
+class CachedResponse:
+    """Minimal stand-in for a requests.Response whose payload is already known
+    (from the cache, a hotspot or a bulk listing)."""
+
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class OfferCache:
+    """SQLite-backed offer cache with TTL, revalidation and LRU eviction."""
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        # Resolved here so tools like bench_scrape.py can redirect the cache
+        path = path or DEFAULT_CACHE_PATH
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stale_served = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS offers (
+                offer_id TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS offers_accessed_at ON offers (accessed_at)")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def _row(self, offer_id):
+        return self.db.execute(
+            "SELECT body, etag, last_modified, fetched_at FROM offers WHERE offer_id = ?",
+            (offer_id,)
+        ).fetchone()
+
+    def _touch(self, offer_id, fetched=False):
+        now = time.time()
+        if fetched:
+            self.db.execute("UPDATE offers SET accessed_at = ?, fetched_at = ? WHERE offer_id = ?",
+                            (now, now, offer_id))
+        else:
+            self.db.execute("UPDATE offers SET accessed_at = ? WHERE offer_id = ?", (now, offer_id))
+
+    def get_fresh(self, offer_id):
+        """Return the cached payload if it is within the TTL, else None."""
+        row = self._row(offer_id)
+        if row and time.time() - row[3] < self.ttl:
+            self._touch(offer_id)
+            self.hits += 1
+            return json.loads(zlib.decompress(row[0]))
+        self.misses += 1
+        return None
+
+    def conditional_headers(self, offer_id):
+        """Validators for revalidating a stale entry (empty if none cached)."""
+        row = self._row(offer_id)
+        headers = {}
+        if row:
+            if row[1]:
+                headers['If-None-Match'] = row[1]
+            if row[2]:
+                headers['If-Modified-Since'] = row[2]
+        return headers
+
+    def revalidate(self, offer_id):
+        """Mark a stale entry fresh after a 304 and return its payload."""
+        row = self._row(offer_id)
+        if not row:
+            return None
+        self._touch(offer_id, fetched=True)
+        self.revalidated += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def get_stale(self, offer_id):
+        """Return an expired payload, used when refetching it failed."""
+        row = self._row(offer_id)
+        if not row:
+            return None
+        self._touch(offer_id)
+        self.stale_served += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def store(self, offer_id, response):
+        """Cache the payload of a successful offer response."""
+        self.store_payload(offer_id, response.json(), response.headers.get('ETag'),
+                           response.headers.get('Last-Modified'))
+
+    def store_payload(self, offer_id, payload, etag=None, last_modified=None):
+        """Cache an offer payload, e.g. one taken from a bulk listing."""
+        body = zlib.compress(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+        now = time.time()
+        self.db.execute(
+            "INSERT OR REPLACE INTO offers VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (offer_id, body, etag, last_modified, now, now, len(body))
+        )
+
+    def commit(self):
+        """Persist pending writes and evict least recently used entries over the cap."""
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM offers").fetchone()[0]
+        if total > self.max_bytes:
+            rows = self.db.execute("SELECT offer_id, size FROM offers ORDER BY accessed_at").fetchall()
+            evict = []
+            for offer_id, size in rows:
+                if total <= self.max_bytes:
+                    break
+                evict.append((offer_id,))
+                total -= size
+            self.db.executemany("DELETE FROM offers WHERE offer_id = ?", evict)
+            self.evictions += len(evict)
+        self.db.commit()
+
+    def stats(self):
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses,
+                "stale": self.stale_served, "evicted": self.evictions}
+
+    def summary(self):
+        return (f"{self.hits} hits, {self.revalidated} revalidated, {self.misses} misses, "
+                f"{self.stale_served} stale, {self.evictions} evicted")
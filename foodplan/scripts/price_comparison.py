@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Cross-store price comparison over normalized products.
+
+Deals of all stores are grouped by product_key (name_normalizer.py) and the
+base unit their price_per_unit refers to (kg, l or stk), so '500 g' and
+'1 kg' packs of the same product compare directly. For each group the table
+holds the cheapest offer, the cheapest one without an app price when that
+differs, and the best unit price per store. Deals without a price_per_unit
+are left out: their shelf price would be ranked against unit prices.
+
+Grouping is a single pass with one dict lookup per deal over a DealTable
+(deal_table.py), so loading several weeks of history (--weeks) stays cheap
+in both time and memory; offer dicts are only built for the rows that end
+up in the table, which then holds the cheapest offer seen in those weeks.
+The table is written to sale/<date>/price_comparison.json after all stores
+have been scraped.
+
+Usage: python3 price_comparison.py [YYYY-MM-DD] [--weeks N]
+"""
+import argparse
+import os
+from datetime import datetime
+
+from deal_parser import BASE_UNITS
+from deal_table import DealTable
+from deals_index import SALE_DIR, DATE_FOLDER_PATTERN, latest_date_folder
+from deals_output import write_json_atomic
+
+COMPARISON_FILE = 'price_comparison.json'
+
+# Offer fields copied into the table
+OFFER_FIELDS = ('store_slug', 'store_name', 'original_name', 'price', 'quantity', 'unit_type',
+                'price_per_unit', 'is_app_price', 'valid_from', 'valid_to')
+
+
+def comparable_deals(date_dirs):
+    """DealTable of every store in `date_dirs`."""
+    return DealTable.from_date_dirs(date_dirs)
+
+
+def compare_prices(deals):
+    """
+    Group the rows of a DealTable by (product_key, base unit) and pick the
+    cheapest per group.
+
+    Returns the groups sorted with products sold by several stores first,
+    biggest unit price spread first.
+    """
+    # Base unit per interned unit type, looked up once instead of per row
+    base_units = [BASE_UNITS.get(unit_type, 'stk') for unit_type in deals.units.values]
+    slugs = [segment['store_slug'] for segment in deals.segments]
+    groups = {}
+    for row in range(len(deals)):
+        key = deals.product_key[row]
+        unit_price = deals.unit_price(row)
+        if not key or unit_price is None:
+            continue
+        group_key = (key, base_units[deals.unit_codes[row]])
+        group = groups.get(group_key)
+        if group is None:
+            group = groups[group_key] = {'best': {}, 'best_without_app': {}}
+
+        slug = slugs[deals.segment_codes[row]]
+        best = group['best'].get(slug)
+        if best is None or unit_price < best[0]:
+            group['best'][slug] = (unit_price, row)
+        if not deals.is_app_price[row]:
+            best = group['best_without_app'].get(slug)
+            if best is None or unit_price < best[0]:
+                group['best_without_app'][slug] = (unit_price, row)
+
+    table = []
+    for (key, base_unit), group in groups.items():
+        by_store = group['best']
+        cheapest_price, cheapest_row = min(by_store.values(), key=lambda entry: entry[0])
+        cheapest = deals.offer(cheapest_row)
+        without_app = None
+        if cheapest['is_app_price'] and group['best_without_app']:
+            without_app = deals.offer(min(group['best_without_app'].values(), key=lambda entry: entry[0])[1])
+
+        unit_prices = [price for price, _ in by_store.values()]
+        table.append({
+            "product_key": key,
+            "base_unit": base_unit,
+            "name": deals.display_name(cheapest_row),
+            "store_count": len(by_store),
+            "spread": round(max(unit_prices) - cheapest_price, 2),
+            "cheapest": {field: cheapest.get(field) for field in OFFER_FIELDS},
+            "cheapest_without_app": (
+                {field: without_app.get(field) for field in OFFER_FIELDS} if without_app else None
+            ),
+            "by_store": {slug: price for slug, (price, _) in sorted(by_store.items())},
+        })
+
+    table.sort(key=lambda group: (-group['store_count'], -group['spread'], group['product_key']))
+    return table
+
+
+def date_folders_until(date_folder, weeks, sale_dir=SALE_DIR):
+    """`date_folder` and up to weeks - 1 earlier date folders, newest first."""
+    folders = sorted(
+        (name for name in os.listdir(sale_dir)
+         if DATE_FOLDER_PATTERN.match(name) and name <= date_folder
+         and os.path.isdir(os.path.join(sale_dir, name))),
+        reverse=True
+    )
+    return folders[:max(weeks, 1)]
+
+
+def write_comparison(date_folder, sale_dir=SALE_DIR, weeks=1):
+    """Write sale/<date>/price_comparison.json. Returns (path, table)."""
+    folders = date_folders_until(date_folder, weeks, sale_dir)
+    table = compare_prices(comparable_deals(os.path.join(sale_dir, name) for name in folders))
+    output = {
+        "generated_at": datetime.now().isoformat(),
+        "dates": folders,
+        "group_count": len(table),
+        "multi_store_count": sum(1 for group in table if group['store_count'] > 1),
+        "groups": table,
+    }
+    path = os.path.join(sale_dir, date_folder, COMPARISON_FILE)
+    write_json_atomic(path, output, indent=2)
+    return path, table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare deal prices across stores.")
+    parser.add_argument("date", nargs="?", help="date folder under sale/ (default: latest)")
+    parser.add_argument("--weeks", type=int, default=1,
+                        help="include this many date folders up to the date (default: 1)")
+    args = parser.parse_args()
+
+    date_folder = args.date or latest_date_folder()
+    if not date_folder:
+        print(f"No date folders in {SALE_DIR}")
+        return 1
+
+    path, table = write_comparison(date_folder, weeks=args.weeks)
+    multi_store = [group for group in table if group['store_count'] > 1]
+    print(f"Compared {len(table)} products ({len(multi_store)} sold by several stores) to {path}")
+    for group in multi_store[:10]:
+        cheapest = group['cheapest']
+        print(f"  {group['name']:30s} cheapest at {cheapest['store_name']}: "
+              f"{cheapest['price_per_unit']} kr per {group['base_unit']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
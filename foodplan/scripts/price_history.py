@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Append-only columnar price history across the weekly sale folders.
+
+sale/history/ holds one binary file per column (native-endian arrays, one
+entry per deal per scraped week) and history.json, the manifest that records
+how many rows are valid and which store/week segments they came from. Every
+scrape appends its deals; readers memory-map the columns, so checking a price
+against months of history never parses the weekly JSON files.
+
+Products are interned in products.txt (line number = product ID), keyed by
+product_key and the base unit of price_per_unit. Appending a store/week that
+is already stored supersedes the earlier segment instead of rewriting it.
+
+Usage:
+    python3 price_history.py append [YYYY-MM-DD ...]   (default: every date folder)
+    python3 price_history.py series "hakket oksekød" [--unit kg]
+    python3 price_history.py stats "hakket oksekød" [--unit kg] [--weeks 8]
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import statistics
+import sys
+from array import array
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date
+
+from deal_parser import BASE_UNITS
+from deals_index import SALE_DIR, DATE_FOLDER_PATTERN, STORE_SLUGS, read_store_files
+from deals_output import write_json_atomic
+from name_normalizer import normalize_name
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+HISTORY_FOLDER = 'history'
+HISTORY_DIR = os.path.join(SALE_DIR, HISTORY_FOLDER)
+MANIFEST_FILE = 'history.json'
+PRODUCTS_FILE = 'products.txt'
+LOCK_FILE = '.lock'
+HISTORY_VERSION = 1
+
+# Column name -> array typecode. Dates are proordinals of valid_from, stores
+# index STORE_SLUGS and a missing price_per_unit is stored as NaN.
+COLUMNS = {
+    'day': 'i',
+    'store': 'B',
+    'product': 'I',
+    'price': 'd',
+    'price_per_unit': 'd',
+    'is_app_price': 'B',
+}
+
+# One stored observation
+PricePoint = namedtuple('PricePoint', ['date', 'store', 'price', 'price_per_unit', 'is_app_price'])
+
+# Unit price summary over the last `weeks` weeks with data
+PriceStats = namedtuple('PriceStats', ['weeks', 'count', 'min', 'median', 'max', 'latest'])
+
+
+def product_id_key(product_key, base_unit):
+    return f"{product_key}|{base_unit}"
+
+
+class PriceHistory:
+    """Columnar price history in `path`, opened for appending and querying."""
+
+    def __init__(self, path=HISTORY_DIR):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._columns = None
+        self._rows_by_product = None
+        self._load()
+
+    def _load(self):
+        """(Re)read the manifest and the product dictionary."""
+        manifest_path = os.path.join(self.path, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+            if self.manifest.get('byteorder') != sys.byteorder:
+                raise RuntimeError(f"{self.path} was written on a {self.manifest.get('byteorder')}-endian machine")
+        else:
+            self.manifest = {"version": HISTORY_VERSION, "byteorder": sys.byteorder,
+                             "row_count": 0, "product_count": 0, "segments": []}
+
+        self.products = []
+        products_path = os.path.join(self.path, PRODUCTS_FILE)
+        if os.path.exists(products_path):
+            with open(products_path, encoding='utf-8') as f:
+                self.products = f.read().splitlines()[:self.manifest['product_count']]
+        self._product_ids = {key: i for i, key in enumerate(self.products)}
+
+    @contextmanager
+    def _write_lock(self):
+        """Exclusive lock for appends; stores scraped in parallel share the history."""
+        with open(os.path.join(self.path, LOCK_FILE), 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _column_path(self, name):
+        return os.path.join(self.path, f"{name}.{COLUMNS[name]}")
+
+    def _intern(self, key):
+        product_id = self._product_ids.get(key)
+        if product_id is None:
+            product_id = self._product_ids[key] = len(self.products)
+            self.products.append(key)
+        return product_id
+
+    def append_store_week(self, slug, store_data, source=None):
+        """
+        Append one store's deals file. Returns the number of rows added.
+        An earlier segment of the same store and week is marked superseded.
+        """
+        self._close_columns()
+        with self._write_lock():
+            # Another process may have appended since this history was opened
+            self._load()
+            return self._append(slug, store_data, source)
+
+    def _append(self, slug, store_data, source):
+        valid_from = store_data.get('valid_from') or store_data['scraped_at'][:10]
+        day = date.fromisoformat(valid_from).toordinal()
+        store = STORE_SLUGS.index(slug)
+
+        product_count = len(self.products)
+        columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        for deal in store_data['deals']:
+            key = deal.get('product_key')
+            if key is None:
+                key = normalize_name(deal['original_name']).key
+            base_unit = BASE_UNITS.get(deal.get('unit_type'), 'stk')
+            price_per_unit = deal.get('price_per_unit')
+            columns['day'].append(day)
+            columns['store'].append(store)
+            columns['product'].append(self._intern(product_id_key(key, base_unit)))
+            columns['price'].append(deal['price'])
+            columns['price_per_unit'].append(math.nan if price_per_unit is None else price_per_unit)
+            columns['is_app_price'].append(1 if deal.get('is_app_price') else 0)
+
+        # Columns first, manifest last: rows past row_count (from a crash
+        # mid-append) are ignored by readers and overwritten by the next append
+        start = self.manifest['row_count']
+        for name, values in columns.items():
+            with open(self._column_path(name), 'ab') as f:
+                f.truncate(start * values.itemsize)
+                values.tofile(f)
+        if len(self.products) > product_count:
+            products_path = os.path.join(self.path, PRODUCTS_FILE)
+            with open(f"{products_path}.tmp", 'w', encoding='utf-8') as f:
+                f.write(''.join(f"{key}\n" for key in self.products))
+            os.replace(f"{products_path}.tmp", products_path)
+
+        count = len(columns['day'])
+        for segment in self.manifest['segments']:
+            if segment['store'] == slug and segment['valid_from'] == valid_from:
+                segment['superseded'] = True
+        self.manifest['segments'].append({
+            "store": slug, "valid_from": valid_from, "start": start, "count": count,
+            "source": source, "superseded": False,
+        })
+        self.manifest['row_count'] = start + count
+        self.manifest['product_count'] = len(self.products)
+        write_json_atomic(os.path.join(self.path, MANIFEST_FILE), self.manifest, indent=2)
+        return count
+
+    def has_segment(self, slug, valid_from, source=None):
+        return any(segment['store'] == slug and segment['valid_from'] == valid_from
+                   and (source is None or segment['source'] == source)
+                   for segment in self.manifest['segments'])
+
+    def append_date_folder(self, date_folder, sale_dir=SALE_DIR, skip_existing=False):
+        """Append every store file of sale/<date>/. Returns {slug: rows added}."""
+        added = {}
+        for slug, store_data in read_store_files(os.path.join(sale_dir, date_folder)):
+            valid_from = store_data.get('valid_from') or store_data['scraped_at'][:10]
+            if skip_existing and self.has_segment(slug, valid_from, date_folder):
+                continue
+            added[slug] = self.append_store_week(slug, store_data, source=date_folder)
+        return added
+
+    def _open_columns(self):
+        """Memory-mapped views of every column, cut to the valid rows."""
+        if self._columns is None:
+            row_count = self.manifest['row_count']
+            self._columns = {}
+            self._maps = []
+            for name, typecode in COLUMNS.items():
+                if row_count == 0:
+                    self._columns[name] = array(typecode)
+                    continue
+                with open(self._column_path(name), 'rb') as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps.append(mapped)
+                view = memoryview(mapped)
+                itemsize = array(typecode).itemsize
+                self._columns[name] = view[:row_count * itemsize].cast(typecode)
+        return self._columns
+
+    def _close_columns(self):
+        if self._columns is not None:
+            for view in self._columns.values():
+                if isinstance(view, memoryview):
+                    view.release()
+            for mapped in self._maps:
+                mapped.close()
+        self._columns = None
+        self._rows_by_product = None
+
+    def close(self):
+        self._close_columns()
+
+    def _active_rows(self):
+        for segment in self.manifest['segments']:
+            if not segment['superseded']:
+                yield from range(segment['start'], segment['start'] + segment['count'])
+
+    def _rows_for(self, product_id):
+        """Row numbers of a product, from a product -> rows index built on first use."""
+        if self._rows_by_product is None:
+            product = self._open_columns()['product']
+            rows_by_product = {}
+            for row in self._active_rows():
+                rows_by_product.setdefault(product[row], []).append(row)
+            self._rows_by_product = rows_by_product
+        return self._rows_by_product.get(product_id, [])
+
+    def _product_ids_for(self, product_key, base_unit=None):
+        if base_unit:
+            product_id = self._product_ids.get(product_id_key(product_key, base_unit))
+            return [product_id] if product_id is not None else []
+        return [self._product_ids[product_id_key(product_key, unit)]
+                for unit in sorted(set(BASE_UNITS.values()))
+                if product_id_key(product_key, unit) in self._product_ids]
+
+    def series(self, product_key, base_unit=None, store=None):
+        """PricePoints of a product (all base units unless given), oldest first."""
+        columns = self._open_columns()
+        points = []
+        for product_id in self._product_ids_for(product_key, base_unit):
+            for row in self._rows_for(product_id):
+                slug = STORE_SLUGS[columns['store'][row]]
+                if store and slug != store:
+                    continue
+                price_per_unit = columns['price_per_unit'][row]
+                points.append(PricePoint(
+                    date=date.fromordinal(columns['day'][row]).isoformat(),
+                    store=slug,
+                    price=columns['price'][row],
+                    price_per_unit=None if math.isnan(price_per_unit) else price_per_unit,
+                    is_app_price=bool(columns['is_app_price'][row]),
+                ))
+        points.sort(key=lambda point: (point.date, point.store))
+        return points
+
+    def stats(self, product_key, base_unit=None, weeks=8, store=None):
+        """Unit price min/median/max over the product's last `weeks` weeks with data, or None."""
+        points = [point for point in self.series(product_key, base_unit, store)
+                  if point.price_per_unit is not None]
+        if not points:
+            return None
+        dates = sorted({point.date for point in points})[-weeks:]
+        recent = [point.price_per_unit for point in points if point.date >= dates[0]]
+        latest = min(point.price_per_unit for point in points if point.date == dates[-1])
+        return PriceStats(weeks=len(dates), count=len(recent), min=min(recent),
+                          median=statistics.median(recent), max=max(recent), latest=latest)
+
+
+def date_folders(sale_dir=SALE_DIR):
+    return sorted(name for name in os.listdir(sale_dir)
+                  if DATE_FOLDER_PATTERN.match(name) and os.path.isdir(os.path.join(sale_dir, name)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar price history of the scraped deals.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    append = commands.add_parser("append", help="append date folders not stored yet")
+    append.add_argument("dates", nargs="*", help="date folders under sale/ (default: all)")
+    for name in ("series", "stats"):
+        query = commands.add_parser(name, help=f"price {name} of a product")
+        query.add_argument("product", help="product name or product_key")
+        query.add_argument("--unit", choices=sorted(set(BASE_UNITS.values())), help="base unit")
+        query.add_argument("--store", choices=STORE_SLUGS)
+        if name == "stats":
+            query.add_argument("--weeks", type=int, default=8, help="weeks with data to include")
+    args = parser.parse_args()
+
+    history = PriceHistory()
+    try:
+        if args.command == "append":
+            for folder in args.dates or date_folders():
+                for slug, count in history.append_date_folder(folder, skip_existing=True).items():
+                    print(f"{folder} {slug}: appended {count} rows")
+            print(f"History: {history.manifest['row_count']} rows, {len(history.products)} products")
+            return 0
+
+        key = normalize_name(args.product).key
+        if args.command == "series":
+            points = history.series(key, args.unit, args.store)
+            for point in points:
+                app = " (app)" if point.is_app_price else ""
+                print(f"{point.date} {point.store:6s} {point.price:8.2f} kr  {point.price_per_unit} per unit{app}")
+            if not points:
+                print(f"No history for {key!r}")
+        else:
+            stats = history.stats(key, args.unit, args.weeks, args.store)
+            if stats is None:
+                print(f"No history for {key!r}")
+            else:
+                print(f"{key}: {stats.count} prices over {stats.weeks} weeks - min {stats.min:.2f}, "
+                      f"median {stats.median:.2f}, max {stats.max:.2f}, latest {stats.latest:.2f}")
+        return 0
+    finally:
+        history.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
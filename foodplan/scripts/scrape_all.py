@@ -1,14 +1,23 @@
 #!/usr/bin/env python3
 """
 Master script to scrape all grocery store deals.
-Runs Netto, Meny, and Rema 1000 scrapers sequentially.
+Runs Netto, Meny, and Rema 1000 scrapers sequentially, or concurrently
+with --parallel (output lines are prefixed with the store name), or one
+after another inside this process with --in-process.
 """
+import argparse
 import subprocess
 import sys
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-def run_script(script_name, store_name):
+# Serializes output lines from the parallel scrapers
+_print_lock = threading.Lock()
+
+def run_script(script_name, store_name, timeout=None, script_args=()):
     """Run a scraping script and report results."""
     print(f"\n{'='*60}")
     print(f"Starting {store_name} scraper...")
@@ -16,10 +25,11 @@ def run_script(script_name, store_name):
 
     try:
         result = subprocess.run(
-            [sys.executable, script_name],
+            [sys.executable, script_name, *script_args],
             cwd=os.path.dirname(os.path.abspath(__file__)),
             capture_output=False,
-            text=True
+            text=True,
+            timeout=timeout
         )
 
         if result.returncode == 0:
@@ -28,11 +38,114 @@ def run_script(script_name, store_name):
         else:
             print(f"\n✗ {store_name} scraping failed with return code {result.returncode}")
             return False
+    except subprocess.TimeoutExpired:
+        print(f"\n✗ {store_name} scraping timed out after {timeout}s")
+        return False
     except Exception as e:
         print(f"\n✗ Error running {store_name} scraper: {e}")
         return False
 
-def main():
+def run_in_process(store_name, **options):
+    """Run a store's scraper in this interpreter and report results."""
+    # Imported lazily so the subprocess modes do not pay for it
+    from scraper_core import scrape_store
+    from stores import STORES
+
+    print(f"\n{'='*60}")
+    print(f"Starting {store_name} scraper...")
+    print(f"{'='*60}\n")
+
+    config = next(store for store in STORES if store.name == store_name)
+    try:
+        if scrape_store(config, **options):
+            print(f"\n✓ {store_name} scraping completed successfully!")
+            return True
+        print(f"\n✗ {store_name} scraping failed")
+        return False
+    except Exception as e:
+        print(f"\n✗ Error running {store_name} scraper: {e}")
+        return False
+
+def log_line(prefix, line):
+    """Print one output line without interleaving it with other stores."""
+    with _print_lock:
+        print(f"{prefix}{line}", flush=True)
+
+def run_script_prefixed(script_name, store_name, timeout=None, script_args=()):
+    """Run a scraping script with each output line prefixed by the store name."""
+    prefix = f"[{store_name}] "
+    log_line(prefix, f"Starting {store_name} scraper...")
+
+    env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+    try:
+        process = subprocess.Popen(
+            [sys.executable, script_name, *script_args],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            env=env
+        )
+    except Exception as e:
+        log_line(prefix, f"✗ Error running {store_name} scraper: {e}")
+        return False
+
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, kill) if timeout else None
+    if timer:
+        timer.start()
+
+    try:
+        for line in process.stdout:
+            log_line(prefix, line.rstrip("\n"))
+        returncode = process.wait()
+    finally:
+        if timer:
+            timer.cancel()
+
+    if timed_out.is_set():
+        log_line(prefix, f"✗ {store_name} scraping timed out after {timeout}s")
+        return False
+    if returncode == 0:
+        log_line(prefix, f"✓ {store_name} scraping completed successfully!")
+        return True
+    log_line(prefix, f"✗ {store_name} scraping failed with return code {returncode}")
+    return False
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape deals from all grocery stores.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--parallel", action="store_true",
+                      help="run the store scrapers concurrently")
+    mode.add_argument("--in-process", action="store_true",
+                      help="run the stores one after another in this process (no --timeout)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="maximum scrapers running at once in parallel mode (default: all)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="per-store timeout in seconds (default: none)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only fetch offers that changed since each store's last snapshot")
+    parser.add_argument("--stream", action="store_true",
+                        help="stream each store's deals to <store>_deals.ndjson while scraping")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue interrupted store scrapes from their checkpoints")
+    parser.add_argument("--load-db", action="store_true",
+                        help="upsert the latest deals into the deals table (needs DATABASE_URL)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    started_at = datetime.now().isoformat()
+    started = time.perf_counter()
+
     print("=" * 60)
     print("Grocery Store Deals Scraper")
     print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -45,13 +158,96 @@ def main():
     ]
 
     results = {}
+    # The deals index is rebuilt once below instead of by every store
+    script_args = ["--no-index"] + [flag for flag, enabled in (("--incremental", args.incremental),
+                                                               ("--stream", args.stream),
+                                                               ("--resume", args.resume)) if enabled]
 
-    for script_file, store_name in scripts:
-        if os.path.exists(script_file):
-            results[store_name] = run_script(script_file, store_name)
-        else:
-            print(f"\n✗ Script not found: {script_file}")
-            results[store_name] = False
+    if args.parallel:
+        runnable = []
+        for script_file, store_name in scripts:
+            if os.path.exists(script_file):
+                runnable.append((script_file, store_name))
+            else:
+                print(f"\n✗ Script not found: {script_file}")
+
+        workers = args.workers or len(runnable) or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                store_name: pool.submit(run_script_prefixed, script_file, store_name, args.timeout, script_args)
+                for script_file, store_name in runnable
+            }
+
+        # Keep the summary in the fixed store order
+        for script_file, store_name in scripts:
+            results[store_name] = futures[store_name].result() if store_name in futures else False
+    elif args.in_process:
+        for script_file, store_name in scripts:
+            results[store_name] = run_in_process(store_name, incremental=args.incremental,
+                                                 stream=args.stream, resume=args.resume, index=False)
+    else:
+        for script_file, store_name in scripts:
+            if os.path.exists(script_file):
+                results[store_name] = run_script(script_file, store_name, args.timeout, script_args)
+            else:
+                print(f"\n✗ Script not found: {script_file}")
+                results[store_name] = False
+
+    # Build the deals index once every store has written its files
+    try:
+        from deals_index import latest_date_folder, write_index
+        latest = latest_date_folder()
+        if latest:
+            index_path, index = write_index(latest)
+            print(f"\nIndexed {len(index['deals'])} deals to {index_path}")
+    except Exception as e:
+        print(f"\n✗ Error building deals index: {e}")
+
+    # Compare prices across stores once all of them are done
+    try:
+        from deals_index import latest_date_folder
+        from price_comparison import write_comparison
+        latest = latest_date_folder()
+        if latest:
+            comparison_path, table = write_comparison(latest)
+            multi_store = sum(1 for group in table if group['store_count'] > 1)
+            print(f"Compared {len(table)} products ({multi_store} sold by several stores) "
+                  f"to {comparison_path}")
+    except Exception as e:
+        print(f"\n✗ Error comparing prices: {e}")
+
+    # Kept apart from the store results: a failed load is not a failed scraper
+    db_loaded = None
+    if args.load_db:
+        db_loaded = True
+        try:
+            from load_deals import format_result, load_date_folder
+            from deals_index import latest_date_folder
+            latest = latest_date_folder()
+            if latest:
+                for slug, result in load_date_folder(latest).items():
+                    print(format_result(slug, result))
+                    if result.error:
+                        db_loaded = False
+        except Exception as e:
+            print(f"\n✗ Error loading deals into the database: {e}")
+            db_loaded = False
+
+    # Merge the stores' run metrics into one report
+    try:
+        from deals_index import SALE_DIR, latest_date_folder
+        from scrape_metrics import format_host, format_stages, write_run_report
+        latest = latest_date_folder()
+        if latest:
+            metrics_path, run_report = write_run_report(os.path.join(SALE_DIR, latest), started_at,
+                                                        time.perf_counter() - started, results)
+            print(f"\nRun metrics written to {metrics_path}")
+            for slug, report in run_report["stores"].items():
+                print(f"  {slug:8s} {report['wall_seconds']:.1f}s: {format_stages(report)}")
+            for host, entry in run_report["totals"]["hosts"].items():
+                print(f"  {format_host(host, entry)}")
+    except Exception as e:
+        print(f"\n✗ Error writing run metrics: {e}")
 
     # Print summary
     print("\n" + "=" * 60)
@@ -61,17 +257,23 @@ def main():
     for store_name, success in results.items():
         status = "✓ SUCCESS" if success else "✗ FAILED"
         print(f"{store_name:15s} - {status}")
+    if db_loaded is not None:
+        print(f"{'Database load':15s} - {'✓ SUCCESS' if db_loaded else '✗ FAILED'}")
 
     print(f"\nCompleted at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 60)
 
     # Return exit code based on results
+    exit_code = 0
     if all(results.values()):
         print("\n✓ All scrapers completed successfully!")
-        return 0
     else:
         print(f"\n⚠ {sum(1 for v in results.values() if not v)} scraper(s) failed")
-        return 1
+        exit_code = 1
+    if db_loaded is False:
+        print("⚠ Loading deals into the database failed")
+        exit_code = 1
+    return exit_code
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Structured metrics for a scraper run.
+
+Records how long each pipeline stage took (discover, page_crawl,
+detail_fetch, parse, categorize, write), a latency histogram per host with
+status, retry and error counts for every tjek request, plus counters and
+cache statistics. Each store run writes them to sale/<date>/<slug>_metrics.json
+and scrape_all.py merges the stores' reports into scrape_metrics.json.
+
+There is one RunMetrics per process (current()); tjek_http records every
+request into it, so the fetch code needs no extra parameters.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from deals_output import write_json_atomic
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 20, 30, 50, 75, 100, 150, 250, 500, 1000, 2500, 5000, 10000)
+
+METRICS_VERSION = 1
+
+# Per-store reports are sale/<date>/<slug>_metrics.json, the run report of
+# scrape_all.py is sale/<date>/scrape_metrics.json
+METRICS_SUFFIX = '_metrics.json'
+RUN_METRICS_FILE = 'scrape_metrics.json'
+
+
+def _empty_host():
+    return {
+        "requests": 0,
+        "errors": 0,
+        "retries": 0,
+        "statuses": {},
+        "total_ms": 0.0,
+        "max_ms": 0.0,
+        # one count per bucket in LATENCY_BUCKETS_MS, plus one for slower requests
+        "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+    }
+
+
+def latency_quantile(histogram, q):
+    """Upper bound (ms) of the bucket holding quantile `q`, or None past the last bucket."""
+    total = sum(histogram)
+    if not total:
+        return 0
+    threshold = q * total
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS_MS, histogram):
+        seen += count
+        if seen >= threshold:
+            return bound
+    return None
+
+
+def _host_summary(entry):
+    """A host entry as reported: rounded times plus mean and quantiles."""
+    return dict(
+        entry,
+        statuses=dict(entry["statuses"]),
+        histogram=list(entry["histogram"]),
+        total_ms=round(entry["total_ms"], 1),
+        max_ms=round(entry["max_ms"], 1),
+        mean_ms=round(entry["total_ms"] / entry["requests"], 1) if entry["requests"] else 0,
+        p50_ms=latency_quantile(entry["histogram"], 0.5),
+        p95_ms=latency_quantile(entry["histogram"], 0.95),
+        p99_ms=latency_quantile(entry["histogram"], 0.99),
+    )
+
+
+class RunMetrics:
+    """Thread-safe collector for one scraper run."""
+
+    def __init__(self, store=None):
+        self.store = store
+        self.started_at = datetime.now().isoformat()
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.hosts = {}
+        self.counters = {}
+        self.caches = {}
+
+    def add_stage_time(self, name, seconds):
+        with self._lock:
+            stage = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            stage["seconds"] += seconds
+            stage["calls"] += 1
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as (part of) stage `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage_time(name, time.perf_counter() - started)
+
+    def record_request(self, url, seconds, status=None, retries=0, error=None):
+        """Record one HTTP request (including its urllib3 retries)."""
+        host = urlsplit(url).netloc
+        elapsed_ms = seconds * 1000
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= bound),
+                      len(LATENCY_BUCKETS_MS))
+        with self._lock:
+            entry = self.hosts.setdefault(host, _empty_host())
+            entry["requests"] += 1
+            entry["retries"] += retries
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["histogram"][bucket] += 1
+            if error is not None:
+                entry["errors"] += 1
+                key = type(error).__name__
+            else:
+                key = str(status)
+                # 404s are expected (the page crawl ends on one); rate limiting
+                # and server errors that outlived the retries are not
+                if status == 429 or status >= 500:
+                    entry["errors"] += 1
+            entry["statuses"][key] = entry["statuses"].get(key, 0) + 1
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def set_cache(self, name, stats):
+        with self._lock:
+            self.caches[name] = dict(stats)
+
+    def to_dict(self):
+        with self._lock:
+            hosts = {}
+            for host, entry in self.hosts.items():
+                hosts[host] = _host_summary(entry)
+            return {
+                "version": METRICS_VERSION,
+                "store": self.store,
+                "started_at": self.started_at,
+                "finished_at": datetime.now().isoformat(),
+                "wall_seconds": round(time.perf_counter() - self._started, 3),
+                "stages": {name: {"seconds": round(stage["seconds"], 3), "calls": stage["calls"]}
+                           for name, stage in self.stages.items()},
+                "latency_buckets_ms": list(LATENCY_BUCKETS_MS),
+                "hosts": hosts,
+                "counters": dict(self.counters),
+                "caches": {name: dict(stats) for name, stats in self.caches.items()},
+            }
+
+    def write(self, path):
+        report = self.to_dict()
+        write_json_atomic(path, report, indent=2)
+        return report
+
+
+def merge_reports(reports):
+    """Totals over several store reports: stage times, host stats and counters summed."""
+    stages = {}
+    hosts = {}
+    counters = {}
+    for report in reports:
+        for name, stage in report["stages"].items():
+            total = stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+            total["seconds"] = round(total["seconds"] + stage["seconds"], 3)
+            total["calls"] += stage["calls"]
+        for host, entry in report["hosts"].items():
+            total = hosts.setdefault(host, _empty_host())
+            for key in ("requests", "errors", "retries", "total_ms"):
+                total[key] += entry[key]
+            total["max_ms"] = max(total["max_ms"], entry["max_ms"])
+            total["histogram"] = [a + b for a, b in zip(total["histogram"], entry["histogram"])]
+            for status, count in entry["statuses"].items():
+                total["statuses"][status] = total["statuses"].get(status, 0) + count
+        for name, value in report["counters"].items():
+            counters[name] = counters.get(name, 0) + value
+
+    return {"stages": stages, "hosts": {host: _host_summary(entry) for host, entry in hosts.items()},
+            "counters": counters}
+
+
+def read_store_reports(date_dir, since=None):
+    """Per-store reports in `date_dir`, keyed by slug; only runs started at or after `since`."""
+    reports = {}
+    for name in sorted(os.listdir(date_dir)):
+        if not name.endswith(METRICS_SUFFIX) or name == RUN_METRICS_FILE:
+            continue
+        with open(os.path.join(date_dir, name), 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        if since and report["started_at"] < since:
+            continue
+        reports[name[:-len(METRICS_SUFFIX)]] = report
+    return reports
+
+
+def write_run_report(date_dir, started_at, wall_seconds, results):
+    """
+    Merge this run's store reports into sale/<date>/scrape_metrics.json.
+
+    `results` maps store names to whether their scrape succeeded. Returns
+    (path, report).
+    """
+    stores = read_store_reports(date_dir, since=started_at)
+    report = {
+        "version": METRICS_VERSION,
+        "started_at": started_at,
+        "wall_seconds": round(wall_seconds, 3),
+        "results": dict(results),
+        "latency_buckets_ms": list(LATENCY_BUCKETS_MS),
+        "totals": merge_reports(stores.values()),
+        "stores": stores,
+    }
+    path = os.path.join(date_dir, RUN_METRICS_FILE)
+    write_json_atomic(path, report, indent=2)
+    return path, report
+
+
+def format_stages(report):
+    """One-line stage summary, slowest first."""
+    stages = sorted(report["stages"].items(), key=lambda item: item[1]["seconds"], reverse=True)
+    return ", ".join(f"{name} {stage['seconds']:.1f}s" for name, stage in stages)
+
+
+def format_host(host, entry):
+    """One-line request summary for a host entry."""
+    def bound(ms):
+        return f"<= {ms} ms" if ms is not None else f"> {LATENCY_BUCKETS_MS[-1]} ms"
+
+    return (f"{host}: {entry['requests']} requests, p50 {bound(entry['p50_ms'])}, "
+            f"p95 {bound(entry['p95_ms'])}, {entry['retries']} retries, {entry['errors']} errors")
+
+
+_current = RunMetrics()
+
+
+def current():
+    """The metrics collector of the running scrape."""
+    return _current
+
+
+def reset(store=None):
+    """Start collecting a new run (one per store scrape)."""
+    global _current
+    _current = RunMetrics(store)
+    return _current
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Store-agnostic scraping engine for tjek-hosted grocery publications.
+
+Each store is described by a StoreConfig (see stores.py); the scrape_*.py
+scripts are thin entry points around scrape_store(). Importing this module
+compiles the shared quantity patterns and the category automaton once, so
+scraping several stores in one process pays for that only once.
+"""
+import argparse
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+import scrape_metrics
+import tjek_http
+from categorizer import categorize_product
+from checkpoint import CheckpointJournal
+from deal_parser import is_app_price, parse_quantity, price_per_base_unit
+from deals_index import SALE_DIR, write_index
+from deals_output import StreamingDealWriter, dedupe_deals, ndjson_to_store_json, write_json_atomic
+from name_normalizer import apply_names, cache_summary, normalize_name
+from offer_cache import OfferCache
+from price_history import HISTORY_FOLDER, PriceHistory
+from snapshots import (compute_delta, find_previous_snapshot, hotspot_fingerprint, load_snapshot,
+                       reusable_deals, save_delta, save_snapshot)
+from tjek_fetch import DEFAULT_CONCURRENCY, crawl_hotspots, fetch_offers
+from tjek_publications import Publication, discover_publication, fetch_publication
+
+# Offers fetched per batch before their deals are processed and streamed
+FETCH_CHUNK_SIZE = 100
+
+
+@dataclass
+class StoreConfig:
+    """How to find and name one store's weekly publication."""
+
+    name: str                           # "Rema 1000", stored as store_name
+    slug: str                           # "rema", used for <slug>_deals.json
+    max_pages: int                      # upper bound for the page crawl
+    dealer_id: Optional[str] = None     # tjek dealer ID for the catalog listing
+    dealer_query: Optional[str] = None  # dealer name to search for if the ID fails
+
+
+def build_deal(offer):
+    """Turn an offer payload into a deal dict, or None if it has no price."""
+    heading = offer.get('heading', '')
+    description = offer.get('description', '')
+    price = offer.get('pricing', {}).get('price')
+
+    if price is None:
+        return None
+
+    metrics = scrape_metrics.current()
+    started = time.perf_counter()
+
+    # Extract quantity info
+    parsed = parse_quantity(description, heading)
+    quantity, unit_type = parsed.text, parsed.unit
+
+    # Calculate price per unit
+    price_per_unit = price_per_base_unit(price, parsed.value, unit_type)
+
+    parsed_at = time.perf_counter()
+    metrics.add_stage_time('parse', parsed_at - started)
+
+    # Categorize
+    category = categorize_product(heading, description)
+    metrics.add_stage_time('categorize', time.perf_counter() - parsed_at)
+
+    # Check if app price
+    is_app = is_app_price(heading, description)
+
+    # Normalize name (remove quantity info and brand, stable product key)
+    normalized = normalize_name(heading)
+
+    return {
+        "category": category,
+        "original_name": heading,
+        "normalized_name": normalized.name,
+        "product_key": normalized.key,
+        "price": float(price),
+        "quantity": quantity,
+        "unit_type": unit_type,
+        "price_per_unit": price_per_unit,
+        "is_app_price": is_app
+    }
+
+
+def fetch_deals(publication_id, max_pages, page_count=None, previous=None, writer=None,
+                journal=None, checkpoint=None, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Crawl a publication and return its deals in offer order.
+
+    Offer details are taken from the page hotspots where they are complete
+    and otherwise fetched in bulk (see tjek_fetch.fetch_offers). With a
+    `previous` offers snapshot, offers whose hotspot data is unchanged reuse
+    their earlier deal instead.
+
+    With a StreamingDealWriter, each deal is written as soon as it is built
+    (and the returned deal list is empty); offers the writer resumed from an
+    interrupted run are not fetched again.
+
+    Progress is recorded in the CheckpointJournal `journal`, if given. With
+    the `checkpoint` state of an interrupted run, the page crawl and every
+    offer it completed are skipped.
+
+    At most `concurrency` page and offer requests are in flight at once.
+
+    Stage timings, counters and cache statistics go to the run metrics.
+
+    Returns (deals, offers), where offers is the snapshot for this run.
+    Offers whose details could not be fetched stay in it with "failed" set,
+    so the delta does not report them as removed.
+    """
+    metrics = scrape_metrics.current()
+    hotspots = None
+    if checkpoint:
+        fingerprints = checkpoint.fingerprints
+        completed = checkpoint.completed
+        print(f"Resuming from checkpoint: {len(completed)} of {len(fingerprints)} offers already done")
+        if journal:
+            journal.resume(checkpoint)
+    else:
+        # Get all offer IDs
+        print("Fetching offer IDs from all pages...")
+        with metrics.stage('page_crawl'):
+            hotspots = crawl_hotspots(publication_id, max_pages, concurrency, page_count=page_count)
+        fingerprints = {offer_id: hotspot_fingerprint(hotspot) for offer_id, hotspot in hotspots.items()}
+        completed = {}
+        if journal:
+            journal.start(publication_id, fingerprints)
+    offer_ids = list(fingerprints)
+
+    print(f"Found {len(offer_ids)} offers")
+    metrics.count('offers', len(offer_ids))
+
+    reused = reusable_deals(previous, fingerprints)
+    if previous:
+        print(f"Reusing {len(reused)} unchanged offers from the last snapshot")
+    metrics.count('reused', len(reused))
+    reused.update(completed)
+
+    resumed = writer.resumed if writer else {}
+    if resumed:
+        print(f"Resuming: {len(resumed)} offers already written")
+
+    # Fetch detailed information for each offer
+    print("Fetching detailed offer information...")
+    deals = []
+    offers = {}
+    cache = OfferCache()
+
+    def emit(offer_id, deal):
+        offers[offer_id] = {"hotspot": fingerprints[offer_id], "deal": deal}
+        if journal and offer_id not in completed:
+            journal.record(offer_id, deal)
+        if deal is None:
+            return
+        if writer:
+            with metrics.stage('write'):
+                writer.write(offer_id, deal)
+        else:
+            deals.append(deal)
+
+    for start in range(0, len(offer_ids), FETCH_CHUNK_SIZE):
+        chunk = offer_ids[start:start + FETCH_CHUNK_SIZE]
+        to_fetch = [offer_id for offer_id in chunk if offer_id not in reused and offer_id not in resumed]
+        with metrics.stage('detail_fetch'):
+            responses = dict(zip(to_fetch, fetch_offers(to_fetch, concurrency, cache=cache,
+                                                                 hotspots=hotspots)))
+        metrics.count('fetched', len(to_fetch))
+
+        for i, offer_id in enumerate(chunk, start):
+            if offer_id in resumed:
+                offers[offer_id] = {"hotspot": fingerprints[offer_id], "deal": resumed[offer_id]}
+                continue
+            if offer_id in reused:
+                # Snapshot deals may predate the current name normalization
+                deal = reused[offer_id]
+                emit(offer_id, apply_names(deal) if deal else deal)
+                continue
+
+            response = responses[offer_id]
+            try:
+                if isinstance(response, Exception):
+                    raise response
+                if response.status_code != 200:
+                    raise RuntimeError(f"HTTP {response.status_code}")
+                deal = build_deal(response.json())
+                emit(offer_id, deal)
+                if deal is None:
+                    continue
+
+                if (i + 1) % 20 == 0:
+                    print(f"Processed {i + 1}/{len(offer_ids)} offers...")
+
+            except Exception as e:
+                metrics.count('offer_errors')
+                print(f"Error fetching offer {offer_id}: {e}")
+                offers[offer_id] = {"hotspot": fingerprints[offer_id], "deal": None, "failed": True}
+
+    if writer:
+        duplicate_deals, deal_count = writer.duplicates, writer.count
+    else:
+        deals, duplicate_deals = dedupe_deals(deals)
+        deal_count = len(deals)
+    if duplicate_deals:
+        print(f"Skipped {duplicate_deals} duplicate deals")
+
+    print(f"Successfully processed {deal_count} deals")
+    print(f"Offer sources: {metrics.counters.get('offers_from_hotspot', 0)} from hotspots, "
+          f"{metrics.counters.get('offers_from_bulk', 0)} from bulk listings, "
+          f"{metrics.counters.get('offer_detail_requests', 0)} detail requests")
+    print(f"Offer cache: {cache.summary()}")
+    print(f"Name cache: {cache_summary()}")
+    metrics.count('deals', deal_count)
+    metrics.count('duplicates', duplicate_deals)
+    metrics.set_cache('offers', cache.stats())
+    name_cache = normalize_name.cache_info()
+    metrics.set_cache('names', {"hits": name_cache.hits, "misses": name_cache.misses,
+                                "size": name_cache.currsize})
+    cache.close()
+    return deals, offers
+
+
+def save_store_deals(output, slug, sale_dir=SALE_DIR):
+    """Write a store's deals to sale/<YYYY-MM-DD>/<slug>_deals.json."""
+    output_dir = os.path.join(sale_dir, output["scraped_at"][:10])
+    os.makedirs(output_dir, exist_ok=True)
+
+    output_file = os.path.join(output_dir, f"{slug}_deals.json")
+    write_json_atomic(output_file, output, indent=2)
+    return output_file
+
+
+def find_store_publication(config, publication_id=None):
+    """The publication to scrape: the given ID, or the dealer's current catalog."""
+    if publication_id:
+        publication = fetch_publication(publication_id)
+        if publication is None:
+            print(f"No metadata for publication {publication_id}; validity dates will be empty")
+            publication = Publication(publication_id, "", "", 0, None)
+        return publication
+
+    print(f"Looking up the current {config.name} publication...")
+    return discover_publication(config.dealer_id, config.dealer_query)
+
+
+def scrape_store(config, publication_id=None, sale_dir=SALE_DIR, incremental=False, stream=False,
+                 resume=False, index=True, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Scrape one store end to end. Returns True if its deals were saved.
+
+    With `incremental`, offers unchanged since the last snapshot are not
+    fetched again. A delta against that snapshot is written either way.
+    With `stream`, deals are written to <slug>_deals.ndjson as they are
+    processed and converted to <slug>_deals.json at the end.
+    With `resume`, an interrupted run of the same publication is continued
+    from its checkpoint journal instead of starting over.
+    Without `index`, the deals index is left to the caller (scrape_all.py
+    rebuilds it once after all stores).
+    `concurrency` caps the tjek requests in flight.
+
+    Run metrics are written to sale/<date>/<slug>_metrics.json.
+    """
+    metrics = scrape_metrics.reset(config.slug)
+    with metrics.stage('discover'):
+        publication = find_store_publication(config, publication_id)
+
+    if not publication:
+        print("Could not determine publication ID. Exiting.")
+        return False
+
+    print(f"Publication {publication.id}: valid {publication.valid_from} to {publication.valid_to} "
+          f"(week {publication.week_number})")
+
+    journal = CheckpointJournal(config.slug)
+    checkpoint = journal.load() if resume else None
+    if resume and not checkpoint:
+        print("No checkpoint to resume from; starting a full scrape")
+    elif checkpoint and checkpoint.publication_id != publication.id:
+        print(f"Checkpoint is for publication {checkpoint.publication_id}; starting a full scrape")
+        checkpoint = None
+
+    previous_path = find_previous_snapshot(sale_dir, config.slug)
+    previous = load_snapshot(previous_path) if previous_path else None
+
+    # Create final JSON structure. A resumed run keeps the scraped_at, and so
+    # the date folder, of the run it continues.
+    output = {
+        "store_name": config.name,
+        "scraped_at": (checkpoint and checkpoint.scraped_at) or datetime.now().isoformat(),
+        "valid_from": publication.valid_from,
+        "valid_to": publication.valid_to,
+        "week_number": publication.week_number
+    }
+    journal.scraped_at = output["scraped_at"]
+
+    writer = None
+    if stream:
+        output_dir = os.path.join(sale_dir, output["scraped_at"][:10])
+        writer = StreamingDealWriter(os.path.join(output_dir, f"{config.slug}_deals.ndjson"),
+                                     dict(output, publication_id=publication.id), resume=bool(checkpoint))
+
+    try:
+        deals, offers = fetch_deals(publication.id, config.max_pages, publication.page_count,
+                                    previous if incremental else None, writer, journal, checkpoint,
+                                    concurrency)
+    except BaseException:
+        # Keep the journal and .partial so --resume can continue from them
+        journal.close()
+        if writer:
+            writer.close()
+        raise
+
+    with metrics.stage('write'):
+        if writer:
+            ndjson_file = writer.finish()
+            output_file, output = ndjson_to_store_json(ndjson_file)
+            print(f"Streamed {len(output['deals'])} deals to {ndjson_file}")
+        else:
+            output["scraped_at"] = datetime.now().isoformat()
+            output["deals"] = deals
+            output_file = save_store_deals(output, config.slug, sale_dir)
+        print(f"Saved {len(output['deals'])} deals to {output_file}")
+
+        scraped_at = output["scraped_at"]
+        output_dir = os.path.dirname(output_file)
+        if previous:
+            delta = compute_delta(previous, offers)
+            save_delta(output_dir, config.slug, config.name, previous, scraped_at, delta)
+            print(f"Changes since {previous.get('scraped_at')}: {len(delta['added'])} added, "
+                  f"{len(delta['removed'])} removed, {len(delta['price_changed'])} price changes")
+        save_snapshot(output_dir, config.slug, publication.id, scraped_at, offers)
+        journal.remove()
+
+        history = PriceHistory(os.path.join(sale_dir, HISTORY_FOLDER))
+        rows = history.append_store_week(config.slug, output, source=os.path.basename(output_dir))
+        history.close()
+        print(f"Appended {rows} prices to the price history")
+
+        if index:
+            index_path, _ = write_index(os.path.basename(output_dir), sale_dir)
+            print(f"Updated deals index {index_path}")
+
+    metrics_file = os.path.join(output_dir, f"{config.slug}{scrape_metrics.METRICS_SUFFIX}")
+    report = metrics.write(metrics_file)
+    print(f"Timings: {scrape_metrics.format_stages(report)} (metrics in {metrics_file})")
+    return True
+
+
+def parse_args(config, argv=None):
+    parser = argparse.ArgumentParser(description=f"Scrape this week's {config.name} deals.")
+    parser.add_argument("--publication", metavar="ID",
+                        help="scrape this publication instead of discovering the current one")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only fetch offers that are new or changed since the last snapshot")
+    parser.add_argument("--stream", action="store_true",
+                        help="write deals to <store>_deals.ndjson as they are processed")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted scrape from its checkpoint")
+    parser.add_argument("--no-index", dest="index", action="store_false",
+                        help="do not rebuild the deals index (scrape_all.py rebuilds it once at the end)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"tjek requests in flight at once (default: {DEFAULT_CONCURRENCY})")
+    return parser.parse_args(argv)
+
+
+def run(config, argv=None):
+    """Command-line entry point shared by the scrape_<store>.py scripts."""
+    args = parse_args(config, argv)
+    concurrency = max(1, args.concurrency)
+    # Every request in flight needs a pooled connection, or pool_block makes it wait
+    tjek_http.configure(pool_size=max(tjek_http.DEFAULT_POOL_SIZE, concurrency))
+    return scrape_store(config, publication_id=args.publication, incremental=args.incremental,
+                        stream=args.stream, resume=args.resume, index=args.index, concurrency=concurrency)
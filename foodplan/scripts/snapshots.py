@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Per-offer snapshots and week-over-week deltas for incremental scraping.
+
+Next to each <slug>_deals.json the scraper writes <slug>_offers.json, which
+maps every offer ID to a fingerprint of its hotspot data and the deal built
+from it. An incremental run reuses the deal of every offer whose hotspot is
+unchanged, and <slug>_delta.json lists what was added, removed or repriced
+since the previous snapshot. Offers whose details could not be fetched are
+kept with "failed" set: they are neither reused nor reported as removed.
+"""
+import hashlib
+import json
+import os
+
+from deals_index import DATE_FOLDER_PATTERN
+from deals_output import write_json_atomic
+
+
+def hotspot_fingerprint(hotspot_offer):
+    """Short stable hash of a hotspot's embedded offer object."""
+    encoded = json.dumps(hotspot_offer, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+def offers_path(output_dir, slug):
+    return os.path.join(output_dir, f"{slug}_offers.json")
+
+
+def find_previous_snapshot(sale_dir, slug):
+    """Path of the newest <slug>_offers.json under sale/<date>/, or None."""
+    if not os.path.isdir(sale_dir):
+        return None
+    for folder in sorted(os.listdir(sale_dir), reverse=True):
+        if not DATE_FOLDER_PATTERN.match(folder):
+            continue
+        path = offers_path(os.path.join(sale_dir, folder), slug)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_snapshot(path):
+    """Load an offers snapshot, or None if it is missing or unreadable."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not read snapshot {path}: {e}")
+        return None
+
+
+def save_snapshot(output_dir, slug, publication_id, scraped_at, offers):
+    """Write the offers snapshot for this run."""
+    path = offers_path(output_dir, slug)
+    # Atomic: the next --incremental run reads it, a truncated file would break it
+    write_json_atomic(path, {
+        "publication_id": publication_id,
+        "scraped_at": scraped_at,
+        "offers": offers
+    }, separators=(',', ':'))
+    return path
+
+
+def reusable_deals(previous, fingerprints):
+    """
+    Deals from a previous snapshot whose hotspot data is unchanged.
+
+    Returns {offer_id: deal}; the deal is None for offers that had no price.
+    """
+    previous_offers = previous.get("offers", {}) if previous else {}
+    reused = {}
+    for offer_id, fingerprint in fingerprints.items():
+        entry = previous_offers.get(offer_id)
+        if entry and not entry.get("failed") and entry.get("hotspot") == fingerprint:
+            reused[offer_id] = entry.get("deal")
+    return reused
+
+
+def compute_delta(previous, offers):
+    """
+    Added, removed and price-changed deals between two offer snapshots.
+
+    Offers that failed to fetch in either snapshot are unknown there, so
+    they are never reported as added or removed.
+    """
+    previous_offers = previous.get("offers", {})
+    added = []
+    price_changed = []
+    for offer_id, entry in offers.items():
+        deal = entry.get("deal")
+        if deal is None:
+            continue
+        previous_entry = previous_offers.get(offer_id) or {}
+        before = previous_entry.get("deal")
+        if before is None:
+            if not previous_entry.get("failed"):
+                added.append(deal)
+        elif (before["price"], before["price_per_unit"]) != (deal["price"], deal["price_per_unit"]):
+            price_changed.append({"before": before, "after": deal})
+
+    removed = []
+    for offer_id, entry in previous_offers.items():
+        current = offers.get(offer_id) or {}
+        if entry.get("deal") is not None and current.get("deal") is None and not current.get("failed"):
+            removed.append(entry["deal"])
+    return {"added": added, "removed": removed, "price_changed": price_changed}
+
+
+def save_delta(output_dir, slug, store_name, previous, scraped_at, delta):
+    """Write <slug>_delta.json next to the full deals file."""
+    path = os.path.join(output_dir, f"{slug}_delta.json")
+    write_json_atomic(path, {
+        "store_name": store_name,
+        "scraped_at": scraped_at,
+        "previous_scraped_at": previous.get("scraped_at"),
+        **delta
+    }, indent=2)
+    return path
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Per-store configuration for the scraping engine in scraper_core.py.
+"""
+from scraper_core import StoreConfig
+
+NETTO = StoreConfig(
+    name="Netto",
+    slug="netto",
+    max_pages=39,
+    dealer_id="9ba51",
+    dealer_query="Netto"
+)
+
+MENY = StoreConfig(
+    name="Meny",
+    slug="meny",
+    max_pages=48,
+    dealer_id="267e1m",
+    dealer_query="MENY"
+)
+
+REMA = StoreConfig(
+    name="Rema 1000",
+    slug="rema",
+    max_pages=40,
+    dealer_id="11deC",
+    dealer_query="REMA 1000"
+)
+
+# In the order scrape_all.py runs them
+STORES = [NETTO, MENY, REMA]
@@ -0,0 +1,16 @@
+import json
+import os
+import sys
+
+# The scripts import each other as top-level modules
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixture(*parts):
+    """A recorded JSON payload from tests/fixtures."""
+    with open(os.path.join(FIXTURES_DIR, *parts), encoding='utf-8') as f:
+        return json.load(f)
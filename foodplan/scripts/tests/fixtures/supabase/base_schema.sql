@@ -0,0 +1,51 @@
+-- The stores, categories, products and deals tables of docs/supabase-setup.md,
+-- with gen_random_uuid() so they need no extension
+CREATE TABLE stores (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    slug TEXT NOT NULL UNIQUE,
+    url TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE categories (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    slug TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE products (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    name TEXT NOT NULL,
+    category_id UUID REFERENCES categories(id),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TABLE deals (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    product_id UUID REFERENCES products(id),
+    store_id UUID REFERENCES stores(id),
+    original_name TEXT NOT NULL,
+    price DECIMAL(10, 2) NOT NULL,
+    quantity TEXT,
+    price_per_unit DECIMAL(10, 2),
+    unit_type TEXT,
+    is_app_price BOOLEAN DEFAULT FALSE,
+    valid_from DATE,
+    valid_to DATE,
+    scraped_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+INSERT INTO stores (name, slug, url) VALUES
+    ('Netto', 'netto', 'https://etilbudsavis.dk/Netto'),
+    ('Rema 1000', 'rema', 'https://etilbudsavis.dk/REMA-1000'),
+    ('Meny', 'meny', 'https://etilbudsavis.dk/MENY');
+
+INSERT INTO categories (name, slug) VALUES
+    ('Meat & Poultry', 'meat-poultry'),
+    ('Dairy & Eggs', 'dairy-eggs'),
+    ('Fruits & Vegetables', 'fruits-vegetables'),
+    ('Sweets & Snacks', 'sweets-snacks');
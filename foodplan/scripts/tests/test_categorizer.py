@@ -0,0 +1,83 @@
+"""Keyword categorization: word boundaries, compounds and category priority."""
+import pytest
+
+from categorizer import CATEGORY_KEYWORDS, DEFAULT_CATEGORY, categorize_batch, categorize_product
+
+
+ONE_PER_CATEGORY = [
+    ("Hakket oksekød 8-12%", "Meat & Poultry"),
+    ("Leverpostej", "Deli & Cold Cuts"),
+    ("Røget laks", "Seafood"),
+    ("Rugbrød", "Bread & Bakery"),
+    ("Skrabeæg", "Dairy & Eggs"),
+    ("Bananer", "Fruits & Vegetables"),
+    ("Gyros", "Pasta & International"),
+    ("Hvedemel", "Pantry & Condiments"),
+    ("Kærgården", "Spreads & Butter"),
+    ("Chips", "Sweets & Snacks"),
+    ("Kaffe", "Coffee & Tea"),
+    ("Sodavand", "Beverages"),
+    ("Pizza", "Frozen Foods"),
+    ("Naturli vegansk havregurt", "Plant-Based"),
+    ("Toiletpapir", DEFAULT_CATEGORY),
+]
+
+
+@pytest.mark.parametrize('heading, category', ONE_PER_CATEGORY)
+def test_one_heading_per_category(heading, category):
+    assert categorize_product(heading, "") == category
+
+
+def test_every_category_is_covered():
+    covered = {category for _, category in ONE_PER_CATEGORY}
+    assert covered == {name for name, _ in CATEGORY_KEYWORDS} | {DEFAULT_CATEGORY}
+
+
+@pytest.mark.parametrize('heading, category', [
+    # \bte\b, \band\b, \bis\b: short words stay out of longer ones
+    ("Frisk te", "Coffee & Tea"),
+    ("Yoghurt flere varianter", "Dairy & Eggs"),
+    ("Flere varianter", DEFAULT_CATEGORY),
+    ("Blåbær Udenlandske", DEFAULT_CATEGORY),
+    ("Mandler", DEFAULT_CATEGORY),
+    ("Pris pr. kg", DEFAULT_CATEGORY),
+    ("Helstegt and", "Meat & Poultry"),
+    # Keywords without markers match inside Danish compounds
+    ("Oksekød i tern", "Meat & Poultry"),
+    ("Kalvefilet", "Meat & Poultry"),
+    ("Lammekoteletter", "Meat & Poultry"),
+    ("Rødvin", "Beverages"),
+])
+def test_word_boundaries(heading, category):
+    assert categorize_product(heading, "") == category
+
+
+@pytest.mark.parametrize('heading, category', [
+    ("Magnum is", "Frozen Foods"),
+    ("Is i bæger", "Frozen Foods"),
+    ("Isbar", "Frozen Foods"),
+    ("Færdigret lasagne", "Frozen Foods"),
+    ("Ispinde", DEFAULT_CATEGORY),
+    # Frozen food keeps its food category
+    ("Frosne ærter", "Pantry & Condiments"),
+    ("Dybfrost fisk", "Seafood"),
+])
+def test_frozen_and_ice_cream(heading, category):
+    assert categorize_product(heading, "") == category
+
+
+def test_earlier_category_wins():
+    # 'kød' (Meat & Poultry) before 'pizza' (Frozen Foods), 'ost' before 'pizza'
+    assert categorize_product("Pizza med oksekød", "") == "Meat & Poultry"
+    assert categorize_product("Pizza", "med ost") == "Dairy & Eggs"
+    # 'drik' (Beverages) comes before Plant-Based
+    assert categorize_product("Naturli plantedrik", "") == "Beverages"
+
+
+def test_description_counts():
+    assert categorize_product("Tilbud", "Kyllingebryst 900 g") == "Meat & Poultry"
+
+
+def test_batch_matches_single():
+    offers = [("Rugbrød", ""), ("Magnum is", ""), ("Flere varianter", "")]
+    assert categorize_batch(offers) == [categorize_product(*offer) for offer in offers]
@@ -0,0 +1,46 @@
+"""Checkpoint journal round trips for --resume."""
+from checkpoint import CheckpointJournal
+
+
+def test_journal_round_trip(tmp_path):
+    journal = CheckpointJournal('rema', str(tmp_path))
+    journal.scraped_at = "2025-11-07T23:58:00"
+    journal.start(123, {"a": "fa", "b": "fb"})
+    journal.record("a", {"original_name": "Mælk"})
+    journal.close()
+
+    state = CheckpointJournal('rema', str(tmp_path)).load()
+    assert (state.publication_id, state.scraped_at) == (123, "2025-11-07T23:58:00")
+    assert state.fingerprints == {"a": "fa", "b": "fb"}
+    assert state.completed == {"a": {"original_name": "Mælk"}}
+
+
+def test_resume_keeps_the_start_of_the_interrupted_run(tmp_path):
+    journal = CheckpointJournal('rema', str(tmp_path))
+    journal.scraped_at = "2025-11-07T23:58:00"
+    journal.start(123, {"a": "fa", "b": "fb"})
+    journal.record("a", None)
+    journal.close()
+
+    # Resumed after midnight: the date folder still comes from the journal
+    state = CheckpointJournal('rema', str(tmp_path)).load()
+    resumed = CheckpointJournal('rema', str(tmp_path))
+    resumed.scraped_at = "2025-11-08T00:05:00"
+    resumed.resume(state)
+    resumed.record("b", None)
+    resumed.close()
+
+    state = CheckpointJournal('rema', str(tmp_path)).load()
+    assert state.scraped_at == "2025-11-07T23:58:00"
+    assert state.completed == {"a": None, "b": None}
+
+
+def test_truncated_journal_and_old_start_record(tmp_path):
+    journal = CheckpointJournal('rema', str(tmp_path))
+    with open(journal.path, 'w', encoding='utf-8') as f:
+        f.write('{"type":"start","publication_id":123,"offers":{"a":"fa"}}\n'
+                '{"type":"done","offer_id":"a","deal":null}\n'
+                '{"type":"done","offer_')
+    state = journal.load()
+    assert state.scraped_at is None
+    assert state.completed == {"a": None}
@@ -0,0 +1,42 @@
+"""
+deal_matcher.py against tests/fixtures/matching/cases.json, the cases
+lib/dealMatching.test.ts runs too. After changing tokenization, rewrite the
+fixture's postings with `python3 tests/test_deal_matcher.py`.
+"""
+import json
+import os
+
+import pytest
+
+from conftest import FIXTURES_DIR, load_fixture
+from deal_matcher import DealMatcher, build_match_index
+
+FIXTURE = load_fixture('matching', 'cases.json')
+
+
+def test_fixture_postings_are_current():
+    assert FIXTURE['match'] == build_match_index(FIXTURE['deals'])
+
+
+@pytest.mark.parametrize('case', FIXTURE['cases'],
+                         ids=lambda case: f"{case['query']['name']}-{'link' if case['whole_words'] else 'search'}")
+def test_match(case):
+    matcher = DealMatcher(FIXTURE['deals'], FIXTURE['match'])
+    query = case['query']
+    positions = matcher.match(query['name'], query.get('unit'), query.get('category'),
+                              case['limit'], case['whole_words'])
+    assert [FIXTURE['deals'][position]['original_name'] for position in positions] == case['expected']
+
+
+def test_match_batch_links_whole_words_only():
+    matcher = DealMatcher(FIXTURE['deals'])
+    names = [[FIXTURE['deals'][position]['original_name'] for position in positions]
+             for positions in matcher.match_batch(['smør', {'name': 'mælk', 'unit': 'l'}], 1, whole_words=True)]
+    assert names == [["Lurpak smør 200 g"], ["Arla let mælk 1 l"]]
+
+
+if __name__ == "__main__":
+    FIXTURE['match'] = build_match_index(FIXTURE['deals'])
+    with open(os.path.join(FIXTURES_DIR, 'matching', 'cases.json'), 'w', encoding='utf-8') as f:
+        json.dump(FIXTURE, f, ensure_ascii=False, indent=2)
+        f.write('\n')
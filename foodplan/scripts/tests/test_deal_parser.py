@@ -0,0 +1,55 @@
+"""Quantities and unit prices parsed from offer headings and descriptions."""
+import pytest
+
+from deal_parser import Quantity, calculate_price_per_unit, extract_quantity_info, parse_quantity
+
+
+@pytest.mark.parametrize('heading, description, quantity', [
+    ("Merrild kaffe", "2 x 500 g", Quantity(1000.0, 'g', "2 x 500 g")),
+    ("Coca-Cola 6x33 cl", "Ex. pant", Quantity(198.0, 'cl', "6 x 33 cl")),
+    ("Faxe Kondi 2 x 1,5 l", "", Quantity(3.0, 'l', "2 x 1.5 l")),
+    # The heading names the cup, the description the pack
+    ("Skyr yoghurt 125 g", "4 x 125 g", Quantity(500.0, 'g', "4 x 125 g")),
+    ("Skyr yoghurt", "4 x 125 g. Flere varianter", Quantity(500.0, 'g', "4 x 125 g")),
+])
+def test_multipack(heading, description, quantity):
+    assert parse_quantity(description, heading) == quantity
+
+
+@pytest.mark.parametrize('heading, description, quantity', [
+    ("Pepsi Max 1,5 l", "Ex. pant", Quantity(1.5, 'l', "1.5 l")),
+    ("Max 1,5 l", "", Quantity(1.5, 'l', "1.5 l")),
+    ("Skrabeæg", "XL 10 stk", Quantity(10.0, 'stk', "10 stk")),
+    ("Lurpak smør", "200 g. Max. 6 stk. pr. kunde", Quantity(200.0, 'g', "200 g")),
+    ("1 x 500 g hakket oksekød", "", Quantity(500.0, 'g', "500 g")),
+    ("Rødvin", "75 cl. Ved køb af 3 x 75 cl", Quantity(75.0, 'cl', "75 cl")),
+])
+def test_x_that_is_not_a_pack(heading, description, quantity):
+    assert parse_quantity(description, heading) == quantity
+
+
+def test_weight_beats_volume_and_pieces():
+    assert extract_quantity_info("6 stk. 1 l", "Kyllingefilet 900 g") == ("900 g", 'g')
+    assert extract_quantity_info("6 stk", "Sodavand 1,5 l") == ("1.5 l", 'l')
+    assert extract_quantity_info("", "Bananer") == ("1 stk", 'stk')
+
+
+@pytest.mark.parametrize('price, quantity, unit_type, price_per_unit', [
+    (80.0, "2 x 500 g", 'g', 80.0),
+    (39.0, "6 x 33 cl", 'cl', 19.7),
+    (30.0, "2 x 1.5 l", 'l', 10.0),
+    (20.0, "4 x 125 g", 'g', 40.0),
+    (20.0, "200 g", 'g', 100.0),
+    (20.0, "200,5 g", 'g', 99.75),
+    (20.0, "0 g", 'g', None),
+    (20.0, "", 'g', None),
+])
+def test_price_per_unit(price, quantity, unit_type, price_per_unit):
+    assert calculate_price_per_unit(price, quantity, unit_type) == price_per_unit
+
+
+def test_build_deal_prices_multipack_per_litre():
+    from scraper_core import build_deal
+
+    deal = build_deal({"heading": "Pepsi max", "description": "24 x 33 cl. Ex. pant", "pricing": {"price": 99.0}})
+    assert (deal["quantity"], deal["unit_type"], deal["price_per_unit"]) == ("24 x 33 cl", 'cl', 12.5)
@@ -0,0 +1,141 @@
+"""
+load_deals.py: row validation always, COPY + upsert against Postgres when
+TEST_DATABASE_URL points at a database the tests may create schemas in
+(e.g. postgresql://localhost/foodplan_test).
+"""
+import copy
+import os
+import re
+
+import pytest
+
+import load_deals
+from conftest import FIXTURES_DIR, load_fixture
+from load_deals import deal_rows, load_store_deals, store_data_error
+
+MIGRATION_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                              'supabase', 'migrations', 'add_deals_bulk_load.sql')
+TEST_SCHEMA = 'load_deals_test'
+
+
+def netto_deals():
+    return load_fixture('deals', 'netto_deals.json')
+
+
+def test_deal_rows_skip_invalid_and_duplicates():
+    rows, skipped = deal_rows(netto_deals())
+    assert skipped == 1
+    assert [row[2] for row in rows] == ["Dansk hakket kyllingekød 7-10% 500g", "Arla letmælk 1 l",
+                                        'Bananer, "økologiske"']
+
+
+@pytest.mark.parametrize('valid_from', ["", None, "2025-11-31"])
+def test_store_without_dates_is_rejected(valid_from):
+    store_data = dict(netto_deals(), valid_from=valid_from)
+    assert "no valid dates" in store_data_error(store_data)
+
+
+def test_copy_buffer_quotes_and_nulls():
+    rows, _ = deal_rows(netto_deals())
+    lines = load_deals.copy_buffer(rows).read().splitlines()
+    assert lines[2].startswith(rows[2][0] + ',Fruits & Vegetables,"Bananer, ""økologiske""",')
+    assert ',\\N,\\N,\\N,' in lines[2]
+
+
+def _statements(path):
+    with open(path, encoding='utf-8') as f:
+        text = '\n'.join(line for line in f.read().splitlines() if not line.lstrip().startswith('--'))
+    # Statements end at a semicolon at the end of a line (before any comment)
+    return [statement.strip() for statement in re.split(r';[ \t]*(?:--[^\n]*)?$', text, flags=re.M)
+            if statement.strip()]
+
+
+@pytest.fixture
+def conn():
+    database_url = os.environ.get('TEST_DATABASE_URL')
+    if not database_url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    if load_deals.psycopg2 is None:
+        pytest.skip("psycopg2 is not installed")
+
+    conn = load_deals.connect(database_url)
+    with conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {TEST_SCHEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {TEST_SCHEMA}")
+        cur.execute(f"SET search_path TO {TEST_SCHEMA}, public")
+        for statement in _statements(os.path.join(FIXTURES_DIR, 'supabase', 'base_schema.sql')):
+            cur.execute(statement)
+        cur.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        has_trgm = cur.fetchone() is not None
+        for statement in _statements(MIGRATION_PATH):
+            # Plain Postgres builds may lack the contrib extensions
+            if not has_trgm and ('pg_trgm' in statement or 'gin_trgm_ops' in statement):
+                continue
+            cur.execute(statement)
+    yield conn
+    with conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA {TEST_SCHEMA} CASCADE")
+    conn.close()
+
+
+def _deals(conn):
+    with conn, conn.cursor() as cur:
+        cur.execute("""
+            SELECT d.id, s.slug, d.original_name, d.price, d.deal_hash, p.name, c.name
+            FROM deals d JOIN stores s ON s.id = d.store_id
+            LEFT JOIN products p ON p.id = d.product_id
+            LEFT JOIN categories c ON c.id = p.category_id
+            ORDER BY d.original_name
+        """)
+        return cur.fetchall()
+
+
+def test_load_links_store_and_products(conn):
+    result = load_store_deals(conn, 'netto', netto_deals())
+    assert result == load_deals.LoadResult(3, 0, 1, None)
+
+    rows = _deals(conn)
+    assert [(slug, name, product, category) for _, slug, name, _, _, product, category in rows] == [
+        ('netto', "Arla letmælk 1 l", "letmælk", "Dairy & Eggs"),
+        ('netto', 'Bananer, "økologiske"', 'Bananer, "økologiske"', "Fruits & Vegetables"),
+        ('netto', "Dansk hakket kyllingekød 7-10% 500g", "Dansk hakket kyllingekød", "Meat & Poultry"),
+    ]
+
+
+def test_reload_is_idempotent_and_keeps_ids(conn):
+    load_store_deals(conn, 'netto', netto_deals())
+    before = _deals(conn)
+    assert load_store_deals(conn, 'netto', netto_deals()).deleted == 0
+    assert _deals(conn) == before
+    with conn, conn.cursor() as cur:
+        cur.execute("SELECT count(*) FROM products")
+        assert cur.fetchone()[0] == 3
+
+
+def test_reload_removes_stale_deals(conn):
+    load_store_deals(conn, 'netto', netto_deals())
+    ids = {row[2]: row[0] for row in _deals(conn)}
+
+    store_data = netto_deals()
+    del store_data['deals'][0]
+    store_data['deals'][0]['price_per_unit'] = 9.95   # not part of the deal hash
+    result = load_store_deals(conn, 'netto', store_data)
+
+    assert (result.upserted, result.deleted) == (2, 1)
+    rows = _deals(conn)
+    assert [row[2] for row in rows] == ["Arla letmælk 1 l", 'Bananer, "økologiske"']
+    assert all(row[0] == ids[row[2]] for row in rows)
+
+
+def test_new_store_is_created(conn):
+    store_data = dict(netto_deals(), store_name="Lidl")
+    load_store_deals(conn, 'lidl', store_data)
+    assert {row[1] for row in _deals(conn)} == {'lidl'}
+
+
+def test_file_without_dates_is_not_loaded(conn):
+    store_data = copy.deepcopy(netto_deals())
+    store_data['valid_from'] = store_data['valid_to'] = ""
+    result = load_store_deals(conn, 'netto', store_data)
+    assert result.error and result.upserted == 0
+    assert _deals(conn) == []
@@ -0,0 +1,44 @@
+"""Display names and product keys of offer headings."""
+import unicodedata
+
+import pytest
+
+from name_normalizer import normalize_name
+
+
+@pytest.mark.parametrize('heading, name, key', [
+    ("REMA 1000 Hakket dansk oksekød 8-12% 500 g", "REMA 1000 Hakket dansk oksekød", "hakket oksekød"),
+    ("GESTUS RØGET LAKS I SKIVER 200 g", "Gestus røget laks i skiver", "laks røget skiver"),
+    ("REMA 1000", "Rema 1000", "rema"),
+    ("HAKKET OKSEKØD 8-12 %", "Hakket oksekød", "hakket oksekød"),
+    ("Coca-Cola eller Fanta 1,5 l", "Coca-Cola eller Fanta", "coca cola fanta"),
+    ("Lurpak", "Lurpak", "lurpak"),
+    ("Blaabær 125 g", "Blaabær", "blåbær"),
+])
+def test_normalize_name(heading, name, key):
+    assert normalize_name(heading) == (name, key)
+
+
+# Product brands are what is sold: they stay in the display name and the key
+@pytest.mark.parametrize('heading, name, key', [
+    ("Marabou plader", "Marabou plader", "marabou plader"),
+    ("Haribo poser 120 g", "Haribo poser", "haribo poser"),
+    ("Easis bar", "Easis bar", "bar easis"),
+    ("Murph sport", "Murph sport", "murph sport"),
+    ("Castello Core", "Castello Core", "castello core"),
+    ("Pepsi max 24 x 33 cl", "Pepsi max", "max pepsi"),
+    ("Lurpak smør 200 g", "Lurpak smør", "lurpak smør"),
+])
+def test_product_brand_is_kept(heading, name, key):
+    assert normalize_name(heading) == (name, key)
+
+
+def test_sodas_of_different_brands_stay_apart():
+    assert normalize_name("Pepsi sodavand 1,5 l").key != normalize_name("Coca-Cola sodavand 1,5 l").key
+
+
+def test_decomposed_heading_matches_composed():
+    heading = "Blåbær 125 g"
+    decomposed = unicodedata.normalize('NFD', heading)
+    assert decomposed != heading
+    assert normalize_name(decomposed) == normalize_name(heading) == ("Blåbær", "blåbær")
@@ -0,0 +1,39 @@
+"""Cross-store grouping of deals by product key and base unit."""
+from deal_table import DealTable
+from price_comparison import compare_prices
+
+
+def store(name, *deals):
+    return {"store_name": name, "valid_from": "2025-11-07", "valid_to": "2025-11-13",
+            "deals": [dict({"product_key": "hakket oksekød", "is_app_price": False}, **deal)
+                      for deal in deals]}
+
+
+def test_cheapest_unit_price_per_store():
+    deals = DealTable()
+    deals.append_store('netto', store("Netto",
+                                      {"original_name": "Hakket oksekød 500 g", "price": 40.0,
+                                       "unit_type": 'g', "price_per_unit": 80.0},
+                                      {"original_name": "Hakket oksekød 1 kg", "price": 70.0,
+                                       "unit_type": 'g', "price_per_unit": 70.0}))
+    deals.append_store('rema', store("REMA 1000",
+                                     {"original_name": "Hakket oksekød 400 g", "price": 36.0,
+                                      "unit_type": 'g', "price_per_unit": 90.0}))
+    [group] = compare_prices(deals)
+    assert (group['base_unit'], group['store_count'], group['spread']) == ('kg', 2, 20.0)
+    assert group['by_store'] == {'netto': 70.0, 'rema': 90.0}
+    assert group['cheapest']['price'] == 70.0
+
+
+def test_shelf_price_is_not_ranked_against_unit_prices():
+    deals = DealTable()
+    deals.append_store('netto', store("Netto",
+                                      {"original_name": "Hakket oksekød 500 g", "price": 40.0,
+                                       "unit_type": 'g', "price_per_unit": 80.0}))
+    # No parsed quantity: 25 kr for an unknown amount says nothing per kg
+    deals.append_store('lidl', store("Lidl",
+                                     {"original_name": "Hakket oksekød", "price": 25.0,
+                                      "unit_type": 'g', "price_per_unit": None}))
+    [group] = compare_prices(deals)
+    assert group['by_store'] == {'netto': 80.0}
+    assert group['cheapest']['store_slug'] == 'netto'
@@ -0,0 +1,59 @@
+"""Week-over-week deltas and reuse between offer snapshots."""
+import os
+
+import pytest
+
+from snapshots import compute_delta, load_snapshot, reusable_deals, save_snapshot
+
+
+def deal(name, price, price_per_unit=None):
+    return {"original_name": name, "price": price, "price_per_unit": price_per_unit}
+
+
+PREVIOUS = {"offers": {
+    "kept": {"hotspot": "a", "deal": deal("Mælk", 10.0, 10.0)},
+    "repriced": {"hotspot": "b", "deal": deal("Smør", 20.0, 80.0)},
+    "delisted": {"hotspot": "c", "deal": deal("Æg", 30.0, 3.0)},
+    "flaky": {"hotspot": "d", "deal": deal("Ost", 40.0, 100.0)},
+    "failed_before": {"hotspot": "e", "deal": None, "failed": True},
+}}
+
+
+def test_delta():
+    offers = {
+        "kept": {"hotspot": "a", "deal": deal("Mælk", 10.0, 10.0)},
+        "repriced": {"hotspot": "b2", "deal": deal("Smør", 18.0, 72.0)},
+        "new": {"hotspot": "f", "deal": deal("Brød", 25.0, None)},
+    }
+    delta = compute_delta(PREVIOUS, offers)
+    assert [d["original_name"] for d in delta["added"]] == ["Brød"]
+    assert sorted(d["original_name"] for d in delta["removed"]) == ["Ost", "Æg"]
+    assert [change["after"]["price"] for change in delta["price_changed"]] == [18.0]
+
+
+def test_failed_fetch_is_not_a_removal():
+    offers = {"flaky": {"hotspot": "d", "deal": None, "failed": True}}
+    delta = compute_delta(PREVIOUS, offers)
+    assert "Ost" not in [d["original_name"] for d in delta["removed"]]
+
+
+def test_offer_that_failed_last_time_is_not_added():
+    offers = {"failed_before": {"hotspot": "e", "deal": deal("Kaffe", 50.0, 125.0)}}
+    assert compute_delta(PREVIOUS, offers)["added"] == []
+
+
+def test_failed_entries_are_not_reused():
+    reused = reusable_deals(PREVIOUS, {"kept": "a", "repriced": "changed", "failed_before": "e"})
+    assert list(reused) == ["kept"]
+
+
+def test_interrupted_snapshot_write_keeps_the_previous_one(tmp_path):
+    path = save_snapshot(str(tmp_path), 'netto', "pub1", "2025-11-07T15:30:00", PREVIOUS["offers"])
+
+    class Unserializable:
+        pass
+
+    with pytest.raises(TypeError):
+        save_snapshot(str(tmp_path), 'netto', "pub2", "2025-11-14T15:30:00", {"bad": Unserializable()})
+    assert load_snapshot(path)["publication_id"] == "pub1"
+    assert os.listdir(tmp_path) == ["netto_offers.json"]
@@ -0,0 +1,96 @@
+"""Publication discovery against recorded tjek catalog and dealer payloads."""
+from datetime import datetime, timezone
+
+import pytest
+
+import tjek_publications
+from conftest import load_fixture
+from tjek_publications import Publication, publication_from_catalog, select_current_catalog
+
+
+def at(text):
+    return datetime.fromisoformat(text).replace(tzinfo=timezone.utc)
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self.payload
+
+
+def test_selects_running_catalog():
+    catalogs = load_fixture('tjek', 'netto_catalogs.json')
+    assert select_current_catalog(catalogs, at('2025-11-10T12:00:00'))['id'] == '1c27dWq9'
+
+
+def test_week_boundary_switches_catalog():
+    catalogs = load_fixture('tjek', 'netto_catalogs.json')
+    assert select_current_catalog(catalogs, at('2025-11-14T22:59:58'))['id'] == '1c27dWq9'
+    assert select_current_catalog(catalogs, at('2025-11-14T23:00:00'))['id'] == '8a9f3Kx1'
+
+
+def test_overlapping_catalogs_prefer_latest_start():
+    # The Christmas catalog runs for weeks alongside the weekly one
+    catalogs = load_fixture('tjek', 'rema_catalogs.json')
+    assert select_current_catalog(catalogs, at('2025-11-10T12:00:00'))['id'] == 'b380Tz52'
+    assert select_current_catalog(catalogs, at('2025-11-20T12:00:00'))['id'] == 'd71aBc04'
+
+
+def test_upcoming_catalog_before_week_starts():
+    catalogs = load_fixture('tjek', 'netto_catalogs.json')[:1]
+    assert select_current_catalog(catalogs, at('2025-11-13T12:00:00'))['id'] == '8a9f3Kx1'
+
+
+def test_no_current_catalog_falls_back_to_latest():
+    catalogs = load_fixture('tjek', 'meny_catalogs.json')
+    assert select_current_catalog(catalogs, at('2025-11-10T12:00:00'))['id'] == '92eeHn31'
+
+
+def test_no_dated_catalog():
+    catalogs = load_fixture('tjek', 'meny_catalogs.json')[2:]
+    assert select_current_catalog(catalogs, at('2025-11-10T12:00:00')) is None
+    assert select_current_catalog([], at('2025-11-10T12:00:00')) is None
+
+
+def test_publication_dates_are_local_store_dates():
+    catalog = load_fixture('tjek', 'netto_catalogs.json')[1]
+    assert publication_from_catalog(catalog) == Publication(
+        id='1c27dWq9', valid_from='2025-11-08', valid_to='2025-11-14', week_number=45, page_count=27)
+
+
+def test_publication_summer_time_offset():
+    catalog = load_fixture('tjek', 'meny_catalogs.json')[1]
+    publication = publication_from_catalog(catalog)
+    assert (publication.valid_from, publication.valid_to) == ('2025-10-24', '2025-10-30')
+
+
+def test_publication_without_page_count():
+    catalog = load_fixture('tjek', 'rema_catalogs.json')[1]
+    assert publication_from_catalog(catalog).page_count is None
+
+
+def test_publication_without_dates():
+    assert publication_from_catalog(load_fixture('tjek', 'meny_catalogs.json')[2]) is None
+
+
+@pytest.mark.parametrize('value', [None, '', 'not a date'])
+def test_parse_timestamp_rejects_garbage(value):
+    assert tjek_publications.parse_timestamp(value) is None
+
+
+def test_discover_resolves_dealer_by_name(monkeypatch):
+    responses = {
+        tjek_publications.DEALER_CATALOGS_URL.format(dealer_id='stale'): FakeResponse([]),
+        tjek_publications.DEALER_SEARCH_URL.format(query='MENY'):
+            FakeResponse(load_fixture('tjek', 'dealer_search_meny.json')),
+        tjek_publications.DEALER_CATALOGS_URL.format(dealer_id='267e1m'):
+            FakeResponse(load_fixture('tjek', 'meny_catalogs.json')),
+    }
+    monkeypatch.setattr(tjek_publications.tjek_http, 'get', lambda url, **kwargs: responses[url])
+
+    publication = tjek_publications.discover_publication('stale', 'MENY', now=at('2025-11-01T12:00:00'))
+    assert publication.id == '92eeHn31'
+    assert publication.week_number == 44
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Concurrent fetch engine for the tjek APIs.
+Runs blocking requests on a bounded worker pool driven by asyncio,
+spaces requests out per host, and returns results in input order.
+Also crawls paged publications, stopping at the publication's last page.
+
+Offer details come from the cheapest source that has them: the offer object
+embedded in the page hotspot, the offer cache, bulk listings of many offers
+per request, and only then one request per offer.
+"""
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+import requests
+
+import scrape_metrics
+import tjek_http
+from offer_cache import CachedResponse
+
+OFFER_URL = tjek_http.SQUID_API + '/v2/offers/{offer_id}'
+OFFERS_URL = tjek_http.SQUID_API + '/v2/offers'
+PAGE_URL = tjek_http.VIEWER_API + '/api/paged-publications/{publication_id}/{page}'
+CATALOG_URL = tjek_http.SQUID_API + '/v2/catalogs/{publication_id}'
+
+# Status codes the page viewer answers with once we are past the last page
+END_OF_PUBLICATION_STATUSES = (400, 404, 410)
+
+# Offers requested per bulk listing call (the listing's page size limit)
+BULK_BATCH_SIZE = 100
+
+# Defaults are deliberately polite - tjek is a public API without a key
+DEFAULT_CONCURRENCY = 16
+DEFAULT_RATE_PER_HOST = 20.0  # request starts per second, per host
+
+
+class HostRateLimiter:
+    """Limit request starts to `rate` per second for each host."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, url):
+        """Sleep until the next free slot for the host of `url`."""
+        if not self.interval:
+            return
+
+        host = urlsplit(url).netloc
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def _fetch_all(urls, concurrency, rate_per_host, headers):
+    """Fetch all URLs, returning a response or exception per URL in order."""
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = HostRateLimiter(rate_per_host)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def fetch(url, request_headers):
+            async with semaphore:
+                await limiter.wait(url)
+                get = functools.partial(tjek_http.get, url, headers=request_headers)
+                try:
+                    return await loop.run_in_executor(executor, get)
+                except Exception as e:
+                    return e
+
+        # gather() keeps results in the order the URLs were given
+        return await asyncio.gather(*(fetch(url, h) for url, h in zip(urls, headers)))
+
+
+def fetch_urls(urls, concurrency=DEFAULT_CONCURRENCY, rate_per_host=DEFAULT_RATE_PER_HOST,
+               headers=None):
+    """
+    Fetch URLs concurrently.
+
+    `headers`, if given, is a list of extra request headers aligned with `urls`.
+    Returns a list aligned with `urls` holding either the `requests.Response`
+    or the exception raised while fetching that URL.
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+    headers = list(headers) if headers is not None else [None] * len(urls)
+    return asyncio.run(_fetch_all(urls, max(1, concurrency), rate_per_host, headers))
+
+
+def embedded_offer(hotspot_offer):
+    """The hotspot's offer object if it has every field build_deal() needs, else None."""
+    if not isinstance(hotspot_offer, dict):
+        return None
+    pricing = hotspot_offer.get('pricing')
+    if (hotspot_offer.get('heading') and 'description' in hotspot_offer
+            and isinstance(pricing, dict) and pricing.get('price') is not None):
+        return hotspot_offer
+    return None
+
+
+def bulk_offer_urls(offer_ids):
+    """Listing URLs for `offer_ids`, BULK_BATCH_SIZE IDs each."""
+    offer_ids = list(offer_ids)
+    return [
+        f"{OFFERS_URL}?{urlencode({'offer_ids': ','.join(batch), 'limit': len(batch)})}"
+        for batch in (offer_ids[start:start + BULK_BATCH_SIZE]
+                      for start in range(0, len(offer_ids), BULK_BATCH_SIZE))
+    ]
+
+
+def fetch_bulk_offers(offer_ids, concurrency=DEFAULT_CONCURRENCY, rate_per_host=DEFAULT_RATE_PER_HOST):
+    """
+    Fetch offers through the bulk listing, BULK_BATCH_SIZE per request.
+
+    Returns {offer_id: payload} for the offers the listing returned; failed
+    batches and offers missing from a listing are simply absent.
+    """
+    wanted = set(offer_ids)
+    payloads = {}
+    for response in fetch_urls(bulk_offer_urls(offer_ids), concurrency, rate_per_host):
+        if not isinstance(response, requests.Response) or response.status_code != 200:
+            continue
+        try:
+            listing = response.json()
+        except ValueError:
+            continue
+        if not isinstance(listing, list):
+            continue
+        for offer in listing:
+            if isinstance(offer, dict) and offer.get('id') in wanted:
+                payloads[offer['id']] = offer
+    return payloads
+
+
+def fetch_offers(offer_ids, concurrency=DEFAULT_CONCURRENCY, rate_per_host=DEFAULT_RATE_PER_HOST,
+                 cache=None, hotspots=None, bulk=True):
+    """
+    Fetch offer details for `offer_ids`, in the same order as the IDs.
+
+    Each offer comes from the first source that has it:
+    1. its hotspot offer object in `hotspots` (keyed by offer ID), if complete;
+    2. a fresh OfferCache entry;
+    3. a bulk listing request (with `bulk`), many offers per request;
+    4. its own detail request. A stale cache entry is revalidated, and an
+       expired entry is used if refetching fails.
+
+    Returns a list of responses (or exceptions) aligned with `offer_ids`.
+    """
+    offer_ids = list(offer_ids)
+    hotspots = hotspots or {}
+    metrics = scrape_metrics.current()
+    results = [None] * len(offer_ids)
+
+    pending = []
+    from_hotspot = 0
+    for i, offer_id in enumerate(offer_ids):
+        payload = embedded_offer(hotspots.get(offer_id))
+        if payload is not None:
+            from_hotspot += 1
+        elif cache is not None:
+            payload = cache.get_fresh(offer_id)
+        if payload is not None:
+            results[i] = CachedResponse(payload)
+        else:
+            pending.append(i)
+    metrics.count('offers_from_hotspot', from_hotspot)
+
+    if bulk and pending:
+        listed = fetch_bulk_offers([offer_ids[i] for i in pending], concurrency, rate_per_host)
+        remaining = []
+        for i in pending:
+            payload = listed.get(offer_ids[i])
+            if payload is None:
+                remaining.append(i)
+                continue
+            if cache is not None:
+                cache.store_payload(offer_ids[i], payload)
+            results[i] = CachedResponse(payload)
+        metrics.count('offers_from_bulk', len(pending) - len(remaining))
+        pending = remaining
+
+    metrics.count('offer_detail_requests', len(pending))
+    responses = fetch_urls(
+        [OFFER_URL.format(offer_id=offer_ids[i]) for i in pending],
+        concurrency=concurrency,
+        rate_per_host=rate_per_host,
+        headers=[cache.conditional_headers(offer_ids[i]) for i in pending] if cache is not None else None
+    )
+
+    for i, response in zip(pending, responses):
+        if cache is not None:
+            response = _cache_response(cache, offer_ids[i], response)
+        results[i] = response
+
+    if cache is not None:
+        cache.commit()
+    return results
+
+
+def _cache_response(cache, offer_id, response):
+    """Store a fresh detail response, or answer from the cache on 304 or failure."""
+    if isinstance(response, requests.Response) and response.status_code == 304:
+        payload = cache.revalidate(offer_id)
+        return CachedResponse(payload) if payload is not None else response
+    if isinstance(response, requests.Response) and response.status_code == 200:
+        try:
+            cache.store(offer_id, response)
+        except ValueError:
+            pass  # not JSON - leave it to the caller to report
+        return response
+    payload = cache.get_stale(offer_id)
+    return CachedResponse(payload) if payload is not None else response
+
+
+def _page_count_from(data):
+    """Read a page count from a publication or page payload, if present."""
+    if not isinstance(data, dict):
+        return None
+    for key in ('page_count', 'pageCount', 'pages'):
+        count = data.get(key)
+        if isinstance(count, int) and count > 0:
+            return count
+    return None
+
+
+def fetch_publication_page_count(publication_id):
+    """Get the real page count from the publication metadata, or None."""
+    try:
+        response = tjek_http.get(CATALOG_URL.format(publication_id=publication_id))
+        if response.status_code == 200:
+            return _page_count_from(response.json())
+    except Exception as e:
+        print(f"Could not read publication metadata: {e}")
+    return None
+
+
+def crawl_publication(publication_id, max_pages, concurrency=DEFAULT_CONCURRENCY,
+                      rate_per_host=DEFAULT_RATE_PER_HOST, page_count=None):
+    """
+    Fetch the pages of a paged publication concurrently.
+
+    The page count is `page_count` if the caller already knows it, else taken
+    from the publication metadata, or from the first page when the metadata
+    has none. If neither knows it, pages are fetched in
+    batches of `concurrency` until the viewer reports a page past the end, and
+    never beyond `max_pages`.
+
+    Returns a list of (page, response-or-exception) tuples in page order.
+    """
+    def page_urls(first, last):
+        return [PAGE_URL.format(publication_id=publication_id, page=page)
+                for page in range(first, last + 1)]
+
+    page_count = page_count or fetch_publication_page_count(publication_id)
+    if page_count:
+        print(f"Publication has {page_count} pages")
+        return list(enumerate(fetch_urls(page_urls(1, page_count), concurrency, rate_per_host), 1))
+
+    results = [(1, fetch_urls(page_urls(1, 1), 1, rate_per_host)[0])]
+    first = results[0][1]
+    if isinstance(first, requests.Response) and first.status_code == 200:
+        try:
+            page_count = _page_count_from(first.json())
+        except ValueError:
+            page_count = None
+    if page_count:
+        print(f"Publication has {page_count} pages")
+        last_pages = fetch_urls(page_urls(2, page_count), concurrency, rate_per_host)
+        return results + list(enumerate(last_pages, 2))
+
+    # Unknown length: probe in batches and stop at the first page past the end
+    page = 2
+    while page <= max_pages:
+        last = min(page + concurrency - 1, max_pages)
+        batch = fetch_urls(page_urls(page, last), concurrency, rate_per_host)
+        for number, response in enumerate(batch, page):
+            if (isinstance(response, requests.Response)
+                    and response.status_code in END_OF_PUBLICATION_STATUSES):
+                print(f"Publication ends after page {number - 1}")
+                return results
+            results.append((number, response))
+        page = last + 1
+
+    return results
+
+
+def crawl_hotspots(publication_id, max_pages, concurrency=DEFAULT_CONCURRENCY,
+                   rate_per_host=DEFAULT_RATE_PER_HOST, page_count=None):
+    """
+    Collect the hotspot offer objects from every page, keyed by offer ID.
+
+    The dict is in page and hotspot order. An offer shown on several pages or
+    in several hotspots is only returned once, with its first hotspot.
+    """
+    hotspots = {}
+    found = 0
+    pages = crawl_publication(publication_id, max_pages, concurrency, rate_per_host, page_count)
+    for page, response in pages:
+        try:
+            if isinstance(response, Exception):
+                raise response
+            data = response.json()
+
+            if 'hotspots' in data:
+                for hotspot in data['hotspots']:
+                    if 'offer' in hotspot and 'id' in hotspot['offer']:
+                        found += 1
+                        hotspots.setdefault(hotspot['offer']['id'], hotspot['offer'])
+        except Exception as e:
+            print(f"Error fetching page {page}: {e}")
+
+    duplicates = found - len(hotspots)
+    if duplicates:
+        print(f"Skipped {duplicates} duplicate offer IDs")
+    return hotspots
+
+
+def crawl_offer_ids(publication_id, max_pages, concurrency=DEFAULT_CONCURRENCY,
+                    rate_per_host=DEFAULT_RATE_PER_HOST, page_count=None):
+    """Collect unique hotspot offer IDs from every page, in page and hotspot order."""
+    return list(crawl_hotspots(publication_id, max_pages, concurrency, rate_per_host, page_count))
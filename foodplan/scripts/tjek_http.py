@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for the tjek APIs.
+One pooled requests.Session per process, so connections to
+publication-viewer.tjek.com and squid-api.tjek.com are kept alive and reused,
+with compressed responses and retry/backoff on transient failures.
+Every request is recorded in the run metrics (scrape_metrics.py).
+
+The API hosts can be pointed elsewhere, e.g. at the local stand-in server
+(tjek_standin.py), with the TJEK_SQUID_API and TJEK_VIEWER_API environment
+variables.
+"""
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import scrape_metrics
+
+SQUID_API = os.environ.get('TJEK_SQUID_API', 'https://squid-api.tjek.com').rstrip('/')
+VIEWER_API = os.environ.get('TJEK_VIEWER_API', 'https://publication-viewer.tjek.com').rstrip('/')
+
+DEFAULT_POOL_SIZE = 16          # connections kept open per host
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5           # seconds, doubled on every retry
+DEFAULT_TIMEOUT = 30            # seconds, per request
+
+# Rate limiting and transient server errors are worth retrying
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_timeout = DEFAULT_TIMEOUT
+_lock = threading.Lock()
+
+
+def build_session(pool_size=DEFAULT_POOL_SIZE, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    """Create a keep-alive session with a connection pool and retry policy."""
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry, pool_block=True)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Accept': 'application/json',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive',
+    })
+    return session
+
+
+def configure(pool_size=DEFAULT_POOL_SIZE, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+              timeout=DEFAULT_TIMEOUT):
+    """Replace the shared session, e.g. to match a higher fetch concurrency."""
+    global _session, _timeout
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = build_session(pool_size, retries, backoff)
+        _timeout = timeout
+
+
+def get_session():
+    """Return the shared session, creating it with the defaults on first use."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = build_session()
+        return _session
+
+
+def get(url, **kwargs):
+    """GET `url` through the shared session with the configured timeout."""
+    kwargs.setdefault('timeout', _timeout)
+    started = time.perf_counter()
+    try:
+        response = get_session().get(url, **kwargs)
+    except Exception as e:
+        scrape_metrics.current().record_request(url, time.perf_counter() - started, error=e)
+        raise
+    # urllib3 leaves the retry state it ended with on the raw response
+    retry = getattr(response.raw, 'retries', None)
+    scrape_metrics.current().record_request(url, time.perf_counter() - started,
+                                            status=response.status_code,
+                                            retries=len(retry.history) if retry else 0)
+    return response
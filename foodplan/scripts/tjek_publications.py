@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Publication discovery through the tjek catalog listing.
+Finds a dealer's current weekly catalog and reads its validity dates and page
+count from the catalog metadata, so scrapes need no interactive input.
+
+The parsing helpers take plain API payloads, so they can be exercised with
+recorded responses instead of the live API.
+"""
+from collections import namedtuple
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+import tjek_http
+from tjek_fetch import CATALOG_URL
+
+try:
+    from zoneinfo import ZoneInfo
+    STORE_TIMEZONE = ZoneInfo('Europe/Copenhagen')
+except Exception:
+    STORE_TIMEZONE = timezone.utc
+
+DEALER_CATALOGS_URL = tjek_http.SQUID_API + '/v2/catalogs?dealer_ids={dealer_id}&order_by=-valid_date&limit=24'
+DEALER_SEARCH_URL = tjek_http.SQUID_API + '/v2/dealers/search?query={query}'
+
+# Dates are local store dates (YYYY-MM-DD); page_count may be None
+Publication = namedtuple('Publication', ['id', 'valid_from', 'valid_to', 'week_number', 'page_count'])
+
+
+def parse_timestamp(value):
+    """Parse a tjek timestamp like '2025-11-07T23:00:00+0000'."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S%z')
+    except (TypeError, ValueError):
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
+
+
+def publication_from_catalog(catalog):
+    """Build a Publication from a catalog payload, or None if it lacks dates."""
+    run_from = parse_timestamp(catalog.get('run_from'))
+    run_till = parse_timestamp(catalog.get('run_till'))
+    if not catalog.get('id') or not run_from or not run_till:
+        return None
+
+    valid_from = run_from.astimezone(STORE_TIMEZONE).date()
+    valid_to = run_till.astimezone(STORE_TIMEZONE).date()
+    page_count = catalog.get('page_count')
+
+    return Publication(
+        id=catalog['id'],
+        valid_from=valid_from.isoformat(),
+        valid_to=valid_to.isoformat(),
+        week_number=valid_from.isocalendar()[1],
+        page_count=page_count if isinstance(page_count, int) and page_count > 0 else None
+    )
+
+
+def select_current_catalog(catalogs, now=None):
+    """
+    Pick the catalog to scrape from a dealer's catalog listing.
+
+    Prefers the catalog running at `now` that started most recently; before a
+    new week starts, the next upcoming catalog; otherwise the latest one.
+    """
+    now = now or datetime.now(timezone.utc)
+    dated = []
+    for catalog in catalogs:
+        run_from = parse_timestamp(catalog.get('run_from'))
+        run_till = parse_timestamp(catalog.get('run_till'))
+        if catalog.get('id') and run_from and run_till:
+            dated.append((run_from, run_till, catalog))
+    if not dated:
+        return None
+
+    running = [entry for entry in dated if entry[0] <= now < entry[1]]
+    if running:
+        return max(running, key=lambda entry: entry[0])[2]
+
+    upcoming = [entry for entry in dated if entry[0] > now]
+    if upcoming:
+        return min(upcoming, key=lambda entry: entry[0])[2]
+
+    return max(dated, key=lambda entry: entry[0])[2]
+
+
+def find_dealer_id(query):
+    """Look up a dealer ID by name."""
+    try:
+        response = tjek_http.get(DEALER_SEARCH_URL.format(query=quote(query)))
+        if response.status_code == 200:
+            for dealer in response.json():
+                if dealer.get('name', '').lower() == query.lower():
+                    return dealer.get('id')
+    except Exception as e:
+        print(f"Error searching for dealer {query}: {e}")
+    return None
+
+
+def fetch_dealer_catalogs(dealer_id):
+    """List a dealer's catalogs, newest first."""
+    try:
+        response = tjek_http.get(DEALER_CATALOGS_URL.format(dealer_id=dealer_id))
+        if response.status_code == 200:
+            return response.json()
+        print(f"Catalog listing for dealer {dealer_id} returned {response.status_code}")
+    except Exception as e:
+        print(f"Error listing catalogs for dealer {dealer_id}: {e}")
+    return []
+
+
+def discover_publication(dealer_id, dealer_query=None, now=None):
+    """Find the dealer's current publication, resolving the dealer by name if needed."""
+    catalogs = fetch_dealer_catalogs(dealer_id) if dealer_id else []
+    if not catalogs and dealer_query:
+        found_id = find_dealer_id(dealer_query)
+        if found_id and found_id != dealer_id:
+            print(f"Using dealer ID {found_id} for {dealer_query}")
+            catalogs = fetch_dealer_catalogs(found_id)
+
+    catalog = select_current_catalog(catalogs, now)
+    return publication_from_catalog(catalog) if catalog else None
+
+
+def fetch_publication(publication_id):
+    """Read validity dates and page count for a known publication ID."""
+    try:
+        response = tjek_http.get(CATALOG_URL.format(publication_id=publication_id))
+        if response.status_code == 200:
+            return publication_from_catalog(response.json())
+        print(f"Catalog {publication_id} returned {response.status_code}")
+    except Exception as e:
+        print(f"Error reading catalog {publication_id}: {e}")
+    return None
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the tjek APIs, serving recorded fixtures.
+
+Serves the endpoints the scrapers use (catalog lookup and dealer listing,
+paged-publication pages, offer details and bulk offer listings) from one
+fixture file per store, with configurable latency, jitter, 429 responses and
+server errors. Point the scrapers at it with
+
+    TJEK_SQUID_API=http://127.0.0.1:8765 TJEK_VIEWER_API=http://127.0.0.1:8765
+
+Fixtures live in .cache/tjek_fixtures/<slug>.json. `record` captures a
+store's current publication from the live APIs; `build` derives fixtures
+from the deals files of a sale/ date folder (the offer descriptions are
+rebuilt from the parsed quantities, so parsing gives the same results).
+
+Usage:
+    python3 tjek_standin.py build [YYYY-MM-DD]
+    python3 tjek_standin.py record [--store netto]
+    python3 tjek_standin.py serve [--port 8765] [--latency 40] [--jitter 20]
+                                  [--rate-limited 0.02] [--errors 0.01]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.cache', 'tjek_fixtures')
+
+DEFAULT_PORT = 8765
+HOTSPOTS_PER_PAGE = 8
+
+PAGE_PATH_PATTERN = re.compile(r'^/api/paged-publications/([^/]+)/(\d+)$')
+CATALOG_PATH_PATTERN = re.compile(r'^/v2/catalogs/([^/]+)$')
+OFFER_PATH_PATTERN = re.compile(r'^/v2/offers/([^/]+)$')
+
+
+def fixture_path(slug, fixture_dir=FIXTURE_DIR):
+    return os.path.join(fixture_dir, f"{slug}.json")
+
+
+def write_fixture(fixture, fixture_dir=FIXTURE_DIR):
+    os.makedirs(fixture_dir, exist_ok=True)
+    path = fixture_path(fixture["store"], fixture_dir)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(fixture, f, ensure_ascii=False, separators=(',', ':'))
+    return path
+
+
+def load_fixtures(fixture_dir=FIXTURE_DIR, stores=None):
+    """Fixtures in `fixture_dir`, keyed by store slug."""
+    fixtures = {}
+    if not os.path.isdir(fixture_dir):
+        return fixtures
+    for name in sorted(os.listdir(fixture_dir)):
+        slug = name[:-len('.json')]
+        if name.endswith('.json') and (not stores or slug in stores):
+            with open(os.path.join(fixture_dir, name), encoding='utf-8') as f:
+                fixtures[slug] = json.load(f)
+    return fixtures
+
+
+def fixture_from_deals(config, store_data):
+    """A fixture for one store built from its <slug>_deals.json payload."""
+    publication_id = f"fixture-{config.slug}"
+    offers = {}
+    for i, deal in enumerate(store_data["deals"]):
+        description = deal.get("quantity") or ""
+        if deal.get("is_app_price"):
+            description = f"{description}. App-pris".lstrip(". ")
+        offer_id = f"{config.slug}{i:05d}"
+        offers[offer_id] = {
+            "id": offer_id,
+            "heading": deal["original_name"],
+            "description": description,
+            "pricing": {"price": deal["price"], "currency": "DKK"},
+        }
+
+    offer_ids = list(offers)
+    pages = [
+        {"hotspots": [{"offer": {"id": offer_id, "heading": offers[offer_id]["heading"]}}
+                      for offer_id in offer_ids[start:start + HOTSPOTS_PER_PAGE]]}
+        for start in range(0, len(offer_ids), HOTSPOTS_PER_PAGE)
+    ]
+    return {
+        "store": config.slug,
+        "dealer_id": config.dealer_id,
+        "catalog": {
+            "id": publication_id,
+            "dealer_id": config.dealer_id,
+            "run_from": f"{store_data['valid_from']}T00:00:00+0000",
+            "run_till": f"{store_data['valid_to']}T23:59:59+0000",
+            "page_count": len(pages),
+        },
+        "pages": pages,
+        "offers": offers,
+    }
+
+
+def build_fixtures(date_folder=None, fixture_dir=FIXTURE_DIR):
+    """Derive fixtures from sale/<date>/<slug>_deals.json. Returns the written paths."""
+    from deals_index import SALE_DIR, latest_date_folder, read_store_files
+    from stores import STORES
+
+    date_folder = date_folder or latest_date_folder()
+    configs = {config.slug: config for config in STORES}
+    paths = []
+    for slug, store_data in read_store_files(os.path.join(SALE_DIR, date_folder)):
+        if slug in configs:
+            paths.append(write_fixture(fixture_from_deals(configs[slug], store_data), fixture_dir))
+    return paths
+
+
+def record_fixture(config, fixture_dir=FIXTURE_DIR):
+    """Record a store's current publication from the live APIs."""
+    import tjek_fetch
+    import tjek_http
+    from tjek_publications import DEALER_CATALOGS_URL, select_current_catalog
+
+    response = tjek_http.get(DEALER_CATALOGS_URL.format(dealer_id=config.dealer_id))
+    catalog = select_current_catalog(response.json()) if response.status_code == 200 else None
+    if not catalog:
+        raise RuntimeError(f"No current catalog for {config.name}")
+
+    pages = []
+    for _, page in tjek_fetch.crawl_publication(catalog["id"], config.max_pages,
+                                                page_count=catalog.get("page_count")):
+        if not isinstance(page, Exception) and page.status_code == 200:
+            pages.append(page.json())
+
+    offer_ids = list(dict.fromkeys(
+        hotspot["offer"]["id"] for page in pages for hotspot in page.get("hotspots", [])
+        if "id" in hotspot.get("offer", {})
+    ))
+    offers = {}
+    for offer_id, response in zip(offer_ids, tjek_fetch.fetch_offers(offer_ids, bulk=False)):
+        if not isinstance(response, Exception) and response.status_code == 200:
+            offers[offer_id] = response.json()
+
+    catalog["page_count"] = len(pages)
+    return write_fixture({"store": config.slug, "dealer_id": config.dealer_id, "catalog": catalog,
+                          "pages": pages, "offers": offers}, fixture_dir)
+
+
+class StandinServer(ThreadingHTTPServer):
+    """HTTP server answering tjek API requests from fixtures, with fault injection."""
+
+    daemon_threads = True
+
+    def __init__(self, fixtures, port=DEFAULT_PORT, latency_ms=0.0, jitter_ms=0.0,
+                 rate_limited=0.0, errors=0.0, seed=0):
+        super().__init__(('127.0.0.1', port), StandinHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limited = rate_limited
+        self.errors = errors
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {}
+
+        self.catalogs = {}
+        self.dealer_catalogs = {}
+        self.pages = {}
+        self.offers = {}
+        for fixture in fixtures.values():
+            catalog = dict(fixture["catalog"])
+            self.catalogs[catalog["id"]] = catalog
+            self.dealer_catalogs.setdefault(fixture.get("dealer_id"), []).append(catalog)
+            self.pages[catalog["id"]] = fixture["pages"]
+            self.offers.update(fixture["offers"])
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def draw_fault(self):
+        """Sampled delay in seconds and injected status (None for a normal answer)."""
+        with self._lock:
+            delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            roll = self._random.random()
+        if roll < self.rate_limited:
+            return delay, 429
+        if roll < self.rate_limited + self.errors:
+            return delay, 500
+        return delay, None
+
+    def current_catalog(self, catalog):
+        """The catalog with its validity moved to the current week, so discovery finds it."""
+        today = datetime.now().date()
+        return dict(catalog, run_from=f"{today - timedelta(days=1)}T00:00:00+0000",
+                    run_till=f"{today + timedelta(days=6)}T23:59:59+0000")
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            status, body = 304, b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if status in (200, 304):
+            self.send_header('ETag', etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        delay, fault = server.draw_fault()
+        if delay:
+            time.sleep(delay)
+        if fault == 429:
+            server.count('429')
+            return self.send_json(429, {"message": "rate limited"}, {'Retry-After': '0'})
+        if fault:
+            server.count(str(fault))
+            return self.send_json(fault, {"message": "injected error"})
+
+        page = PAGE_PATH_PATTERN.match(url.path)
+        if page:
+            server.count('page')
+            pages = server.pages.get(page.group(1), [])
+            number = int(page.group(2))
+            if 1 <= number <= len(pages):
+                return self.send_json(200, pages[number - 1])
+            return self.send_json(404, {"message": "no such page"})
+
+        if url.path == '/v2/offers':
+            server.count('bulk')
+            ids = parse_qs(url.query).get('offer_ids', [''])[0].split(',')
+            return self.send_json(200, [server.offers[i] for i in ids if i in server.offers])
+
+        offer = OFFER_PATH_PATTERN.match(url.path)
+        if offer:
+            server.count('offer')
+            payload = server.offers.get(offer.group(1))
+            return self.send_json(200, payload) if payload else self.send_json(404, {})
+
+        if url.path == '/v2/catalogs':
+            server.count('catalogs')
+            dealer_id = parse_qs(url.query).get('dealer_ids', [''])[0]
+            return self.send_json(200, [server.current_catalog(catalog)
+                                        for catalog in server.dealer_catalogs.get(dealer_id, [])])
+
+        catalog = CATALOG_PATH_PATTERN.match(url.path)
+        if catalog and catalog.group(1) in server.catalogs:
+            server.count('catalog')
+            return self.send_json(200, server.current_catalog(server.catalogs[catalog.group(1)]))
+
+        server.count('404')
+        return self.send_json(404, {"message": "not found"})
+
+
+def start_server(fixtures, **options):
+    """Start a StandinServer on a background thread and return it."""
+    server = StandinServer(fixtures, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded tjek API fixtures locally.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="derive fixtures from a sale/ date folder")
+    build.add_argument("date", nargs="?", help="date folder under sale/ (default: latest)")
+
+    record = commands.add_parser("record", help="record fixtures from the live APIs")
+    record.add_argument("--store", action="append", help="store slug (repeatable, default: all)")
+
+    serve = commands.add_parser("serve", help="serve the fixtures")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--latency", type=float, default=0.0, help="added latency per request, ms")
+    serve.add_argument("--jitter", type=float, default=0.0, help="latency varies by +/- this, ms")
+    serve.add_argument("--rate-limited", type=float, default=0.0,
+                       help="fraction of requests answered with 429")
+    serve.add_argument("--errors", type=float, default=0.0,
+                       help="fraction of requests answered with 500")
+    serve.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        for path in build_fixtures(args.date):
+            print(f"Wrote {path}")
+    elif args.command == "record":
+        from stores import STORES
+        for config in STORES:
+            if not args.store or config.slug in args.store:
+                print(f"Recorded {record_fixture(config)}")
+    else:
+        fixtures = load_fixtures()
+        if not fixtures:
+            print(f"No fixtures in {FIXTURE_DIR}; run 'build' or 'record' first")
+            return 1
+        server = StandinServer(fixtures, port=args.port, latency_ms=args.latency,
+                               jitter_ms=args.jitter, rate_limited=args.rate_limited,
+                               errors=args.errors, seed=args.seed)
+        print(f"Serving {', '.join(fixtures)} on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Batch price-per-unit computation over whole columns of deals.
+
+price_per_base_unit() in deal_parser.py converts one deal at a time; this
+module converts whole columns of prices, quantities and unit types (one
+store, or many weeks of deals files) to kr/kg, kr/l and kr/stk in one
+vectorized pass. Rows without a valid unit price (unknown unit, missing or
+zero quantity or price) are reported in an explicit `invalid` mask instead
+of as None values.
+
+NumPy is optional; without it the same results are computed in plain Python.
+The CLI recomputes price_per_unit in the deals files under sale/ from their
+stored quantity and unit_type, e.g. after a change to the unit factors or
+rounding. It does not re-parse quantities: the deals files keep the heading
+but not the description most sizes come from, so a quantity parsing change
+needs a re-scrape (without --incremental).
+
+Usage: python3 unit_prices.py [YYYY-MM-DD ...] [--write]
+"""
+import argparse
+import math
+import os
+import time
+from collections import namedtuple
+
+from deal_parser import BASE_UNIT_FACTORS, quantity_value
+from deals_index import DATE_FOLDER_PATTERN, SALE_DIR, read_store_files
+from deals_output import write_json_atomic
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# values are the unit prices (NaN where invalid), invalid the mask of rows
+# without one; NumPy arrays when NumPy is installed, else lists
+UnitPrices = namedtuple('UnitPrices', ['values', 'invalid'])
+
+
+def _floats(column):
+    """A column as floats, with None and non-numbers as NaN."""
+    if np is not None and isinstance(column, np.ndarray):
+        return column.astype(float, copy=False)
+    floats = []
+    for value in column:
+        try:
+            floats.append(float(value))
+        except (TypeError, ValueError):
+            floats.append(math.nan)
+    return np.array(floats, dtype=float) if np is not None else floats
+
+
+def quantity_values(quantities):
+    """Numeric amounts of quantity strings ('2 x 500 g' is 1000), NaN if unparseable."""
+    # Quantity strings repeat a lot ('500 g'), so each distinct one is parsed once
+    parsed = {}
+    values = []
+    for quantity in quantities:
+        value = parsed.get(quantity)
+        if value is None:
+            value = quantity_value(quantity) if isinstance(quantity, str) else None
+            value = parsed[quantity] = math.nan if value is None else value
+        values.append(value)
+    return np.array(values, dtype=float) if np is not None else values
+
+
+def unit_factors(unit_types):
+    """Factor from each unit type to its base unit (kg, l, stk), NaN if unknown."""
+    factors = [BASE_UNIT_FACTORS.get(unit_type, math.nan) for unit_type in unit_types]
+    return np.array(factors, dtype=float) if np is not None else factors
+
+
+def base_unit_prices(prices, values, unit_types):
+    """
+    Price per base unit for columns of prices, numeric quantities and unit
+    types, rounded to øre like price_per_base_unit().
+    """
+    prices = _floats(prices)
+    values = _floats(values)
+    factors = unit_factors(unit_types)
+
+    if np is not None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            raw = prices / values * factors
+            invalid = ~np.isfinite(raw) | (raw == 0) | ~(values > 0)
+            result = np.where(invalid, np.nan, np.round(raw, 2))
+            # np.round scales by 100 first, so it can land on the other side of
+            # a half øre than round(); redo the rows that are that close in Python
+            scaled = raw * 100
+            near_half = ~invalid & (np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+        for row in np.flatnonzero(near_half):
+            result[row] = round(float(raw[row]), 2)
+        return UnitPrices(result, invalid)
+
+    result = []
+    invalid = []
+    for price, value, factor in zip(prices, values, factors):
+        raw = price / value * factor if value > 0 else math.nan
+        bad = not math.isfinite(raw) or raw == 0
+        result.append(math.nan if bad else round(raw, 2))
+        invalid.append(bad)
+    return UnitPrices(result, invalid)
+
+
+def deal_unit_prices(deals):
+    """Unit prices for a list of deal dicts, from their price, quantity and unit_type."""
+    return base_unit_prices(
+        [deal.get('price') for deal in deals],
+        quantity_values([deal.get('quantity') for deal in deals]),
+        [deal.get('unit_type') for deal in deals],
+    )
+
+
+def recompute_date_folders(date_folders, sale_dir=SALE_DIR, write=False):
+    """
+    Recompute price_per_unit in the deals files of `date_folders` from
+    their stored quantity and unit_type.
+
+    Returns (deal count, changed count); with `write`, changed files are
+    rewritten.
+    """
+    loaded = [(os.path.join(sale_dir, folder, f"{slug}_deals.json"), store_data)
+              for folder in date_folders
+              for slug, store_data in read_store_files(os.path.join(sale_dir, folder))]
+    deals = [deal for _, store_data in loaded for deal in store_data['deals']]
+    unit_prices = deal_unit_prices(deals)
+
+    changed = 0
+    row = 0
+    for path, store_data in loaded:
+        file_changed = False
+        for deal in store_data['deals']:
+            price_per_unit = None if unit_prices.invalid[row] else float(unit_prices.values[row])
+            row += 1
+            if deal.get('price_per_unit') != price_per_unit:
+                deal['price_per_unit'] = price_per_unit
+                file_changed = True
+                changed += 1
+        if write and file_changed:
+            write_json_atomic(path, store_data, indent=2)
+    return len(deals), changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute unit prices in the deals files.")
+    parser.add_argument("dates", nargs="*", help="date folders under sale/ (default: all)")
+    parser.add_argument("--write", action="store_true", help="rewrite deals files whose unit prices changed")
+    args = parser.parse_args()
+
+    folders = args.dates or sorted(name for name in os.listdir(SALE_DIR) if DATE_FOLDER_PATTERN.match(name))
+    started = time.perf_counter()
+    total, changed = recompute_date_folders(folders, write=args.write)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"Recomputed {total} unit prices in {len(folders)} date folders in {elapsed:.0f} ms "
+          f"({'NumPy' if np is not None else 'plain Python'}): {changed} changed")
+    if changed and args.write:
+        print("Rebuild deals_index.py, price_comparison.py and price_history.py append to pick them up")
+    elif changed:
+        print("Run with --write to update the files")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,33 @@
+-- Migration: Deals Bulk Load
+-- Description: Columns and indexes used by scripts/load_deals.py, which upserts
+-- each store/week of scraped deals into the deals table, and by the deal lookup
+-- in /api/shopping-lists/generate. Runs on top of the stores, categories,
+-- products and deals tables from docs/supabase-setup.md; safe to run on an
+-- existing deals table.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- ====================
+-- DEALS TABLE
+-- ====================
+-- Deals reference their store and product as in docs/supabase-setup.md; the
+-- loader resolves stores by slug and products by normalized name and category
+ALTER TABLE deals ADD COLUMN IF NOT EXISTS store_id UUID REFERENCES stores(id);
+ALTER TABLE deals ADD COLUMN IF NOT EXISTS product_id UUID REFERENCES products(id);
+ALTER TABLE deals ADD COLUMN IF NOT EXISTS deal_hash TEXT; -- content hash, unique per store/week
+ALTER TABLE deals ADD COLUMN IF NOT EXISTS category TEXT;
+ALTER TABLE deals ADD COLUMN IF NOT EXISTS normalized_name TEXT;
+ALTER TABLE deals ADD COLUMN IF NOT EXISTS week_number INTEGER;
+
+-- ====================
+-- INDEXES
+-- ====================
+
+-- Conflict target of the loader's upsert
+CREATE UNIQUE INDEX IF NOT EXISTS idx_deals_store_week_hash ON deals(store_id, valid_from, deal_hash);
+
+-- Current deals and ingredient name lookups
+CREATE INDEX IF NOT EXISTS idx_deals_valid_to ON deals(valid_to);
+CREATE INDEX IF NOT EXISTS idx_deals_original_name_trgm ON deals USING GIN(original_name gin_trgm_ops);
+
+COMMENT ON COLUMN deals.deal_hash IS 'Hash of the scraped deal; identifies it within its store and week (valid_from)';
@@ -234,6 +234,7 @@ export interface DealItem {
   category: string;
   original_name: string;
   normalized_name: string;
+  product_key?: string; // stable key of the normalized product, shared across stores and weeks
   price: number;
   quantity: string;
   unit_type: string;
@@ -258,6 +259,47 @@ export interface DealWithStore extends DealItem {
   valid_from: string;
   valid_to: string;
   week_number: number;
+  deal_hash?: string; // present in deals_index.json; matches deals.deal_hash in the database
+}
+
+// sale/manifest.json, written by the scrapers
+export interface DealsManifest {
+  latest_date: string;
+  index: string | null; // path of the deals index relative to sale/
+  generated_at: string;
+}
+
+// sale/<date>/deals_index.json: all stores' deals with precomputed lookups.
+// The by_* and price_per_unit_* arrays hold positions into deals.
+export interface DealsIndex {
+  version: number;
+  date: string;
+  generated_at: string;
+  stores: { slug: 'netto' | 'rema' | 'meny'; store_name: string }[];
+  categories: string[];
+  categories_by_store: Record<string, string[]>;
+  deals: DealWithStore[];
+  by_store: Record<string, number[]>;
+  by_category: Record<string, number[]>;
+  price_per_unit_asc: number[];
+  price_per_unit_desc: number[];
+  match: DealMatchIndex;
+}
+
+// Ingredient matching postings (scripts/deal_matcher.py), positions into deals
+export interface DealMatchIndex {
+  tokens: Record<string, number[]>;
+  trigrams: Record<string, number[]>;
+  units: Record<string, number[]>;
+}
+
+export interface DealMatchAPIResponse {
+  success: boolean;
+  data?: {
+    matches: { ingredient: string; deals: DealWithStore[] }[];
+    latest_date: string;
+  };
+  error?: string;
 }
 
 // API response types